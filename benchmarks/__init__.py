@@ -0,0 +1,2 @@
+"""Performance benchmarks, run from the repository root with
+python3 -m benchmarks.<name>."""
@@ -0,0 +1,43 @@
+"""Measures the memory allocated per command by the library accessors.
+
+    python3 -m benchmarks.accessor_allocations [rows]
+"""
+
+from benchmarks.catalog import synthetic_library
+import sys
+import tracemalloc
+
+
+def peak_allocation(operation):
+    """Returns the peak bytes allocated while running operation()."""
+    tracemalloc.start()
+    try:
+        operation()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(count=1_000_000):
+    library = synthetic_library(count)
+    video_id = f"video_{count - 1:08d}"
+    cases = [
+        ("NUMBER_OF_VIDEOS",
+         lambda: len(library.get_all_videos()),
+         lambda: library.number_of_videos()),
+        ("ADD_TO_PLAYLIST id check",
+         lambda: video_id in library.get_all_video_urls(),
+         lambda: library.contains(video_id)),
+        ("iterate all videos",
+         lambda: sum(1 for _ in library.get_all_videos()),
+         lambda: sum(1 for _ in library.iter_videos())),
+    ]
+    print(f"{count} videos, peak bytes allocated per call")
+    print(f"  {'':26s} {'before':>14s} {'after':>10s}")
+    for name, before, after in cases:
+        print(f"  {name:26s} {peak_allocation(before):14,d} "
+              f"{peak_allocation(after):10,d}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
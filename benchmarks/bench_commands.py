@@ -0,0 +1,142 @@
+"""End-to-end timings of every CommandParser command on synthetic catalogs.
+
+Needs pytest-benchmark. The file does not match the test file patterns,
+so the regular test run never collects it; run it explicitly:
+
+    python3 -m pytest benchmarks/bench_commands.py \
+        --benchmark-json=current.json
+    python3 -m benchmarks.compare_benchmarks baseline.json current.json
+
+BENCH_SIZES picks the catalog sizes, e.g. BENCH_SIZES=1000,100000,1000000
+(10000000 works too, given several GB of memory). Every size also gets a
+playlist workload of BENCH_PLAYLISTS playlists of up to BENCH_PLAYLIST_SIZE
+videos. Output goes to a NullSink, so only the commands are timed.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.catalog import synthetic_library
+from src.command_parser import CommandParser
+from src.output import NullSink
+from src.session import SessionState
+from src.video_player import VideoPlayer
+import os
+
+
+SIZES = [int(size) for size in
+         os.environ.get("BENCH_SIZES", "1000,100000").split(",")]
+PLAYLISTS = int(os.environ.get("BENCH_PLAYLISTS", "100"))
+PLAYLIST_SIZE = int(os.environ.get("BENCH_PLAYLIST_SIZE", "1000"))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "50"))
+
+
+class BenchEnvironment:
+    """A class used to hold the player, session and catalog a size is
+    benchmarked with."""
+
+    def __init__(self, size):
+        self.library = synthetic_library(size)
+        self.video_ids = list(self.library.iter_video_ids())
+        self.session = SessionState()
+        self.parser = CommandParser(VideoPlayer(
+            NullSink(), lambda: "No", self.library, self.session))
+        self.playlist_videos = [self.library.get_video(video_id) for video_id
+                                in self.video_ids[:PLAYLIST_SIZE]]
+        for number in range(PLAYLISTS):
+            self.fill(self.session.playlists.create(f"playlist_{number:04d}"))
+        self.session.playlists.create("scratch")
+
+    @property
+    def target(self):
+        """The id the single video commands are run with."""
+        return self.video_ids[len(self.video_ids) // 2 + 1]
+
+    def fill(self, playlist):
+        playlist.load_videos((video.video_id for video in self.playlist_videos),
+                             self.playlist_videos)
+
+    def play(self, paused=False):
+        video = self.library.get_video(self.target)
+        self.session.playing_video = video
+        self.session.paused_video = video if paused else None
+
+
+def _allow(env):
+    env.library.allow_video(env.target)
+
+
+def _flag(env):
+    env.library.flag_video(env.target, "benchmark")
+
+
+def _delete_new(env):
+    env.session.playlists.delete("new_playlist")
+
+
+def _remove_target(env):
+    env.session.playlists.get("scratch").remove_video(env.target)
+
+
+def _add_target(env):
+    env.session.playlists.get("scratch").add_video(
+        env.library.get_video(env.target))
+
+
+def _refill_scratch(env):
+    env.fill(env.session.playlists.get("scratch"))
+
+
+def _recreate_doomed(env):
+    env.fill(env.session.playlists.create("doomed") or
+             env.session.playlists.get("doomed"))
+
+
+# Command name -> (arguments, setup run before every round or None).
+# Setups put back whatever the previous round changed, so every round
+# times the same, successful, path.
+WORKLOADS = {
+    "NUMBER_OF_VIDEOS": (lambda env: [], None),
+    "SHOW_ALL_VIDEOS": (lambda env: [], None),
+    "PLAY": (lambda env: [env.target], lambda env: env.play()),
+    "PLAY_RANDOM": (lambda env: [], None),
+    "STOP": (lambda env: [], lambda env: env.play()),
+    "PAUSE": (lambda env: [], lambda env: env.play()),
+    "CONTINUE": (lambda env: [], lambda env: env.play(paused=True)),
+    "SHOW_PLAYING": (lambda env: [], lambda env: env.play()),
+    "CREATE_PLAYLIST": (lambda env: ["new_playlist"], _delete_new),
+    "ADD_TO_PLAYLIST": (lambda env: ["scratch", env.target], _remove_target),
+    "REMOVE_FROM_PLAYLIST": (lambda env: ["scratch", env.target], _add_target),
+    "CLEAR_PLAYLIST": (lambda env: ["scratch"], _refill_scratch),
+    "DELETE_PLAYLIST": (lambda env: ["doomed"], _recreate_doomed),
+    "SHOW_PLAYLIST": (lambda env: ["playlist_0000"], None),
+    "SHOW_ALL_PLAYLISTS": (lambda env: [], None),
+    "SEARCH_VIDEOS": (lambda env: ["cats"], None),
+    "SEARCH_VIDEOS_FUZZY": (lambda env: ["amazng", "cats"], None),
+    "SEARCH_VIDEOS_WITH_TAG": (lambda env: ["#cat"], None),
+    "FLAG_VIDEO": (lambda env: [env.target, "benchmark"], _allow),
+    "ALLOW_VIDEO": (lambda env: [env.target], _flag),
+    "HELP": (lambda env: [], None),
+}
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}")
+def env(request):
+    return BenchEnvironment(request.param)
+
+
+def test_every_command_has_a_workload(env):
+    assert {command.name for command in env.parser.get_commands()} == \
+           set(WORKLOADS)
+
+
+@pytest.mark.parametrize("name", sorted(WORKLOADS))
+def test_command(benchmark, env, name):
+    arguments, setup = WORKLOADS[name]
+    command = [name] + arguments(env)
+    if setup is None:
+        benchmark(env.parser.execute_command, command)
+    else:
+        benchmark.pedantic(env.parser.execute_command, args=(command,),
+                           setup=lambda: setup(env), rounds=ROUNDS)
@@ -0,0 +1,40 @@
+"""Synthetic catalogs for the benchmarks."""
+
+from src.video_library import VideoLibrary
+import os
+import tempfile
+
+
+TAGS = ["#cat", "#dog", "#animal", "#google", "#career", "#music", "#news",
+        "#travel", "#food", "#gaming"]
+WORDS = ["Amazing", "Funny", "Cats", "Dogs", "Life", "Google", "Video",
+         "About", "Nothing", "Another", "Cooking", "Travel", "Music", "Live",
+         "Tutorial", "Review", "Unboxing", "Gaming", "News", "Highlights"]
+
+
+def catalog_rows(count):
+    """Yields deterministic (title, video_id, tags) rows."""
+    for i in range(count):
+        title = " ".join(WORDS[(i * prime) % len(WORDS)]
+                         for prime in (1, 7, 13)) + f" {i}"
+        tags = [TAGS[i % len(TAGS)], TAGS[(i * 3 + 1) % len(TAGS)]]
+        yield title, f"video_{i:08d}", tags
+
+
+def write_catalog(path, count):
+    """Writes a videos.txt style catalog of count rows to path."""
+    with open(path, "w") as catalog_file:
+        for title, video_id, tags in catalog_rows(count):
+            catalog_file.write(f"{title} | {video_id} | {' , '.join(tags)}\n")
+
+
+def synthetic_library(count):
+    """Returns a VideoLibrary loaded from a temporary catalog of count
+    rows."""
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        write_catalog(path, count)
+        return VideoLibrary(path)
+    finally:
+        os.remove(path)
@@ -0,0 +1,49 @@
+"""Compares the command table with the previous if/elif dispatch chain.
+
+    python3 -m benchmarks.command_dispatch [iterations]
+"""
+
+from src.command_parser import _BUILTIN_COMMANDS, CommandParser
+from src.output import NullSink
+from src.video_player import VideoPlayer
+import sys
+import time
+
+
+NAMES = [entry[0] for entry in _BUILTIN_COMMANDS] + ["HELP"]
+
+
+def legacy_dispatch(command):
+    """Walks the command names the way the if/elif chain did, upper-casing
+    the command name again for every comparison."""
+    for name in NAMES:
+        if command[0].upper() == name:
+            return name
+    return None
+
+
+def time_calls(dispatch, command, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        dispatch(command)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main(iterations=200_000):
+    parser = CommandParser(VideoPlayer(NullSink()))
+    parser.register_command("NOOP", lambda: None)
+    table = parser._commands
+    print(f"ns per lookup over {iterations} iterations")
+    for command in (["play", "amazing_cats_video_id"],
+                    ["allow_video", "amazing_cats_video_id"],
+                    ["not_a_command"]):
+        legacy = time_calls(legacy_dispatch, command, iterations)
+        lookup = time_calls(lambda c: table.get(c[0].upper()), command,
+                            iterations)
+        print(f"  {command[0]:14s} if/elif {legacy:7.0f}  table {lookup:5.0f}")
+    end_to_end = time_calls(parser.execute_command, ["noop"], iterations)
+    print(f"  execute_command end to end (no-op handler): {end_to_end:.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,72 @@
+"""Compares two pytest-benchmark JSON reports and fails on regressions.
+
+    python3 -m benchmarks.compare_benchmarks baseline.json current.json \
+        [--threshold 20] [--stat median]
+
+Exits with status 1 when a benchmark of the baseline got slower by more
+than threshold percent, or is missing from the current report.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load_report(path, stat):
+    """Returns {benchmark fullname: stat in seconds} of a JSON report."""
+    with open(path) as report_file:
+        report = json.load(report_file)
+    return {benchmark["fullname"]: benchmark["stats"][stat]
+            for benchmark in report["benchmarks"]}
+
+
+def compare(baseline, current, threshold):
+    """Compares two {name: seconds} mappings.
+
+    Returns:
+        A (report lines, regressed names) pair.
+    """
+    lines = []
+    regressed = []
+    for name in sorted(baseline):
+        before = baseline[name]
+        after = current.get(name)
+        if after is None:
+            lines.append(f"MISSING    {name}")
+            regressed.append(name)
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        status = "REGRESSED" if change > threshold else "ok"
+        if status == "REGRESSED":
+            regressed.append(name)
+        lines.append(f"{status:<10} {name}  {before * 1e6:12.1f} us -> "
+                     f"{after * 1e6:12.1f} us ({change:+.1f}%)")
+    for name in sorted(set(current) - set(baseline)):
+        lines.append(f"NEW        {name}  {current[name] * 1e6:12.1f} us")
+    return lines, regressed
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="python3 -m benchmarks.compare_benchmarks",
+        description="Fail when benchmarks regress against a baseline.")
+    arg_parser.add_argument("baseline")
+    arg_parser.add_argument("current")
+    arg_parser.add_argument("--threshold", type=float, default=20.0,
+                            help="allowed slowdown in percent (default 20)")
+    arg_parser.add_argument("--stat", default="median",
+                            choices=["min", "mean", "median", "max"])
+    args = arg_parser.parse_args(argv)
+    lines, regressed = compare(load_report(args.baseline, args.stat),
+                               load_report(args.current, args.stat),
+                               args.threshold)
+    print("\n".join(lines))
+    if regressed:
+        print(f"{len(regressed)} benchmarks regressed by more than "
+              f"{args.threshold:g}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
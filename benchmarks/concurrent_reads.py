@@ -0,0 +1,98 @@
+"""Measures snapshot read throughput with 1 to 8 reader threads, with and
+without a writer flagging videos, and the cost of publishing a batch and
+a flag.
+
+    python3 -m benchmarks.concurrent_reads [rows] [seconds]
+
+Reads never take a lock, but they hold the GIL, so total throughput stays
+roughly flat as readers are added: the layer buys consistency, not CPU
+parallelism, on a GIL build of CPython.
+"""
+
+from benchmarks.catalog import synthetic_library
+from src.concurrent_library import ConcurrentVideoLibrary
+import sys
+import threading
+import time
+
+
+def read(library, position):
+    """A few reads a session might make, against one snapshot."""
+    snapshot = library.snapshot()
+    snapshot.get_video(f"video_{position % 1000:08d}")
+    snapshot.search_titles(str(position % 1000 + 1000), limit=20)
+    snapshot.get_videos_by_title(position % 1000, 20)
+    snapshot.get_random_video()
+
+
+def write(library, video_ids, position):
+    video_id = video_ids[position % len(video_ids)]
+    with library.batch() as draft:
+        if not draft.flag_video(video_id, "benchmark"):
+            draft.allow_video(video_id)
+
+
+def flag(library, video_ids, position):
+    video_id = video_ids[position % len(video_ids)]
+    if not library.flag_video(video_id, "benchmark"):
+        library.allow_video(video_id)
+
+
+def run(library, readers, with_writer, seconds):
+    """Returns (reads/sec, batches/sec)."""
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+    video_ids = list(library.iter_video_ids())
+
+    def reader(number):
+        while not stop.is_set():
+            read(library, reads[number])
+            reads[number] += 1
+
+    def writer():
+        while not stop.is_set():
+            write(library, video_ids, writes[0] * 7919)
+            writes[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(number,))
+               for number in range(readers)]
+    if with_writer:
+        threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds, writes[0] / seconds
+
+
+def main(count=100_000, seconds=1.0):
+    library = ConcurrentVideoLibrary(synthetic_library(count))
+    library.get_sampler().seed(0)
+    video_ids = list(library.iter_video_ids())
+    start = time.perf_counter()
+    repeat = 20
+    for position in range(repeat):
+        write(library, video_ids, position)
+    batch = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    repeat = 1000
+    for position in range(repeat):
+        flag(library, video_ids, position)
+    flagged = (time.perf_counter() - start) / repeat
+    print(f"{count} videos, {batch * 1e3:.1f} ms per published batch, "
+          f"{flagged * 1e3:.2f} ms per published flag")
+    print(f"  {'readers':>7} {'reads/s':>12} {'reads/s + writer':>18}"
+          f" {'batches/s':>10}")
+    for readers in (1, 2, 4, 8):
+        alone, _ = run(library, readers, False, seconds)
+        contended, batches = run(library, readers, True, seconds)
+        print(f"  {readers:7d} {alone:12.0f} {contended:18.0f}"
+              f" {batches:10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 1.0)
@@ -0,0 +1,44 @@
+"""Measures listings, searches and random picks with some videos flagged.
+
+    python3 -m benchmarks.flagged_listing [rows]
+"""
+
+from benchmarks.catalog import synthetic_library
+from src.output import NullSink
+from src.video_player import VideoPlayer
+import sys
+import time
+
+
+# One video in FLAG_EVERY is flagged.
+FLAG_EVERY = 100
+RANDOM_PICKS = 100_000
+
+
+def timed(action):
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def main(count=1_000_000):
+    library = synthetic_library(count)
+    video_ids = list(library.iter_video_ids())
+    flagging = timed(lambda: [library.flag_video(video_id, "benchmark")
+                              for video_id in video_ids[::FLAG_EVERY]])
+    player = VideoPlayer(NullSink(), video_library=library)
+    listing = timed(player.show_all_videos)
+    random_picks = timed(lambda: [library.get_random_video()
+                                  for _ in range(RANDOM_PICKS)])
+    allowing = timed(lambda: [library.allow_video(video_id)
+                              for video_id in video_ids[::FLAG_EVERY]])
+    flagged = len(video_ids[::FLAG_EVERY])
+    print(f"{count} videos, {flagged} flagged")
+    print(f"  flag:          {flagging / flagged * 1e6:8.1f} us/video")
+    print(f"  allow:         {allowing / flagged * 1e6:8.1f} us/video")
+    print(f"  SHOW_ALL:      {listing:8.3f}s")
+    print(f"  random pick:   {random_picks / RANDOM_PICKS * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,42 @@
+"""Measures fuzzy title search latency on a synthetic catalog.
+
+    python3 -m benchmarks.fuzzy_search [rows]
+
+Every synthetic title holds three of twenty common words, so each search
+ranks the full MAX_CANDIDATES_PER_WORD of every query word; this is the
+worst case for latency.
+"""
+
+from benchmarks.title_search import synthetic_title
+from src.fuzzy_index import FuzzyIndex
+from src.video import Video
+import gc
+import sys
+import time
+
+
+def main(count=1_000_000):
+    start = time.perf_counter()
+    videos = {f"video_{i}": Video(synthetic_title(i), f"video_{i}", [])
+              for i in range(count)}
+    index = FuzzyIndex()
+    index.add_videos(list(videos.values()))
+    index.settle()
+    # Settle the collector, as in a long running server: the first full
+    # collections after a load would otherwise land in the timings.
+    gc.collect()
+    print(f"{count} titles indexed in {time.perf_counter() - start:.1f}s")
+    for term in ["amazng cats", "tutorail", "funy dgos live", "revew 4242",
+                 "4242", "xyzzy"]:
+        for limit in (10, 100):
+            repeat = 20
+            start = time.perf_counter()
+            for _ in range(repeat):
+                results = index.search(term, limit)
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"  {term!r:18s} limit={limit:<4d}"
+                  f"{len(results):5d} results {elapsed * 1e3:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,39 @@
+"""Measures what instrumentation adds to every executed command.
+
+    python3 -m benchmarks.instrumentation_overhead [iterations]
+"""
+
+from src.command_parser import CommandParser
+from src.instrumentation import Instrumentation
+from src.output import NullSink
+from src.video_player import VideoPlayer
+import sys
+import time
+
+
+def time_noop(instrumentation, iterations):
+    parser = CommandParser(VideoPlayer(NullSink()))
+    parser.register_command("NOOP", lambda: None)
+    if instrumentation is not None:
+        parser.enable_instrumentation(instrumentation)
+    command = ["NOOP"]
+    execute = parser.execute_command
+    start = time.perf_counter()
+    for _ in range(iterations):
+        execute(command)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main(iterations=200_000):
+    disabled = time_noop(None, iterations)
+    enabled = time_noop(Instrumentation(), iterations)
+    traced = time_noop(Instrumentation(trace_allocations=True),
+                       iterations // 10)
+    print(f"ns per NOOP command over {iterations} iterations")
+    print(f"  disabled:            {disabled:8.0f}")
+    print(f"  latencies:           {enabled:8.0f}")
+    print(f"  latencies + tracing: {traced:8.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,48 @@
+"""Measures playlist mutation throughput with the write-ahead log on.
+
+    python3 -m benchmarks.journal_throughput [mutations]
+"""
+
+from benchmarks.catalog import synthetic_library
+from src.output import NullSink
+from src.playlist_log import PlaylistLog, read_log
+from src.video_player import VideoPlayer
+import os
+import sys
+import tempfile
+import time
+
+
+def main(mutations=200_000):
+    library = synthetic_library(mutations // 2)
+    video_ids = list(library.iter_video_ids())
+    fd, path = tempfile.mkstemp(suffix=".wal")
+    os.close(fd)
+    try:
+        journal = PlaylistLog(path)
+        player = VideoPlayer(NullSink(), video_library=library,
+                             journal=journal)
+        player.create_playlist("benchmark")
+        start = time.perf_counter()
+        for number in range(mutations - 1):
+            video_id = video_ids[number // 2]
+            if number % 2:
+                player.remove_from_playlist("benchmark", video_id)
+            else:
+                player.add_to_playlist("benchmark", video_id)
+        journal.close()
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        records, _ = read_log(path)
+        replay = time.perf_counter() - start
+    finally:
+        os.remove(path)
+    print(f"{len(records)} mutations, {size / 1e6:.1f} MB log, "
+          f"{journal.syncs} fsyncs")
+    print(f"  durable {len(records) / elapsed:,.0f} mutations/s, "
+          f"read back in {replay:.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,119 @@
+"""A load generator for src.server that reports command latencies.
+
+Start a server (or pass --spawn to start one in a subprocess), then:
+
+    python3 -m benchmarks.load_client --sessions 2000 --commands 50
+
+Raise the open file limit (ulimit -n) for thousands of sessions.
+"""
+
+from src.server import PROMPT
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+
+
+# Search commands are followed by their answer, sent in the same write.
+WORKLOAD = [
+    "NUMBER_OF_VIDEOS",
+    "SHOW_ALL_VIDEOS",
+    "PLAY amazing_cats_video_id",
+    "PAUSE",
+    "CONTINUE",
+    "SHOW_PLAYING",
+    "STOP",
+    "PLAY_RANDOM",
+    "CREATE_PLAYLIST my_playlist",
+    "ADD_TO_PLAYLIST my_playlist funny_dogs_video_id",
+    "SHOW_PLAYLIST my_playlist",
+    "REMOVE_FROM_PLAYLIST my_playlist funny_dogs_video_id",
+    "SEARCH_VIDEOS cat\nNo",
+    "SEARCH_VIDEOS_WITH_TAG #animal\nNo",
+]
+
+
+def percentile(sorted_values, fraction):
+    """Returns the value at a fraction of a sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_session(host, port, commands, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await reader.readuntil(PROMPT)
+        for _ in range(commands):
+            command = rng.choice(WORKLOAD)
+            start = time.perf_counter()
+            writer.write(command.encode("utf-8") + b"\n")
+            await reader.readuntil(PROMPT)
+            latencies.append(time.perf_counter() - start)
+        writer.write(b"EXIT\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, sessions, commands, seed):
+    latencies = []
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_session(host, port, commands, latencies,
+                      random.Random(rng.random()))
+          for _ in range(sessions)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = [result for result in results if isinstance(result, Exception)]
+    return sorted(latencies), elapsed, failures
+
+
+def wait_for_server(process):
+    """Waits for a spawned server to print its listening line."""
+    line = process.stdout.readline()
+    if not line.startswith("Serving"):
+        raise RuntimeError(f"server failed to start: {line!r}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python3 -m benchmarks.load_client")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--sessions", type=int, default=1000)
+    arg_parser.add_argument("--commands", type=int, default=50)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--spawn", action="store_true",
+                            help="start a src.server subprocess first")
+    args = arg_parser.parse_args(argv)
+
+    process = None
+    if args.spawn:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.server", "--host", args.host,
+             "--port", str(args.port),
+             "--max-connections", str(args.sessions)],
+            stdout=subprocess.PIPE, text=True)
+        wait_for_server(process)
+    try:
+        latencies, elapsed, failures = asyncio.run(run_load(
+            args.host, args.port, args.sessions, args.commands, args.seed))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    print(f"{args.sessions} sessions, {len(latencies)} commands in "
+          f"{elapsed:.2f}s ({len(latencies) / elapsed:,.0f} commands/s), "
+          f"{len(failures)} failed sessions")
+    for name, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99)):
+        print(f"  {name} {percentile(latencies, fraction) * 1e3:8.3f} ms")
+    if failures:
+        print(f"  first failure: {failures[0]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Times loading a catalog serially and with 2, 4 and 8 worker processes.
+
+    python3 -m benchmarks.parallel_load [rows]
+
+Workers parse and index shards of the file; the calling process still
+unpickles and merges every shard, so speedups flatten once the merge
+dominates, and nothing is gained beyond the number of CPUs.
+"""
+
+from benchmarks.catalog import write_catalog
+from src.video_library import VideoLibrary
+import os
+import sys
+import tempfile
+import time
+
+
+def timed_load(path, workers):
+    """Returns (wall seconds, CPU seconds of this process, videos)."""
+    start = time.perf_counter()
+    cpu = time.process_time()
+    library = VideoLibrary(path, workers=workers)
+    return (time.perf_counter() - start, time.process_time() - cpu,
+            library.number_of_videos())
+
+
+def main(count=1_000_000):
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        write_catalog(path, count)
+        print(f"{count} rows, {os.cpu_count()} CPUs")
+        # The CPU time of this process is the part workers cannot take
+        # over: serial / merge CPU bounds the speedup with enough CPUs.
+        serial, _, videos = timed_load(path, 1)
+        print(f"  serial:    {serial:7.2f} s")
+        for workers in (2, 4, 8):
+            elapsed, merge, loaded = timed_load(path, workers)
+            assert loaded == videos
+            print(f"  {workers} workers: {elapsed:7.2f} s"
+                  f"  ({serial / elapsed:.2f}x, merge CPU {merge:.2f} s,"
+                  f" at most {serial / merge:.1f}x)")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
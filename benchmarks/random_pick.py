@@ -0,0 +1,31 @@
+"""Compares copying the catalog for each random pick with the sampler.
+
+    python3 -m benchmarks.random_pick [rows]
+"""
+
+from benchmarks.catalog import synthetic_library
+from src.utils import Utils
+import sys
+import time
+
+
+def timed(pick, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        pick()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(count=1_000_000):
+    library = synthetic_library(count)
+    library.get_sampler().seed(0)
+    copying = timed(lambda: Utils.get_random_video(library.get_all_videos()),
+                    20)
+    sampled = timed(library.get_random_video, 100_000)
+    print(f"{count} videos")
+    print(f"  get_all_videos + pick: {copying * 1e6:10.1f} us/pick")
+    print(f"  sampler:               {sampled * 1e6:10.2f} us/pick")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,33 @@
+"""Measures the cost of opening a player session on a shared library.
+
+    python3 -m benchmarks.session_creation [rows]
+"""
+
+from benchmarks.catalog import synthetic_library
+from src.command_parser import CommandParser
+from src.output import NullSink
+from src.video_player import VideoPlayer
+import sys
+import time
+
+
+def time_sessions(library, count=10_000):
+    """Returns the mean seconds to create a player and its parser."""
+    start = time.perf_counter()
+    for _ in range(count):
+        CommandParser(VideoPlayer(NullSink(), video_library=library))
+    return (time.perf_counter() - start) / count
+
+
+def main(largest=100_000):
+    for rows in (1_000, largest):
+        start = time.perf_counter()
+        library = synthetic_library(rows)
+        load = time.perf_counter() - start
+        session = time_sessions(library)
+        print(f"{rows:>9d} videos: library load {load * 1e3:9.1f} ms, "
+              f"new session {session * 1e6:6.1f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,48 @@
+"""Measures snapshot save and load time for large playlists.
+
+    python3 -m benchmarks.snapshot_io [entries]
+"""
+
+from benchmarks.catalog import synthetic_library
+from src.session import SessionState
+from src.snapshot import load_snapshot, save_snapshot
+import os
+import sys
+import tempfile
+import time
+
+
+PLAYLISTS = 20
+
+
+def main(entries=2_000_000):
+    per_playlist = entries // PLAYLISTS
+    library = synthetic_library(per_playlist * 2)
+    video_ids = list(library.iter_video_ids())
+    session = SessionState()
+    for number in range(PLAYLISTS):
+        start = number * per_playlist // PLAYLISTS
+        playlist = session.playlists.create(f"playlist_{number}")
+        playlist.add_videos(library.get_video(video_id) for video_id
+                            in video_ids[start:start + per_playlist])
+
+    fd, path = tempfile.mkstemp(suffix=".snap")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        save_snapshot(session, path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        playlists, missing = load_snapshot(path, library)
+        loaded = time.perf_counter() - start
+        size = os.path.getsize(path)
+    finally:
+        os.remove(path)
+    total = sum(len(playlist) for playlist in playlists)
+    print(f"{total} playlist entries, {size / 1e6:.1f} MB snapshot")
+    print(f"  save {saved:6.3f}s  load {loaded:6.3f}s "
+          f"({loaded / total * 1e9:.0f} ns/entry)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,41 @@
+"""Compares per-line tag formatting with the cached video listings.
+
+    python3 -m benchmarks.tag_rendering [rows]
+"""
+
+from benchmarks.catalog import catalog_rows
+from src.utils import Utils
+from src.video import Video
+import sys
+import time
+
+
+def legacy_lines(videos):
+    """The previous rendering: format_tags via str(list) for every line."""
+    lines = []
+    for video in videos:
+        formatted_tags = str(list(video.tags)).replace("'", "").replace(",", "")
+        lines.append(f" {video.title} ({video.video_id}) {formatted_tags}")
+    return "\n".join(lines)
+
+
+def timed(render, videos):
+    start = time.perf_counter()
+    output = render(videos)
+    return time.perf_counter() - start, output
+
+
+def main(count=1_000_000):
+    videos = [Video(*row) for row in catalog_rows(count)]
+    legacy, expected = timed(legacy_lines, videos)
+    cold, output = timed(Utils.format_listing, videos)
+    warm, _ = timed(Utils.format_listing, videos)
+    assert output == expected
+    print(f"{count} rows")
+    print(f"  str(list) per line:    {legacy:6.3f}s")
+    print(f"  cached, first listing: {cold:6.3f}s")
+    print(f"  cached, later listing: {warm:6.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
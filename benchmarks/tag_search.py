@@ -0,0 +1,47 @@
+"""Measures tag query latency on a synthetic catalog.
+
+    python3 -m benchmarks.tag_search [rows]
+"""
+
+from src.tag_index import TagIndex
+from src.video import Video
+import sys
+import time
+
+
+def build_index(count, vocabulary=1000):
+    """Returns a TagIndex over count videos with two tags each."""
+    index = TagIndex()
+    index.add_videos(
+        Video(f"Video {i}", f"video_{i:08d}",
+              [f"#tag{i % vocabulary}", f"#tag{(i * 7 + 3) % vocabulary}"])
+        for i in range(count))
+    return index
+
+
+def time_query(query, repeat=1000):
+    """Returns the mean seconds per call of query()."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        query()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(count=1_000_000):
+    start = time.perf_counter()
+    index = build_index(count)
+    for tag in list(index.get_tags()):  # Sort the bulk loaded postings
+        index.lookup(tag)
+    print(f"{count} videos indexed in {time.perf_counter() - start:.1f}s")
+    queries = {
+        "single tag": lambda: index.lookup("#tag1"),
+        "AND of two tags": lambda: index.search(["#tag1", "#tag10"]),
+        "OR of two rare tags": lambda: index.search(["#tag1", "#tag2"],
+                                                    match_all=False),
+    }
+    for name, query in queries.items():
+        print(f"  {name:20s} {time_query(query, 100) * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
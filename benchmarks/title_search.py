@@ -0,0 +1,41 @@
+"""Measures title substring search latency on a synthetic catalog.
+
+    python3 -m benchmarks.title_search [rows]
+"""
+
+from src.title_index import TitleIndex
+from src.video import Video
+import sys
+import time
+
+
+WORDS = ["amazing", "funny", "cats", "dogs", "life", "google", "video",
+         "about", "nothing", "another", "cooking", "travel", "music", "live",
+         "tutorial", "review", "unboxing", "gaming", "news", "highlights"]
+
+
+def synthetic_title(i):
+    """Returns a deterministic four word title."""
+    return " ".join(WORDS[(i * prime) % len(WORDS)] for prime in
+                    (1, 7, 13, 17)) + f" {i}"
+
+
+def main(count=1_000_000):
+    start = time.perf_counter()
+    index = TitleIndex()
+    index.add_videos(Video(synthetic_title(i), f"video_{i}", [])
+                     for i in range(count))
+    print(f"{count} titles indexed in {time.perf_counter() - start:.1f}s")
+    for term in ["unboxing 12345", "cats 99", "4242", "xyz", "ca", "e"]:
+        for limit in (None, 10):
+            repeat = 20
+            start = time.perf_counter()
+            for _ in range(repeat):
+                results = index.search(term, limit)
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"  {term!r:18s} limit={limit!s:4s} "
+                  f"{len(results):7d} results {elapsed * 1e3:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,56 @@
+"""Measures the memory cost per Video of the compact representation.
+
+    python3 -m benchmarks.video_memory [rows]
+"""
+
+from src.video import Video
+import sys
+import tracemalloc
+
+
+TAG_SETS = [["#cat", "#animal"], ["#dog", "#animal"], ["#google", "#career"],
+            []]
+
+
+class LegacyVideo:
+    """The previous Video layout: a __dict__ and a private tag tuple."""
+
+    def __init__(self, video_title, video_id, video_tags):
+        self._title = video_title
+        self._video_id = video_id
+        self._tags = tuple(video_tags)
+
+
+def _fresh_tags(index):
+    """Builds new tag strings, as a csv parse does for every row."""
+    return [tag[:1] + tag[1:] for tag in TAG_SETS[index % len(TAG_SETS)]]
+
+
+def bytes_per_video(video_class, count):
+    """Returns the traced bytes per video of building count videos."""
+    # Title and id strings are identical for both layouts, so they are
+    # created before tracing starts.
+    rows = [(f"Video {i}", f"video_{i}_id") for i in range(count)]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        videos = [video_class(title, video_id, _fresh_tags(i))
+                  for i, (title, video_id) in enumerate(rows)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del videos
+    return (after - before) / count
+
+
+def main(count=1_000_000):
+    legacy = bytes_per_video(LegacyVideo, count)
+    compact = bytes_per_video(Video, count)
+    print(f"{count} videos")
+    print(f"  before (__dict__, per-row tags): {legacy:8.1f} bytes/video")
+    print(f"  after  (__slots__, shared tags): {compact:8.1f} bytes/video")
+    print(f"  saving: {100 * (1 - compact / legacy):.0f}%")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,90 @@
+"""Non-interactive execution of command scripts."""
+
+from .command_parser import CommandException
+from collections import Counter
+import time
+
+
+class BatchStats:
+    """A class used to represent the counters of a batch run."""
+
+    def __init__(self):
+        self.command_counts = Counter()
+        self.errors = 0
+        self.elapsed_seconds = 0.0
+
+    @property
+    def total_commands(self):
+        """Returns how many commands were executed."""
+        return sum(self.command_counts.values())
+
+    @property
+    def commands_per_second(self):
+        """Returns the batch throughput, 0 if nothing was timed."""
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.total_commands / self.elapsed_seconds
+
+    def format_report(self):
+        """Returns a human readable summary of the run."""
+        lines = [f"{name:24s} {count:10d}"
+                 for name, count in self.command_counts.most_common()]
+        lines.append(f"{self.total_commands} commands ({self.errors} errors) "
+                     f"in {self.elapsed_seconds:.3f}s, "
+                     f"{self.commands_per_second:,.0f} commands/s")
+        return "\n".join(lines)
+
+
+class BatchRunner:
+    """A class used to execute a stream of command lines without prompts.
+
+    Answers to questions asked while a command runs, such as which search
+    result to play, are read from the next line of the stream, exactly as
+    they would be typed in an interactive session.
+    """
+
+    def __init__(self, lines):
+        """The BatchRunner class is initialized.
+
+        Args:
+            lines: An iterable of command lines, e.g. an open file.
+        """
+        self._lines = iter(lines)
+
+    def read_answer(self):
+        """Returns the next line of the stream, '' once it is exhausted.
+
+        Pass this as the read_answer of the VideoPlayer being driven.
+        """
+        return next(self._lines, "").rstrip("\n")
+
+    def run(self, parser, output):
+        """Executes every command up to the end of the stream or EXIT.
+
+        Args:
+            parser: The CommandParser to execute the commands with.
+            output: The sink command errors are written to.
+
+        Returns:
+            The BatchStats of the run.
+        """
+        stats = BatchStats()
+        counts = stats.command_counts
+        execute = parser.execute_command
+        start = time.perf_counter()
+        try:
+            for line in self._lines:
+                command = line.split()
+                name = command[0].upper() if command else ""
+                if name == "EXIT":
+                    break
+                counts[name] += 1
+                try:
+                    execute(command)
+                except CommandException as e:
+                    stats.errors += 1
+                    output.write(str(e))
+        finally:
+            output.flush()
+            stats.elapsed_seconds = time.perf_counter() - start
+        return stats
@@ -0,0 +1,636 @@
+"""A memory-mapped binary video catalog.
+
+The catalog file is laid out as (all integers little-endian):
+
+    header        magic, video, tag, tag slot, tag posting, word and word
+                  posting counts
+    video table   per video: title offset/length, id offset/length,
+                  first tag slot, tag count
+    id order      video indices sorted by video id, for binary search
+    title order   video indices sorted by title, then id
+    title ranks   per video: its position in the title order
+    title starts  per video, plus one past the last: the offset of its
+                  lowercased title in the title text
+    tag table     per distinct tag: offset/length, first posting, count
+    tag postings  per tag: the id order positions of its videos, ascending
+    tag slots     tag ids referenced by the video table
+    word table    per distinct lowercased title word, sorted by its UTF-8
+                  bytes: offset/length, first posting, count
+    word postings per word: the indices of its videos in title order
+    string pool   UTF-8 bytes of every title, id, tag and word
+    title text    UTF-8 bytes of every lowercased title, each followed by
+                  a NUL byte
+
+Compile a videos.txt style catalog with:
+
+    python3 -m src.binary_catalog videos.txt videos.bin
+"""
+
+from .fuzzy_index import DEFAULT_LIMIT as DEFAULT_FUZZY_LIMIT, FuzzyIndex, \
+    split_words
+from .video import Video
+from .video_loader import DEFAULT_CHUNK_SIZE, VideoLoader
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence, Set
+from heapq import nsmallest
+from types import MappingProxyType
+import mmap
+import random
+import struct
+import sys
+import threading
+
+
+MAGIC = b"YTCAT\x00\x00\x02"
+
+_HEADER = struct.Struct("<8sIIIIII")
+_VIDEO_RECORD = struct.Struct("<IIIIII")
+_INDEX = struct.Struct("<I")
+_POSTING_RECORD = struct.Struct("<IIII")
+
+
+def _pack_uints(values):
+    packed = array("I", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def compile_catalog(source_path, target_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Converts a '|' separated catalog into the binary catalog format.
+
+    Args:
+        source_path: The text catalog to read.
+        target_path: Where to write the binary catalog.
+        chunk_size: How many rows the loader parses at a time.
+
+    Returns:
+        The LoadStats of reading the source catalog.
+    """
+    loader = VideoLoader(source_path, chunk_size)
+    videos = {}
+    for chunk in loader.iter_chunks():
+        for video in chunk:
+            videos[video.video_id] = video  # Later rows win, as in VideoLibrary
+    videos = list(videos.values())
+
+    pool = bytearray()
+    strings = {}
+
+    def add_string(value):
+        location = strings.get(value)
+        if location is None:
+            encoded = value.encode("utf-8")
+            location = strings[value] = (len(pool), len(encoded))
+            pool.extend(encoded)
+        return location
+
+    id_order = sorted(range(len(videos)),
+                      key=lambda index: videos[index].video_id.encode("utf-8"))
+    id_ranks = [0] * len(videos)
+    for rank, index in enumerate(id_order):
+        id_ranks[index] = rank
+    title_order = sorted(range(len(videos)), key=lambda index: (
+        videos[index].title, videos[index].video_id))
+    title_ranks = [0] * len(videos)
+    for rank, index in enumerate(title_order):
+        title_ranks[index] = rank
+
+    records = []
+    tag_ids = {}
+    tag_slots = []
+    tag_postings = {}
+    for index, video in enumerate(videos):
+        first_slot = len(tag_slots)
+        for tag in video.tags:
+            tag_id = tag_ids.setdefault(tag, len(tag_ids))
+            tag_slots.append(tag_id)
+            tag_postings.setdefault(tag_id, set()).add(id_ranks[index])
+        records.append((*add_string(video.title), *add_string(video.video_id),
+                        first_slot, len(video.tags)))
+
+    word_postings = {}
+    for index in title_order:
+        for word in dict.fromkeys(split_words(videos[index].title)):
+            word_postings.setdefault(word, []).append(index)
+    words = sorted(word_postings, key=lambda word: word.encode("utf-8"))
+
+    title_text = bytearray()
+    title_starts = []
+    for video in videos:
+        title_starts.append(len(title_text))
+        title_text += video.title.lower().encode("utf-8") + b"\0"
+    title_starts.append(len(title_text))
+
+    tag_table = []
+    tag_entries = []
+    for tag, tag_id in tag_ids.items():
+        posting = sorted(tag_postings[tag_id])
+        tag_table.append((*add_string(tag), len(tag_entries), len(posting)))
+        tag_entries.extend(posting)
+    word_table = []
+    word_entries = []
+    for word in words:
+        posting = word_postings[word]
+        word_table.append((*add_string(word), len(word_entries),
+                           len(posting)))
+        word_entries.extend(posting)
+
+    with open(target_path, "wb") as target:
+        target.write(_HEADER.pack(MAGIC, len(videos), len(tag_table),
+                                  len(tag_slots), len(tag_entries),
+                                  len(word_table), len(word_entries)))
+        for record in records:
+            target.write(_VIDEO_RECORD.pack(*record))
+        target.write(_pack_uints(id_order))
+        target.write(_pack_uints(title_order))
+        target.write(_pack_uints(title_ranks))
+        target.write(_pack_uints(title_starts))
+        for entry in tag_table:
+            target.write(_POSTING_RECORD.pack(*entry))
+        target.write(_pack_uints(tag_entries))
+        target.write(_pack_uints(tag_slots))
+        for entry in word_table:
+            target.write(_POSTING_RECORD.pack(*entry))
+        target.write(_pack_uints(word_entries))
+        target.write(pool)
+        target.write(title_text)
+    return loader.stats
+
+
+class _MappedVideos(Sequence):
+    """A lazy, read-only sequence of the videos of a MappedVideoLibrary."""
+
+    def __init__(self, library):
+        self._library = library
+
+    def __len__(self):
+        return self._library.number_of_videos()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("video index out of range")
+        return self._library._video_at(index)
+
+
+class _MappedVideoIds(Set):
+    """A lazy, read-only set of the video ids of a MappedVideoLibrary.
+
+    Intersecting it with a set only looks up the ids of that set.
+    """
+
+    def __init__(self, library):
+        self._library = library
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+    def __len__(self):
+        return self._library.number_of_videos()
+
+    def __contains__(self, video_id):
+        return self._library.contains(video_id)
+
+    def __iter__(self):
+        id_at = self._library._id_at
+        return (id_at(index)
+                for index in range(self._library.number_of_videos()))
+
+
+class _MappedWords:
+    """A class used to look up title words in the word table of a
+    MappedVideoLibrary, standing in for the posting dict of a FuzzyIndex."""
+
+    def __init__(self, library):
+        self._library = library
+
+    def __contains__(self, word):
+        return self._library._find_word(word) is not None
+
+
+class _MappedFuzzyIndex(FuzzyIndex):
+    """A class used to run fuzzy searches over the word table of a
+    MappedVideoLibrary.
+
+    Only the letters and trigrams of the alphabetic words are kept in
+    memory; postings are read from the catalog as they are walked.
+    """
+
+    def __init__(self, library):
+        """The _MappedFuzzyIndex class is initialized.
+
+        Args:
+            library: The MappedVideoLibrary to search.
+        """
+        super().__init__()
+        self._library = library
+        self._postings = _MappedWords(library)
+        self._add_vocabulary(library._iter_words())
+
+    def _posting(self, word):
+        """Yields the videos of a word in title order."""
+        return self._library._iter_word_videos(word)
+
+
+class MappedVideoLibrary:
+    """A class used to represent a Video Library backed by a memory-mapped
+    binary catalog.
+
+    Only the small tag vocabulary is decoded up front. Video objects are
+    materialized on access and are not cached; searches walk the postings
+    and title text stored in the file. Flags are kept in memory, in a dict
+    replaced on every change so readers in other threads never see it
+    change. It offers the VideoLibrary methods a VideoPlayer uses, except
+    adding and removing videos.
+    """
+
+    def __init__(self, path):
+        """The MappedVideoLibrary class is initialized.
+
+        Args:
+            path: A catalog file written by compile_catalog.
+        """
+        with open(path, "rb") as catalog_file:
+            self._mm = mmap.mmap(catalog_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            self._mm.close()
+            raise ValueError(f"{path} is not a binary video catalog")
+        (magic, self._num_videos, num_tags, num_slots, num_tag_entries,
+         self._num_words, num_word_entries) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a binary video catalog")
+        count = self._num_videos
+        self._views = []
+        self._videos_offset = _HEADER.size
+        offset = self._videos_offset + count * _VIDEO_RECORD.size
+        self._id_order = self._uints(offset, count)
+        offset += count * _INDEX.size
+        self._title_order = self._uints(offset, count)
+        offset += count * _INDEX.size
+        self._title_ranks = self._uints(offset, count)
+        offset += count * _INDEX.size
+        self._title_starts = self._uints(offset, count + 1)
+        offset += (count + 1) * _INDEX.size
+        tags_offset = offset
+        offset += num_tags * _POSTING_RECORD.size
+        self._tag_entries = self._uints(offset, num_tag_entries)
+        offset += num_tag_entries * _INDEX.size
+        self._slots_offset = offset
+        offset += num_slots * _INDEX.size
+        self._words_offset = offset
+        offset += self._num_words * _POSTING_RECORD.size
+        self._word_entries = self._uints(offset, num_word_entries)
+        offset += num_word_entries * _INDEX.size
+        self._pool_offset = offset
+        self._text_offset = len(self._mm) - self._title_starts[count]
+
+        tags = []
+        self._tag_postings = {}
+        for i in range(num_tags):
+            string_offset, length, first, entries = \
+                _POSTING_RECORD.unpack_from(
+                    self._mm, tags_offset + i * _POSTING_RECORD.size)
+            tag = self._string(string_offset, length)
+            tags.append(tag)
+            self._tag_postings.setdefault(tag.lower(), []).append(
+                (first, entries))
+        self._tags = tuple(tags)
+        # Replaced, never modified, so readers need no lock.
+        self._flags = {}
+        self._flags_lock = threading.Lock()
+        self._rng = random.Random()
+        self._fuzzy_index = None
+
+    def _uints(self, offset, count):
+        """Returns a sequence of the count integers stored at offset,
+        without copying them on little-endian machines."""
+        data = memoryview(self._mm)[offset:offset + count * _INDEX.size]
+        self._views.append(data)
+        if sys.byteorder == "big":
+            values = array("I", data)
+            values.byteswap()
+            return values
+        values = data.cast("I")
+        self._views.append(values)
+        return values
+
+    def close(self):
+        """Unmaps the catalog file."""
+        for view in reversed(self._views):
+            view.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def snapshot(self):
+        """Returns the library to read from, see VideoLibrary.snapshot()."""
+        return self
+
+    def _record(self, index):
+        return _VIDEO_RECORD.unpack_from(
+            self._mm, self._videos_offset + index * _VIDEO_RECORD.size)
+
+    def _string(self, offset, length):
+        start = self._pool_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _id_at(self, index):
+        """Decodes the id of the video at a position of the video table."""
+        _, _, id_off, id_len, _, _ = self._record(index)
+        return self._string(id_off, id_len)
+
+    def _video_at(self, index):
+        """Materializes the Video stored at a position of the video table."""
+        title_off, title_len, id_off, id_len, first_slot, n_tags = \
+            self._record(index)
+        slot_ids = struct.unpack_from(
+            f"<{n_tags}I", self._mm,
+            self._slots_offset + first_slot * _INDEX.size)
+        return Video(self._string(title_off, title_len),
+                     self._string(id_off, id_len),
+                     [self._tags[tag_id] for tag_id in slot_ids])
+
+    def _find(self, video_id):
+        """Binary searches the id order table, returns the video index or
+        None."""
+        key = video_id.encode("utf-8")
+        id_order = self._id_order
+        low, high = 0, self._num_videos
+        while low < high:
+            middle = (low + high) // 2
+            index = id_order[middle]
+            _, _, id_off, id_len, _, _ = self._record(index)
+            start = self._pool_offset + id_off
+            candidate = self._mm[start:start + id_len]
+            if candidate == key:
+                return index
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _word_record(self, position):
+        return _POSTING_RECORD.unpack_from(
+            self._mm, self._words_offset + position * _POSTING_RECORD.size)
+
+    def _find_word(self, word):
+        """Binary searches the word table, returns the (first, count) of
+        the postings of a lowercased word or None."""
+        key = word.encode("utf-8")
+        low, high = 0, self._num_words
+        while low < high:
+            middle = (low + high) // 2
+            string_offset, length, first, count = self._word_record(middle)
+            start = self._pool_offset + string_offset
+            candidate = self._mm[start:start + length]
+            if candidate == key:
+                return first, count
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _iter_words(self):
+        """Yields every indexed title word."""
+        for position in range(self._num_words):
+            string_offset, length, _, _ = self._word_record(position)
+            yield self._string(string_offset, length)
+
+    def _iter_word_videos(self, word):
+        """Yields the videos holding a title word, in title order."""
+        found = self._find_word(word)
+        if found is not None:
+            first, count = found
+            for index in self._word_entries[first:first + count]:
+                yield self._video_at(index)
+
+    def _unflagged(self, video_ids, limit=None):
+        """Returns the ids that are not flagged, at most limit."""
+        flags = self._flags
+        if flags:
+            video_ids = [video_id for video_id in video_ids
+                         if video_id not in flags]
+        return video_ids if limit is None else video_ids[:limit]
+
+    def number_of_videos(self):
+        """Returns how many videos the catalog holds."""
+        return self._num_videos
+
+    def number_of_available_videos(self):
+        """Returns how many videos are not flagged."""
+        return self._num_videos - len(self._flags)
+
+    def __contains__(self, video_id):
+        return self._find(video_id) is not None
+
+    def contains(self, video_id):
+        """Returns True if the catalog holds a video with this id."""
+        return self._find(video_id) is not None
+
+    def iter_videos(self):
+        """Returns a lazy sequence over every video of the catalog."""
+        return _MappedVideos(self)
+
+    def iter_video_ids(self):
+        """Returns a lazy, set-like view of every video id of the catalog,
+        iterated in catalog order."""
+        return _MappedVideoIds(self)
+
+    def get_all_videos(self):
+        """Returns a lazy sequence over every video of the catalog."""
+        return _MappedVideos(self)
+
+    def get_all_video_urls(self):
+        return list(self.iter_video_ids())
+
+    def get_videos_by_title(self, offset=0, limit=None):
+        """Returns a page of videos ordered by title.
+
+        Args:
+            offset: How many videos to skip.
+            limit: The page size, None for everything after offset.
+        """
+        end = None if limit is None else offset + limit
+        return [self._video_at(index)
+                for index in self._title_order[offset:end]]
+
+    def search_tags(self, tags, match_all=True):
+        """Returns the sorted ids of the unflagged videos carrying the given
+        tags.
+
+        Args:
+            tags: The tags to look for, matched case-insensitively.
+            match_all: True to require every tag, False to accept any.
+        """
+        entries = self._tag_entries
+        postings = []
+        for tag in tags:
+            posting = set()
+            for first, count in self._tag_postings.get(tag.lower(), ()):
+                posting.update(entries[first:first + count])
+            postings.append(posting)
+        if not postings:
+            return []
+        if match_all:
+            ranks = set.intersection(*postings)
+        else:
+            ranks = set().union(*postings)
+        id_order = self._id_order
+        return self._unflagged([self._id_at(id_order[rank])
+                                for rank in sorted(ranks)])
+
+    def search_titles(self, search_term, limit=None):
+        """Returns the ids of the unflagged videos whose title contains
+        search_term, found by scanning the lowercased title text of the
+        catalog.
+
+        Args:
+            search_term: The substring to look for, case-insensitively.
+            limit: The maximum number of results, None for all of them.
+
+        Returns:
+            The matching video ids, ordered by title.
+        """
+        needle = search_term.lower().encode("utf-8")
+        if b"\0" in needle:
+            return []
+        if not needle:
+            order = self._title_order
+            if limit is not None:
+                order = order[:limit + len(self._flags)]
+            return self._unflagged([self._id_at(index) for index in order],
+                                   limit)
+        mm = self._mm
+        starts = self._title_starts
+        base = self._text_offset
+        end = base + starts[self._num_videos]
+        matches = []
+        position = mm.find(needle, base, end)
+        while position != -1:
+            index = bisect_right(starts, position - base) - 1
+            matches.append(index)
+            position = mm.find(needle, base + starts[index + 1], end)
+        ranks = self._title_ranks
+        if limit is None:
+            matches.sort(key=ranks.__getitem__)
+        else:
+            matches = nsmallest(limit + len(self._flags), matches,
+                                key=ranks.__getitem__)
+        return self._unflagged([self._id_at(index) for index in matches],
+                               limit)
+
+    def search_titles_fuzzy(self, search_term, limit=DEFAULT_FUZZY_LIMIT):
+        """Returns the ids of the unflagged videos whose title words best
+        match the words of search_term, tolerating typos.
+
+        The letters and trigrams of the alphabetic title words are read
+        into memory on the first call.
+
+        Args:
+            search_term: The words to look for, case-insensitively.
+            limit: The maximum number of results, None for all of them.
+
+        Returns:
+            The matching video ids, best match first. See
+            FuzzyIndex.search() for the ranking.
+        """
+        if self._fuzzy_index is None:
+            self._fuzzy_index = _MappedFuzzyIndex(self)
+        extra = None if limit is None else limit + len(self._flags)
+        return self._unflagged(
+            self._fuzzy_index.search(search_term, extra), limit)
+
+    def get_video(self, video_id):
+        """Returns the video object (title, url, tags) from the video library.
+
+        Args:
+            video_id: The video url.
+
+        Returns:
+            The Video object for the requested video_id. None if the video
+            does not exist.
+        """
+        index = self._find(video_id)
+        return None if index is None else self._video_at(index)
+
+    def flag_video(self, video_id, reason):
+        """Flags a video, hiding it from searches and random picks.
+
+        Returns:
+            True if the video was flagged. False if it does not exist or is
+            already flagged.
+        """
+        with self._flags_lock:
+            if video_id in self._flags or not self.contains(video_id):
+                return False
+            self._flags = {**self._flags, video_id: reason}
+            return True
+
+    def allow_video(self, video_id):
+        """Removes the flag of a video.
+
+        Returns:
+            The reason the video was flagged for. None if it was not
+            flagged.
+        """
+        with self._flags_lock:
+            flags = dict(self._flags)
+            reason = flags.pop(video_id, None)
+            if reason is not None:
+                self._flags = flags
+            return reason
+
+    def get_flag_reason(self, video_id):
+        """Returns why a video is flagged, None if it is not flagged."""
+        return self._flags.get(video_id)
+
+    def get_flags(self):
+        """Returns a read-only mapping of flagged video ids to reasons."""
+        return MappingProxyType(self._flags)
+
+    def get_sampler(self):
+        """Returns the random generator picks are drawn from, e.g. to seed
+        it."""
+        return self._rng
+
+    def get_random_video(self, skip=()):
+        """Returns a random video that is not flagged.
+
+        Args:
+            skip: Ids of videos not to pick this time.
+
+        Returns:
+            A Video object. None if no video can be picked.
+        """
+        flags = self._flags
+        skip = set(skip).difference(flags) if skip else set()
+        skipped = sum(self.contains(video_id) for video_id in skip)
+        if skipped >= self.number_of_available_videos():
+            return None
+        while True:
+            index = self._rng.randrange(self._num_videos)
+            video_id = self._id_at(index)
+            if video_id not in flags and video_id not in skip:
+                return self._video_at(index)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python3 -m src.binary_catalog <videos.txt> <out.bin>")
+    stats = compile_catalog(sys.argv[1], sys.argv[2])
+    print(f"Compiled {stats.rows_loaded} videos "
+          f"({stats.rows_skipped} malformed rows skipped)")
@@ -1,6 +1,5 @@
 """A command parser class."""
 
-import textwrap
 from typing import Sequence
 
 
@@ -9,155 +8,267 @@ class CommandException(Exception):
     pass
 
 
+class Command:
+    """A class used to represent a registered command."""
+
+    __slots__ = ("name", "handler", "arities", "usage", "syntax",
+                 "description")
+
+    def __init__(self, name, handler, arities, usage, syntax, description):
+        """Command constructor.
+
+        Args:
+            name: The upper case command name.
+            handler: Called with the command arguments.
+            arities: The accepted numbers of arguments. None to call the
+                handler without arguments, ignoring any that were given.
+            usage: The message of the CommandException raised when the
+                number of arguments is wrong.
+            syntax: How the command is written in the help, e.g.
+                'PLAY <video_id>'.
+            description: What the command does, shown in the help.
+        """
+        self.name = name
+        self.handler = handler
+        self.arities = arities
+        self.usage = usage
+        self.syntax = syntax
+        self.description = description
+
+
+# The built-in commands, in help order: name, VideoPlayer method, accepted
+# argument counts, usage message, help syntax and help description.
+_BUILTIN_COMMANDS = (
+    ("NUMBER_OF_VIDEOS", "number_of_videos", None, None,
+     "NUMBER_OF_VIDEOS", "Shows how many videos are in the library."),
+    ("SHOW_ALL_VIDEOS", "show_all_videos", None, None,
+     "SHOW_ALL_VIDEOS", "Lists all videos from the library."),
+    ("PLAY", "play_video", (1,),
+     "Please enter PLAY command followed by video_id.",
+     "PLAY <video_id>", "Plays specified video."),
+    ("PLAY_RANDOM", "play_random_video", None, None,
+     "PLAY_RANDOM", "Plays a random video from the library."),
+    ("STOP", "stop_video", None, None,
+     "STOP", "Stop the current video."),
+    ("PAUSE", "pause_video", None, None,
+     "PAUSE", "Pause the current video."),
+    ("CONTINUE", "continue_video", None, None,
+     "CONTINUE", "Resume the current paused video."),
+    ("SHOW_PLAYING", "show_playing", None, None,
+     "SHOW_PLAYING", "Displays the title, url and paused status of the "
+                     "video that is currently playing (or paused)."),
+    ("CREATE_PLAYLIST", "create_playlist", (1,),
+     "Please enter CREATE_PLAYLIST command followed by a playlist name.",
+     "CREATE_PLAYLIST <playlist_name>",
+     "Creates a new (empty) playlist with the provided name."),
+    ("ADD_TO_PLAYLIST", "add_to_playlist", (2,),
+     "Please enter ADD_TO_PLAYLIST command followed by a playlist name and "
+     "video_id to add.",
+     "ADD_TO_PLAYLIST <playlist_name> <video_id>",
+     "Adds the requested video to the playlist."),
+    ("REMOVE_FROM_PLAYLIST", "remove_from_playlist", (2,),
+     "Please enter REMOVE_FROM_PLAYLIST command followed by a playlist name "
+     "and video_id to remove.",
+     "REMOVE_FROM_PLAYLIST <playlist_name> <video_id>",
+     "Removes the specified video from the specified playlist"),
+    ("CLEAR_PLAYLIST", "clear_playlist", (1,),
+     "Please enter CLEAR_PLAYLIST command followed by a playlist name.",
+     "CLEAR_PLAYLIST <playlist_name>",
+     "Removes all the videos from the playlist."),
+    ("DELETE_PLAYLIST", "delete_playlist", (1,),
+     "Please enter DELETE_PLAYLIST command followed by a playlist name.",
+     "DELETE_PLAYLIST <playlist_name>", "Deletes the playlist."),
+    ("SHOW_PLAYLIST", "show_playlist", (1,),
+     "Please enter SHOW_PLAYLIST command followed by a playlist name.",
+     "SHOW_PLAYLIST <playlist_name>", "List all the videos in this playlist."),
+    ("SHOW_ALL_PLAYLISTS", "show_all_playlists", None, None,
+     "SHOW_ALL_PLAYLISTS", "Display all the available playlists."),
+    ("SEARCH_VIDEOS", "search_videos", (1,),
+     "Please enter SEARCH_VIDEOS command followed by a search term.",
+     "SEARCH_VIDEOS <search_term>",
+     "Display all the videos whose titles contain the search_term."),
+    ("SEARCH_VIDEOS_FUZZY", "search_videos_fuzzy", range(1, 9),
+     "Please enter SEARCH_VIDEOS_FUZZY command followed by a search term of "
+     "up to 8 words.",
+     "SEARCH_VIDEOS_FUZZY <search_term>",
+     "Display the videos whose titles best match the search_term, "
+     "tolerating typos."),
+    ("SEARCH_VIDEOS_WITH_TAG", "search_videos_tag", (1,),
+     "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a video tag.",
+     "SEARCH_VIDEOS_WITH_TAG <tag_name>",
+     "Display all videos whose tags contains the provided tag."),
+    ("FLAG_VIDEO", "flag_video", (1, 2),
+     "Please enter FLAG_VIDEO command followed by a video_id and an "
+     "optional flag reason.",
+     "FLAG_VIDEO <video_id> <flag_reason>", "Mark a video as flagged."),
+    ("ALLOW_VIDEO", "allow_video", (1,),
+     "Please enter ALLOW_VIDEO command followed by a video_id.",
+     "ALLOW_VIDEO <video_id>", "Removes a flag from a video."),
+)
+
+
 class CommandParser:
     """A class used to parse and execute a user Command."""
 
     def __init__(self, video_player):
         self._player = video_player
+        self._output = video_player.get_output()
+        self._commands = {}
+        self._instrumentation = None
+        self._profiler = None
+        for name, method, arities, usage, syntax, description in \
+                _BUILTIN_COMMANDS:
+            self.register_command(name, getattr(video_player, method),
+                                  arities, usage, syntax, description)
+        self.register_command("HELP", self._get_help, None, None, "HELP",
+                              "Displays help.")
+
+    def register_command(self, name, handler, arities=None, usage=None,
+                         syntax=None, description=""):
+        """Registers a command, replacing any command with the same name.
+
+        Args:
+            name: The command name, matched case-insensitively.
+            handler: Called with the command arguments.
+            arities: The accepted numbers of arguments. None to call the
+                handler without arguments, ignoring any that were given.
+            usage: The error message for a wrong number of arguments.
+            syntax: How the command is written in the help, the name by
+                default.
+            description: What the command does, shown in the help.
+        """
+        name = name.upper()
+        if usage is None:
+            usage = f"Please enter a valid {name} command."
+        self._commands[name] = Command(
+            name, handler, arities, usage, syntax or name, description)
+
+    def enable_instrumentation(self, instrumentation):
+        """Measures every command from now on and registers STATS.
+
+        Args:
+            instrumentation: The Instrumentation recording the commands.
+        """
+        self._instrumentation = instrumentation
+        self.register_command(
+            "STATS", self._show_stats, (0, 2),
+            "Please enter STATS command, optionally followed by JSON or "
+            "PROMETHEUS and the file to export the statistics to.",
+            "STATS [JSON|PROMETHEUS <file>]",
+            "Displays or exports per-command statistics.")
+
+    def get_instrumentation(self):
+        """Returns the Instrumentation of the parser, None if disabled."""
+        return self._instrumentation
+
+    def enable_profiling(self, profiler):
+        """Profiles the commands the Profiler filters for and registers
+        PROFILE START/STOP.
+
+        Args:
+            profiler: The Profiler to run the commands under.
+        """
+        self._profiler = profiler
+        self.register_command(
+            "PROFILE", self._profile, (1,),
+            "Please enter PROFILE command followed by START or STOP.",
+            "PROFILE START|STOP",
+            "Starts or stops profiling the following commands.")
+
+    def get_commands(self):
+        """Returns the registered commands, in registration order."""
+        return self._commands.values()
 
     def execute_command(self, command: Sequence[str]):
         """Executes the user command. Expects the command to be upper case.
            Raises CommandException if a command cannot be parsed.
+
+           Everything the command writes is flushed once it completes.
         """
+        try:
+            if self._instrumentation is None and self._profiler is None:
+                self._execute_command(command)
+            else:
+                self._execute_measured(command)
+        finally:
+            self._output.flush()
+
+    def _execute_measured(self, command):
+        """Executes the user command under the profiler and the
+        instrumentation, whichever are enabled."""
+        name = command[0].upper() if command else ""
+        if name not in self._commands:
+            name = "INVALID"  # Keeps the set of names bounded
+        execute = self._execute_command
+        if self._profiler is not None:
+            profiler = self._profiler
+            dispatch = execute
+
+            def execute(command):
+                profiler.measure(name, dispatch, command)
+        if self._instrumentation is not None:
+            self._instrumentation.measure(name, execute, command)
+        else:
+            execute(command)
+
+    def _execute_command(self, command: Sequence[str]):
+        """Dispatches the user command to its registered handler."""
         if not command:
             raise CommandException(
                 "Please enter a valid command, "
                 "type HELP for a list of available commands.")
 
-        if command[0].upper() == "NUMBER_OF_VIDEOS":
-            self._player.number_of_videos()
-
-        elif command[0].upper() == "SHOW_ALL_VIDEOS":
-            self._player.show_all_videos()
-
-        elif command[0].upper() == "PLAY":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter PLAY command followed by video_id.")
-            self._player.play_video(command[1])
-
-        elif command[0].upper() == "PLAY_RANDOM":
-            self._player.play_random_video()
-
-        elif command[0].upper() == "STOP":
-            self._player.stop_video()
-
-        elif command[0].upper() == "PAUSE":
-            self._player.pause_video()
-
-        elif command[0].upper() == "CONTINUE":
-            self._player.continue_video()
-
-        elif command[0].upper() == "SHOW_PLAYING":
-            self._player.show_playing()
-
-        elif command[0].upper() == "CREATE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CREATE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.create_playlist(command[1])
-
-        elif command[0].upper() == "ADD_TO_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter ADD_TO_PLAYLIST command followed by a "
-                    "playlist name and video_id to add.")
-            self._player.add_to_playlist(command[1], command[2])
-
-        elif command[0].upper() == "REMOVE_FROM_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter REMOVE_FROM_PLAYLIST command followed by a "
-                    "playlist name and video_id to remove.")
-            self._player.remove_from_playlist(command[1], command[2])
-
-        elif command[0].upper() == "CLEAR_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CLEAR_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.clear_playlist(command[1])
-
-        elif command[0].upper() == "DELETE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter DELETE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.delete_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SHOW_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.show_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_ALL_PLAYLISTS":
-            self._player.show_all_playlists()
-
-        elif command[0].upper() == "SEARCH_VIDEOS":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS command followed by a "
-                    "search term.")
-            self._player.search_videos(command[1])
-
-        elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
-                    "video tag.")
-            self._player.search_videos_tag(command[1])
-
-        elif command[0].upper() == "FLAG_VIDEO":
-            if len(command) == 3:
-                self._player.flag_video(command[1], command[2])
-            elif len(command) == 2:
-                self._player.flag_video(command[1])
-            else:
-                raise CommandException(
-                    "Please enter FLAG_VIDEO command followed by a "
-                    "video_id and an optional flag reason.")
-
-        elif command[0].upper() == "ALLOW_VIDEO":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter ALLOW_VIDEO command followed by a "
-                    "video_id.")
-            self._player.allow_video(command[1])
-
-        elif command[0].upper() == "HELP":
-            self._get_help()
-        else:
-            print(
+        entry = self._commands.get(command[0].upper())
+        if entry is None:
+            self._output.write(
                 "Please enter a valid command, type HELP for a list of "
                 "available commands.")
+        elif entry.arities is None:
+            entry.handler()
+        elif len(command) - 1 in entry.arities:
+            entry.handler(*command[1:])
+        else:
+            raise CommandException(entry.usage)
+
+    def _show_stats(self, export_format=None, path=None):
+        """Displays the per-command statistics, or exports them to a
+        file."""
+        if export_format is None:
+            self._output.write(self._instrumentation.format_report())
+            return
+        try:
+            self._instrumentation.export(path, export_format)
+        except ValueError:
+            raise CommandException(self._commands["STATS"].usage)
+        except OSError as e:
+            self._output.write(f"Cannot export statistics: {e.strerror}")
+        else:
+            self._output.write(f"Exported statistics to {path}")
+
+    def _profile(self, action):
+        """Starts or stops profiling."""
+        action = action.upper()
+        if action == "START":
+            if self._profiler.start():
+                self._output.write("Profiling started")
+            else:
+                self._output.write("Cannot start profiling: Profiling is "
+                                   "already started")
+        elif action == "STOP":
+            if self._profiler.stop():
+                self._output.write("Profiling stopped, wrote " + " and ".join(
+                    self._profiler.get_output_paths()))
+            else:
+                self._output.write("Cannot stop profiling: Profiling is not "
+                                   "started")
+        else:
+            raise CommandException(self._commands["PROFILE"].usage)
 
     def _get_help(self):
         """Displays all available commands to the user."""
-        help_text = textwrap.dedent("""
-        Available commands:
-            NUMBER_OF_VIDEOS - Shows how many videos are in the library.
-            SHOW_ALL_VIDEOS - Lists all videos from the library.
-            PLAY <video_id> - Plays specified video.
-            PLAY_RANDOM - Plays a random video from the library.
-            STOP - Stop the current video.
-            PAUSE - Pause the current video.
-            CONTINUE - Resume the current paused video.
-            SHOW_PLAYING - Displays the title, url and paused status of the video that is currently playing (or paused).
-            CREATE_PLAYLIST <playlist_name> - Creates a new (empty) playlist with the provided name.
-            ADD_TO_PLAYLIST <playlist_name> <video_id> - Adds the requested video to the playlist.
-            REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the specified video from the specified playlist
-            CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the playlist.
-            DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
-            SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
-            SHOW_ALL_PLAYLISTS - Display all the available playlists.
-            SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
-            SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
-            FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
-            ALLOW_VIDEO <video_id> - Removes a flag from a video.
-            HELP - Displays help.
-            EXIT - Terminates the program execution.
-        """)
-        print(help_text)
+        lines = ["", "Available commands:"]
+        lines.extend(f"    {entry.syntax} - {entry.description}"
+                     for entry in self._commands.values())
+        lines.append("    EXIT - Terminates the program execution.")
+        lines.append("")
+        self._output.write("\n".join(lines))
@@ -0,0 +1,284 @@
+"""A copy-on-write video library for many reader threads and a few writers."""
+
+from .video_library import DEFAULT_FUZZY_LIMIT
+from collections import ChainMap
+from contextlib import contextmanager
+from types import MappingProxyType
+import threading
+
+
+# Flags set since the last copy beyond which the next flag folds them all
+# into a fresh copy of the library, so filtering them stays cheap.
+MAX_PENDING_FLAGS = 1024
+
+
+class FlaggedSnapshot:
+    """A class used to represent a published VideoLibrary together with the
+    flags set since it was copied.
+
+    The library left those videos in its indexes and sampler; the
+    snapshot filters them out of search results and random picks instead,
+    so flagging a video does not copy the library. It offers the reads of
+    a VideoLibrary and is never modified.
+    """
+
+    def __init__(self, video_library, pending_flags):
+        """The FlaggedSnapshot class is initialized.
+
+        Args:
+            video_library: The library to read from.
+            pending_flags: Flag reasons by video id, for videos that exist
+                and are not flagged in video_library.
+        """
+        self._library = video_library
+        self._pending = pending_flags
+        self._flags = ChainMap(pending_flags, video_library.get_flags())
+
+    def snapshot(self):
+        return self
+
+    def __contains__(self, video_id):
+        return video_id in self._library
+
+    def contains(self, video_id):
+        return self._library.contains(video_id)
+
+    def number_of_videos(self):
+        return self._library.number_of_videos()
+
+    def number_of_available_videos(self):
+        return self._library.number_of_available_videos() - len(self._pending)
+
+    def iter_videos(self):
+        return self._library.iter_videos()
+
+    def iter_video_ids(self):
+        return self._library.iter_video_ids()
+
+    def get_all_videos(self):
+        return self._library.get_all_videos()
+
+    def get_all_video_urls(self):
+        return self._library.get_all_video_urls()
+
+    def get_videos_by_title(self, offset=0, limit=None):
+        return self._library.get_videos_by_title(offset, limit)
+
+    def _unflagged(self, video_ids, limit=None):
+        """Returns the ids that are not pending a flag, at most limit."""
+        pending = self._pending
+        video_ids = [video_id for video_id in video_ids
+                     if video_id not in pending]
+        return video_ids if limit is None else video_ids[:limit]
+
+    def search_tags(self, tags, match_all=True):
+        return self._unflagged(self._library.search_tags(tags, match_all))
+
+    def search_titles(self, search_term, limit=None):
+        # Ask for enough extra results to make up for those filtered out.
+        extra = None if limit is None else limit + len(self._pending)
+        return self._unflagged(
+            self._library.search_titles(search_term, extra), limit)
+
+    def search_titles_fuzzy(self, search_term, limit=DEFAULT_FUZZY_LIMIT):
+        extra = None if limit is None else limit + len(self._pending)
+        return self._unflagged(
+            self._library.search_titles_fuzzy(search_term, extra), limit)
+
+    def get_video(self, video_id):
+        return self._library.get_video(video_id)
+
+    def get_flag_reason(self, video_id):
+        return self._flags.get(video_id)
+
+    def get_flags(self):
+        return MappingProxyType(self._flags)
+
+    def get_random_video(self, skip=()):
+        return self._library.get_random_video(
+            self._pending.keys() | set(skip) if skip else self._pending.keys())
+
+    def get_sampler(self):
+        return self._library.get_sampler()
+
+    def get_load_stats(self):
+        return self._library.get_load_stats()
+
+
+class ConcurrentVideoLibrary:
+    """A class used to share a VideoLibrary between threads, RCU style.
+
+    Readers use the currently published snapshot, which is immutable,
+    without taking any lock. Writers serialize on a lock and publish a new
+    snapshot by swapping a single reference, so readers see either all of
+    a write or none of it.
+
+    Flagging and allowing a video publish the same library with an updated
+    FlaggedSnapshot overlay, which costs the size of the overlay rather
+    than of the catalog. Other writes apply their changes to a copy of the
+    library, folding the overlay into it. A copy duplicates the per-video
+    tables, but shares the index entries until they are modified, so it
+    costs a fraction of a load; apply many changes in one batch() to pay
+    for a single copy.
+
+    The class offers the VideoLibrary methods a VideoPlayer uses, so
+    players can be given one instead of a VideoLibrary. Each call reads a
+    single snapshot; use snapshot() to make several reads consistent.
+    """
+
+    def __init__(self, video_library):
+        """The ConcurrentVideoLibrary class is initialized.
+
+        Args:
+            video_library: The VideoLibrary to publish first. It must not
+                be modified directly afterwards.
+        """
+        video_library.settle()
+        self._library = video_library
+        self._pending_flags = {}
+        self._snapshot = video_library
+        self._write_lock = threading.Lock()
+        self.versions_published = 0
+
+    def snapshot(self):
+        """Returns the current VideoLibrary or FlaggedSnapshot. It is never
+        modified, so it can be read for as long as needed."""
+        return self._snapshot
+
+    def _publish(self, video_library, pending_flags):
+        """Publishes a library and the flags pending on it. The caller
+        holds the write lock."""
+        self._library = video_library
+        self._pending_flags = pending_flags
+        self._snapshot = (FlaggedSnapshot(video_library, pending_flags)
+                          if pending_flags else video_library)
+        self.versions_published += 1
+
+    def _draft(self):
+        """Returns a copy of the library with the pending flags applied.
+        The caller holds the write lock."""
+        draft = self._library.copy()
+        for video_id, reason in self._pending_flags.items():
+            draft.flag_video(video_id, reason)
+        return draft
+
+    @contextmanager
+    def batch(self):
+        """Yields a private copy of the library to modify, published when
+        the block exits without an exception and dropped otherwise.
+
+        Writers wait for each other, never for readers.
+        """
+        with self._write_lock:
+            draft = self._draft()
+            yield draft
+            draft.settle()
+            self._publish(draft, {})
+
+    # Writes, each published as its own version.
+
+    def add_video(self, video):
+        with self.batch() as draft:
+            draft.add_video(video)
+
+    def remove_video(self, video_id):
+        if video_id not in self._library:
+            return None
+        with self.batch() as draft:
+            return draft.remove_video(video_id)
+
+    def flag_video(self, video_id, reason):
+        """Flags a video without copying the library, see
+        VideoLibrary.flag_video()."""
+        with self._write_lock:
+            library = self._library
+            if (video_id not in library or video_id in self._pending_flags or
+                    library.get_flag_reason(video_id) is not None):
+                return False
+            pending_flags = {**self._pending_flags, video_id: reason}
+            if len(pending_flags) <= MAX_PENDING_FLAGS:
+                self._publish(library, pending_flags)
+            else:
+                draft = self._draft()
+                draft.flag_video(video_id, reason)
+                draft.settle()
+                self._publish(draft, {})
+            return True
+
+    def allow_video(self, video_id):
+        """Removes the flag of a video, see VideoLibrary.allow_video().
+
+        Only a video flagged before the last copy of the library costs a
+        new copy.
+        """
+        with self._write_lock:
+            pending_flags = dict(self._pending_flags)
+            reason = pending_flags.pop(video_id, None)
+            if reason is not None:
+                self._publish(self._library, pending_flags)
+                return reason
+            if self._library.get_flag_reason(video_id) is None:
+                return None
+            draft = self._draft()
+            reason = draft.allow_video(video_id)
+            draft.settle()
+            self._publish(draft, {})
+            return reason
+
+    # Reads, each from the current snapshot.
+
+    def __contains__(self, video_id):
+        return video_id in self._snapshot
+
+    def contains(self, video_id):
+        return self._snapshot.contains(video_id)
+
+    def number_of_videos(self):
+        return self._snapshot.number_of_videos()
+
+    def number_of_available_videos(self):
+        return self._snapshot.number_of_available_videos()
+
+    def iter_videos(self):
+        return self._snapshot.iter_videos()
+
+    def iter_video_ids(self):
+        return self._snapshot.iter_video_ids()
+
+    def get_all_videos(self):
+        return self._snapshot.get_all_videos()
+
+    def get_all_video_urls(self):
+        return self._snapshot.get_all_video_urls()
+
+    def get_videos_by_title(self, offset=0, limit=None):
+        return self._snapshot.get_videos_by_title(offset, limit)
+
+    def search_tags(self, tags, match_all=True):
+        return self._snapshot.search_tags(tags, match_all)
+
+    def search_titles(self, search_term, limit=None):
+        return self._snapshot.search_titles(search_term, limit)
+
+    def search_titles_fuzzy(self, search_term, limit=DEFAULT_FUZZY_LIMIT):
+        return self._snapshot.search_titles_fuzzy(search_term, limit)
+
+    def get_video(self, video_id):
+        return self._snapshot.get_video(video_id)
+
+    def get_flag_reason(self, video_id):
+        return self._snapshot.get_flag_reason(video_id)
+
+    def get_flags(self):
+        return self._snapshot.get_flags()
+
+    def get_random_video(self, skip=()):
+        return self._snapshot.get_random_video(skip)
+
+    def get_sampler(self):
+        """Returns the sampler of the current snapshot; its random
+        generator is shared by every later snapshot."""
+        return self._snapshot.get_sampler()
+
+    def get_load_stats(self):
+        return self._snapshot.get_load_stats()
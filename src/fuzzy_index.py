@@ -0,0 +1,365 @@
+"""A typo tolerant title search index class."""
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from heapq import merge, nsmallest
+from itertools import islice
+from operator import attrgetter
+import re
+
+
+DEFAULT_LIMIT = 10
+
+# How many videos a limited search takes at most from the postings of each
+# query word, closest words first and then by title. Queries made of very
+# common words rank these instead of every video holding them.
+MAX_CANDIDATES_PER_WORD = 500
+
+# Query words from this length on tolerate 2 edits. Shorter ones tolerate
+# 1 and are looked up by trying every single edit, as a typo easily
+# leaves none of their trigrams intact; longer ones are looked up through
+# the trigrams of indexed words of at least LONG_WORD - 2 letters.
+LONG_WORD = 6
+
+_WORD = re.compile(r"\w+")
+
+
+def split_words(text):
+    """Returns the lowercased words of a piece of text."""
+    return _WORD.findall(text.lower())
+
+
+def title_words(video):
+    """Returns the lowercased words of the title of a video."""
+    return _WORD.findall(video.title.lower())
+
+
+# The order of the videos in a posting list.
+_by_title = attrgetter("title", "video_id")
+
+
+class _TitleKeys:
+    """A class used to binary search a posting list by title.
+
+    It presents the sort keys of the videos of a posting list without
+    copying them, as bisect only takes a key function from Python 3.10.
+    """
+
+    def __init__(self, posting):
+        self._posting = posting
+
+    def __len__(self):
+        return len(self._posting)
+
+    def __getitem__(self, position):
+        return _by_title(self._posting[position])
+
+
+def max_distance(word):
+    """Returns how many edits a query word tolerates: none for words of
+    up to 2 letters or holding digits, 1 up to 5 letters and 2 beyond."""
+    if len(word) < 3 or not word.isalpha():
+        return 0
+    return 1 if len(word) < LONG_WORD else 2
+
+
+def word_grams(word):
+    """Returns the trigrams of a word padded with '$', e.g. '$ca', 'cat'
+    and 'at$' for 'cat'."""
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Returns the edit distance between two strings, or limit + 1 as soon
+    as it is known to exceed limit.
+
+    Edits are insertions, deletions, substitutions and swaps of adjacent
+    characters (the optimal string alignment distance).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, start=1):
+        current = [i]
+        for j, other in enumerate(b, start=1):
+            distance = min(previous[j] + 1, current[j - 1] + 1,
+                           previous[j - 1] + (char != other))
+            if (before is not None and j > 1 and char == b[j - 2] and
+                    a[i - 2] == other):
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def single_edits(word, letters):
+    """Returns the strings one edit away from a word, using the given
+    letters for insertions and substitutions."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    edits = {head + tail[1:] for head, tail in splits if tail}
+    edits.update(head + tail[1] + tail[0] + tail[2:]
+                 for head, tail in splits if len(tail) > 1)
+    for letter in letters:
+        edits.update(head + letter + tail[1:] for head, tail in splits if tail)
+        edits.update(head + letter + tail for head, tail in splits)
+    edits.discard(word)
+    return edits
+
+
+class FuzzyIndex:
+    """A class used to find videos whose title words are close to the words
+    of a query.
+
+    Title words map to their videos, sorted by title. A short query word
+    may be a typo of the indexed words one edit away; a long one of the
+    indexed words sharing enough trigrams with it and within two edits.
+    Words stay in the trigram map once seen and are skipped when no title
+    holds them anymore.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        # Posting lists that were bulk appended to and still need sorting.
+        self._unsorted = set()
+        # Words whose posting lists may be shared with a copy and must be
+        # copied before being modified; None if nothing is shared.
+        self._shared = None
+        # The letters of the alphabetic indexed words, tried when editing
+        # short query words.
+        self._letters = set()
+        self._grams = {}
+        # Trigrams whose word sets may be shared with a copy; None if
+        # nothing is shared.
+        self._shared_grams = None
+
+    def copy(self):
+        """Returns an independent index sharing its posting lists and word
+        sets until they are modified. Pending sorts are done first."""
+        self.settle()
+        index = FuzzyIndex()
+        index._postings = dict(self._postings)
+        index._shared = set(self._postings)
+        self._shared = set(self._postings)
+        index._letters = set(self._letters)
+        index._grams = dict(self._grams)
+        index._shared_grams = set(self._grams)
+        self._shared_grams = set(self._grams)
+        return index
+
+    def settle(self):
+        """Sorts bulk added postings now, so reads no longer modify the
+        index and can run from several threads."""
+        for word in list(self._unsorted):
+            self._posting(word)
+
+    def _posting(self, word):
+        """Returns the posting list of a word, sorted by title, or None."""
+        if word in self._unsorted:
+            self._unsorted.discard(word)
+            self._postings[word] = sorted(self._postings[word], key=_by_title)
+            if self._shared:
+                self._shared.discard(word)
+        return self._postings.get(word)
+
+    def _writable_posting(self, word):
+        """Returns the sorted posting list of a word, copied first if it is
+        shared with a copy of the index, or None."""
+        posting = self._posting(word)
+        if self._shared and word in self._shared:
+            self._shared.discard(word)
+            if posting is not None:
+                posting = self._postings[word] = list(posting)
+        return posting
+
+    def _writable_words(self, gram):
+        """Returns the word set of a trigram, copied first if it is shared
+        with a copy of the index, or None."""
+        words = self._grams.get(gram)
+        if self._shared_grams and gram in self._shared_grams:
+            self._shared_grams.discard(gram)
+            if words is not None:
+                words = self._grams[gram] = set(words)
+        return words
+
+    def _add_vocabulary(self, words):
+        """Adds the letters and trigrams of new alphabetic words."""
+        grams = self._grams
+        shared = self._shared_grams
+        for word in words:
+            if not word.isalpha():
+                continue
+            self._letters.update(word)
+            if len(word) < LONG_WORD - 2:
+                continue
+            for gram in word_grams(word):
+                if shared and gram in shared:
+                    self._writable_words(gram)
+                grams.setdefault(gram, set()).add(word)
+
+    def add_video(self, video):
+        """Indexes the title words of a video."""
+        words = set(title_words(video))
+        self._add_vocabulary(words - self._postings.keys())
+        for word in words:
+            posting = self._writable_posting(word)
+            if posting is None:
+                posting = self._postings[word] = []
+            posting.insert(bisect_right(_TitleKeys(posting), _by_title(video)),
+                           video)
+
+    def add_videos(self, videos):
+        """Indexes the title words of many videos.
+
+        The touched posting lists are only sorted when next queried, so
+        loading a catalog chunk by chunk sorts each list once.
+        """
+        postings = self._postings
+        new_words = set()
+        for video in videos:
+            for word in set(title_words(video)):
+                if self._shared and word in self._shared:
+                    self._writable_posting(word)
+                posting = postings.get(word)
+                if posting is None:
+                    posting = postings[word] = []
+                    new_words.add(word)
+                posting.append(video)
+                self._unsorted.add(word)
+        self._add_vocabulary(new_words)
+
+    def merge(self, other):
+        """Adds the words of an index built over other videos, which this
+        index must not hold. other is consumed."""
+        other.settle()
+        for word, posting in other._postings.items():
+            existing = self._writable_posting(word)
+            if existing is None:
+                self._postings[word] = posting
+            else:
+                # Two sorted runs, merged in linear time.
+                existing.extend(posting)
+                existing.sort(key=_by_title)
+        self._letters |= other._letters
+        grams = self._grams
+        for gram, words in other._grams.items():
+            existing = self._writable_words(gram)
+            if existing is None:
+                grams[gram] = words
+            else:
+                existing |= words
+
+    def remove_video(self, video):
+        """Removes the title words of a video from the index."""
+        key = _by_title(video)
+        for word in set(title_words(video)):
+            posting = self._writable_posting(word)
+            if posting is None:
+                continue
+            position = bisect_left(_TitleKeys(posting), key)
+            if (position < len(posting) and
+                    posting[position].video_id == video.video_id):
+                del posting[position]
+                if not posting:
+                    del self._postings[word]
+
+    def similar_words(self, word):
+        """Returns the indexed words within max_distance(word) edits of a
+        lowercased word, mapped to their distance.
+
+        Typos of long words must leave at least one trigram intact.
+        """
+        limit = max_distance(word)
+        postings = self._postings
+        similar = {word: 0} if word in postings else {}
+        if not limit:
+            return similar
+        if limit == 1:
+            for other in single_edits(word, self._letters):
+                if other in postings:
+                    similar[other] = 1
+            return similar
+        grams = word_grams(word)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+        # Each edit changes at most 3 trigrams.
+        needed = len(grams) - 3 * limit
+        for other, count in counts.items():
+            if count < needed or abs(len(other) - len(word)) > limit:
+                continue
+            distance = edit_distance(word, other, limit)
+            if distance <= limit and other in postings:
+                similar[other] = distance
+        return similar
+
+    def _iter_closest(self, similar):
+        """Yields the videos holding the words of a similar_words() result,
+        closest words first and then by title. Videos may repeat."""
+        for distance in sorted(set(similar.values())):
+            postings = [self._posting(word) for word, found in similar.items()
+                        if found == distance]
+            if len(postings) == 1:
+                yield from postings[0]
+            else:
+                yield from merge(*postings, key=_by_title)
+
+    def search(self, term, limit=DEFAULT_LIMIT):
+        """Returns the ids of the videos whose titles best match term.
+
+        Videos are ranked by how many query words their title misses, then
+        by the edits needed to turn the query words into title words, then
+        by the share of their title words that match the query, then by
+        title.
+
+        A limited search ranks, for each query word, the first
+        MAX_CANDIDATES_PER_WORD (or limit, if larger) videos holding its
+        closest indexed words in title order. The ranking is exact when no
+        query word matches more videos than that; otherwise a common query
+        word is only represented by its closest, first titled matches, but
+        it never crowds out the matches of the other query words.
+
+        Args:
+            term: The words to look for, matched case-insensitively.
+            limit: The maximum number of results, None for all of them.
+
+        Returns:
+            The ids of the best matches, best first.
+        """
+        matches = [self.similar_words(word)
+                   for word in dict.fromkeys(split_words(term))]
+        per_word = None if limit is None else max(limit,
+                                                  MAX_CANDIDATES_PER_WORD)
+        candidates = {}
+        for similar in matches:
+            candidates.update((video.video_id, video) for video in
+                              islice(self._iter_closest(similar), per_word))
+
+        # The query words each indexed word matches, with their distance.
+        distances = {}
+        for position, similar in enumerate(matches):
+            for word, distance in similar.items():
+                distances.setdefault(word, []).append((position, distance))
+
+        def rank(video):
+            title = video.title
+            words = split_words(title)
+            best = {}
+            matched = 0
+            for word in words:
+                found = distances.get(word)
+                if found is None:
+                    continue
+                matched += 1
+                for position, distance in found:
+                    if distance < best.get(position, distance + 1):
+                        best[position] = distance
+            return (len(matches) - len(best), sum(best.values()),
+                    -matched / len(words), title, video.video_id)
+
+        ranked = map(rank, candidates.values())
+        ranked = sorted(ranked) if limit is None else nsmallest(limit, ranked)
+        return [key[-1] for key in ranked]
@@ -0,0 +1,241 @@
+"""Opt-in per-command latency and allocation statistics."""
+
+import json
+import time
+import tracemalloc
+
+
+# Sub-buckets per power of two of a latency histogram: latencies are
+# rounded up to within 1/8 (12.5%) of their value.
+_SUB_BUCKET_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _reset_traced_peak():
+    """Makes the traced memory peak restart from the current size.
+
+    tracemalloc.reset_peak() only exists from Python 3.9. Before that the
+    traces are cleared instead, which restarts both the size and the peak
+    from zero, so frees of older blocks no longer count against the net
+    allocation of the command.
+    """
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.clear_traces()
+
+
+def _bucket(nanoseconds):
+    """Returns the histogram bucket of a latency."""
+    exponent = nanoseconds.bit_length() - 1
+    if exponent < _SUB_BUCKET_BITS:
+        return max(nanoseconds, 0)
+    shift = exponent - _SUB_BUCKET_BITS
+    return (shift + 1) * _SUB_BUCKETS + ((nanoseconds >> shift) - _SUB_BUCKETS)
+
+
+def _bucket_upper_bound(bucket):
+    """Returns the largest latency, in nanoseconds, of a bucket."""
+    if bucket < _SUB_BUCKETS:
+        return bucket
+    shift = bucket // _SUB_BUCKETS - 1
+    return ((bucket % _SUB_BUCKETS + _SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """A class used to represent a log-linear histogram of latencies."""
+
+    def __init__(self):
+        self._buckets = {}
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, nanoseconds):
+        """Adds one latency, in nanoseconds."""
+        bucket = _bucket(nanoseconds)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ns += nanoseconds
+        if nanoseconds > self.max_ns:
+            self.max_ns = nanoseconds
+
+    def percentile(self, quantile):
+        """Returns the latency, in nanoseconds, below which a quantile
+        (0 to 1) of the recorded latencies fall. 0 if nothing was
+        recorded."""
+        if not self.count:
+            return 0
+        rank = quantile * self.count
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return min(_bucket_upper_bound(bucket), self.max_ns)
+        return self.max_ns
+
+
+class CommandStats:
+    """A class used to represent the statistics of one command."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        # Only updated when allocations are traced.
+        self.net_allocated_bytes = 0
+        self.peak_allocated_bytes = 0
+
+    def to_dict(self):
+        """Returns the statistics as JSON serializable values, latencies in
+        seconds."""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_seconds": dict(
+                {f"p{round(quantile * 100)}":
+                 self.latency.percentile(quantile) / 1e9
+                 for quantile in QUANTILES},
+                max=self.latency.max_ns / 1e9,
+                total=self.latency.total_ns / 1e9),
+            "net_allocated_bytes": self.net_allocated_bytes,
+            "peak_allocated_bytes": self.peak_allocated_bytes,
+        }
+
+
+class Instrumentation:
+    """A class used to measure the commands a CommandParser executes.
+
+    Attach one with CommandParser.enable_instrumentation(); parsers without
+    one skip measuring entirely.
+    """
+
+    def __init__(self, trace_allocations=False):
+        """The Instrumentation class is initialized.
+
+        Args:
+            trace_allocations: True to also record, per command, the net
+                and peak memory allocated while it runs, using tracemalloc.
+                This slows every command down considerably.
+        """
+        self._stats = {}
+        self._trace_allocations = trace_allocations
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def get_command_stats(self):
+        """Returns the CommandStats of every command measured so far, by
+        name."""
+        return self._stats
+
+    def measure(self, name, execute, command):
+        """Runs execute(command) and records it under name.
+
+        Exceptions are recorded as errors and propagated.
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = CommandStats(name)
+        if self._trace_allocations:
+            _reset_traced_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter_ns()
+        try:
+            execute(command)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.latency.record(time.perf_counter_ns() - start)
+            stats.calls += 1
+            if self._trace_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                stats.net_allocated_bytes += current - before
+                stats.peak_allocated_bytes = max(stats.peak_allocated_bytes,
+                                                 peak - before)
+
+    def _measured_names(self):
+        """Returns the sorted names of the commands that completed at least
+        once; a STATS command reporting on itself is still running."""
+        return sorted(name for name, stats in self._stats.items()
+                      if stats.calls)
+
+    def format_report(self):
+        """Returns a human readable table of the statistics."""
+        header = (f"{'Command':24s} {'Calls':>8s} {'Errors':>7s} "
+                  f"{'p50 us':>10s} {'p95 us':>10s} {'p99 us':>10s}")
+        if self._trace_allocations:
+            header += f" {'Net KiB':>10s} {'Peak KiB':>10s}"
+        lines = [header]
+        for name in self._measured_names():
+            stats = self._stats[name]
+            line = f"{name:24s} {stats.calls:8d} {stats.errors:7d}"
+            for quantile in QUANTILES:
+                line += f" {stats.latency.percentile(quantile) / 1e3:10.1f}"
+            if self._trace_allocations:
+                line += (f" {stats.net_allocated_bytes / 1024:10.1f}"
+                         f" {stats.peak_allocated_bytes / 1024:10.1f}")
+            lines.append(line)
+        return "\n".join(lines)
+
+    def to_json(self):
+        """Returns the statistics as a JSON document."""
+        return json.dumps({name: self._stats[name].to_dict()
+                           for name in self._measured_names()}, indent=2)
+
+    def to_prometheus(self):
+        """Returns the statistics in the Prometheus text exposition
+        format."""
+        names = self._measured_names()
+        lines = ["# HELP yt_command_calls_total Commands executed.",
+                 "# TYPE yt_command_calls_total counter"]
+        lines.extend(f'yt_command_calls_total{{command="{name}"}} '
+                     f'{self._stats[name].calls}' for name in names)
+        lines.append("# HELP yt_command_errors_total Commands that raised.")
+        lines.append("# TYPE yt_command_errors_total counter")
+        lines.extend(f'yt_command_errors_total{{command="{name}"}} '
+                     f'{self._stats[name].errors}' for name in names)
+        lines.append("# HELP yt_command_latency_seconds Command latency.")
+        lines.append("# TYPE yt_command_latency_seconds summary")
+        for name in names:
+            latency = self._stats[name].latency
+            for quantile in QUANTILES:
+                lines.append(
+                    f'yt_command_latency_seconds{{command="{name}",'
+                    f'quantile="{quantile}"}} '
+                    f'{latency.percentile(quantile) / 1e9:.9f}')
+            lines.append(f'yt_command_latency_seconds_sum{{command="{name}"}} '
+                         f'{latency.total_ns / 1e9:.9f}')
+            lines.append(f'yt_command_latency_seconds_count{{command="{name}"}} '
+                         f'{latency.count}')
+        if self._trace_allocations:
+            lines.append("# HELP yt_command_peak_allocated_bytes Largest "
+                         "memory peak of a single command.")
+            lines.append("# TYPE yt_command_peak_allocated_bytes gauge")
+            lines.extend(f'yt_command_peak_allocated_bytes{{command="{name}"}} '
+                         f'{self._stats[name].peak_allocated_bytes}'
+                         for name in names)
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, export_format="json"):
+        """Writes the statistics to a file.
+
+        Args:
+            path: The file to write.
+            export_format: 'json' or 'prometheus'.
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+        export_format = export_format.lower()
+        if export_format == "json":
+            text = self.to_json()
+        elif export_format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f"unknown export format {export_format!r}")
+        with open(path, "w") as export_file:
+            export_file.write(text)
@@ -0,0 +1,96 @@
+"""Output sinks the video player writes its lines to."""
+
+import sys
+
+
+class PrintSink:
+    """A class used to print every line as soon as it is written."""
+
+    def write(self, text):
+        """Writes text followed by a newline."""
+        print(text)
+
+    def flush(self):
+        """Nothing is buffered."""
+        pass
+
+
+class BufferedSink:
+    """A class used to batch lines and write them out in one go.
+
+    Lines are held until flush(), which the command parser calls once per
+    command, or until max_lines are pending.
+    """
+
+    def __init__(self, stream=None, max_lines=8192, sync=True):
+        """The BufferedSink class is initialized.
+
+        Args:
+            stream: The text stream to write to, sys.stdout (looked up at
+                flush time) by default.
+            max_lines: How many lines may be pending before an early flush.
+            sync: Whether flush() also flushes the stream itself. Turn off
+                when nobody watches the output line by line, so the stream
+                is only flushed when its own buffer fills up.
+        """
+        self._stream = stream
+        self._max_lines = max_lines
+        self._sync = sync
+        self._lines = []
+
+    def write(self, text):
+        """Buffers text followed by a newline."""
+        self._lines.append(text)
+        if len(self._lines) >= self._max_lines:
+            self.flush()
+
+    def flush(self):
+        """Writes out and clears the pending lines."""
+        if not self._lines:
+            return
+        stream = self._stream or sys.stdout
+        self._lines.append("")
+        stream.write("\n".join(self._lines))
+        if self._sync:
+            stream.flush()
+        self._lines.clear()
+
+
+class CollectorSink:
+    """A class used to keep every written line in memory, e.g. for tests or
+    when embedding the player."""
+
+    def __init__(self):
+        self._lines = []
+
+    def write(self, text):
+        """Stores text, which may span several lines."""
+        self._lines.extend(text.split("\n"))
+
+    def flush(self):
+        """Lines are kept until clear() is called."""
+        pass
+
+    def get_lines(self):
+        """Returns the lines written so far."""
+        return self._lines
+
+    def getvalue(self):
+        """Returns everything written so far as one string."""
+        return "".join(line + "\n" for line in self._lines)
+
+    def clear(self):
+        """Forgets the lines written so far."""
+        self._lines.clear()
+
+
+class NullSink:
+    """A class used to discard all output, e.g. for benchmarking."""
+
+    def write(self, text):
+        """Discards text."""
+        pass
+
+    def flush(self):
+        """Nothing is buffered."""
+        pass
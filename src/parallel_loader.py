@@ -0,0 +1,149 @@
+"""A catalog loader parsing and indexing shards in worker processes."""
+
+from .fuzzy_index import FuzzyIndex
+from .tag_index import TagIndex
+from .title_index import TitleIndex
+from .title_order import TitleOrder
+from .video_loader import LoadStats, _peak_rss_bytes, iter_videos
+from concurrent.futures import ProcessPoolExecutor
+import gc
+import io
+import mmap
+import os
+import time
+
+
+# Shards below this many bytes cost more to ship back than to parse.
+MIN_SHARD_SIZE = 1 << 20
+
+
+def split_shards(path, count, min_size=None):
+    """Splits a catalog into byte ranges starting and ending on lines.
+
+    A catalog holding a '"' is not split, since a quoted field may span
+    lines and only a reader starting at the top of the file can tell.
+
+    Args:
+        path: The catalog file.
+        count: The maximum number of shards.
+        min_size: The minimum size of a shard in bytes, None for
+            MIN_SHARD_SIZE.
+
+    Returns:
+        A list of (start, end) byte offsets, in file order.
+    """
+    size = os.path.getsize(path)
+    if not size:
+        return []
+    if min_size is None:
+        min_size = MIN_SHARD_SIZE
+    count = max(1, min(count, size // max(min_size, 1)))
+    with open(path, "rb") as catalog_file, \
+            mmap.mmap(catalog_file.fileno(), 0,
+                      access=mmap.ACCESS_READ) as data:
+        if count == 1 or data.find(b'"') != -1:
+            return [(0, size)]
+        shards = []
+        start = 0
+        for number in range(1, count):
+            # A shard ends on the first newline at or past its target size.
+            target = max(size * number // count, start + 1)
+            newline = data.find(b"\n", target - 1)
+            if newline == -1 or newline + 1 >= size:
+                break
+            shards.append((start, newline + 1))
+            start = newline + 1
+        shards.append((start, size))
+        return shards
+
+
+def load_shard(path, start, end):
+    """Parses and indexes one shard of a catalog, in a worker process.
+
+    Args:
+        path: The catalog file.
+        start: The offset of the first byte of the shard.
+        end: The offset past its last byte.
+
+    Returns:
+        The videos of the shard, once per id in order of first appearance
+        with later rows winning, their TagIndex, TitleIndex, FuzzyIndex and
+        TitleOrder and the LoadStats of the shard, with line numbers relative to it.
+    """
+    with open(path, "rb") as catalog_file:
+        catalog_file.seek(start)
+        data = catalog_file.read(end - start)
+    stats = LoadStats()
+    # Decoded as open() would decode the whole file.
+    with io.TextIOWrapper(io.BytesIO(data), newline="") as shard_file:
+        videos = {}
+        for video in iter_videos(shard_file, stats):
+            videos[video.video_id] = video
+    videos = list(videos.values())
+    tag_index = TagIndex()
+    tag_index.add_videos(videos)
+    tag_index.settle()
+    title_index = TitleIndex()
+    title_index.add_videos(videos)
+    fuzzy_index = FuzzyIndex()
+    fuzzy_index.add_videos(videos)
+    fuzzy_index.settle()
+    title_order = TitleOrder()
+    title_order.add_videos(videos)
+    title_order.settle()
+    return (videos, tag_index, title_index, fuzzy_index, title_order,
+            stats)
+
+
+class ParallelVideoLoader:
+    """A class used to load a catalog with a pool of worker processes.
+
+    Each worker parses a shard of the file and indexes its videos; the
+    caller merges the shards in file order, which gives the same library
+    as a serial load as long as later rows win across shards too.
+    """
+
+    def __init__(self, path, workers=None, min_shard_size=None):
+        """The ParallelVideoLoader class is initialized.
+
+        Args:
+            path: The path of a '|' separated catalog file.
+            workers: The number of worker processes, None for one per CPU.
+            min_shard_size: The minimum size of a shard in bytes, None for
+                MIN_SHARD_SIZE.
+        """
+        self._path = path
+        self._workers = workers or os.cpu_count() or 1
+        self._min_shard_size = min_shard_size
+        self.stats = LoadStats()
+
+    def iter_shards(self):
+        """Yields the load_shard() results of every shard, in file order,
+        as soon as each one and those before it are done.
+
+        The loader stats cover every yielded shard; peak_rss_bytes only
+        covers the calling process.
+        """
+        stats = self.stats
+        start = time.perf_counter()
+        # Unpickling a shard creates millions of objects that cannot form
+        # cycles; letting the collector rescan them as they pile up would
+        # double the time spent in this process.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            shards = split_shards(self._path, self._workers,
+                                  self._min_shard_size)
+            if not shards:
+                return
+            with ProcessPoolExecutor(min(self._workers, len(shards))) as pool:
+                for shard in pool.map(load_shard,
+                                      [self._path] * len(shards),
+                                      *zip(*shards)):
+                    stats.merge(shard[-1])
+                    yield shard
+        finally:
+            if collecting:
+                gc.enable()
+            stats.elapsed_seconds = time.perf_counter() - start
+            stats.peak_rss_bytes = _peak_rss_bytes()
@@ -0,0 +1,215 @@
+"""An append-only write-ahead log of playlist mutations and flag changes.
+
+Every record is framed as (little-endian):
+
+    length   uint32, size of the payload
+    crc      uint32, CRC-32 of the payload
+    payload  operation byte, then each argument as a uint32 length
+             followed by its UTF-8 bytes
+
+Records are buffered and written with a single fsync per group, either
+once group_size records are pending or once sync_interval seconds have
+passed since the last sync. A crash can therefore lose at most the
+mutations of the last, unsynced group; a torn record at the end of the
+log is detected by its length or CRC and discarded on replay.
+"""
+
+from .snapshot import load_snapshot, save_snapshot
+import os
+import struct
+import time
+import zlib
+
+
+CREATE = 1
+ADD = 2
+REMOVE = 3
+CLEAR = 4
+DELETE = 5
+FLAG = 6
+ALLOW = 7
+
+# Number of string arguments of each operation.
+_ARITY = {CREATE: 1, ADD: 2, REMOVE: 2, CLEAR: 1, DELETE: 1, FLAG: 2,
+          ALLOW: 1}
+
+_FRAME = struct.Struct("<II")
+_STRING_LENGTH = struct.Struct("<I")
+
+
+def _encode(op, args):
+    payload = bytearray([op])
+    for arg in args:
+        encoded = arg.encode("utf-8")
+        payload += _STRING_LENGTH.pack(len(encoded))
+        payload += encoded
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode(data, offset, end):
+    """Decodes the payload stored in data[offset:end]."""
+    op = data[offset]
+    offset += 1
+    args = []
+    for _ in range(_ARITY[op]):
+        length, = _STRING_LENGTH.unpack_from(data, offset)
+        offset += _STRING_LENGTH.size
+        args.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    if offset != end:
+        raise ValueError("record length does not match its payload")
+    return op, tuple(args)
+
+
+class PlaylistLog:
+    """A class used to append playlist mutations and flag changes to a
+    write-ahead log."""
+
+    def __init__(self, path, group_size=256, sync_interval=0.005):
+        """The PlaylistLog class is initialized.
+
+        Args:
+            path: The log file, created if needed and appended to.
+            group_size: Pending records that force a group commit.
+            sync_interval: Seconds after which pending records are
+                committed by the next append.
+        """
+        self._file = open(path, "ab")
+        self._group_size = group_size
+        self._sync_interval = sync_interval
+        self._pending = bytearray()
+        self._pending_count = 0
+        self._last_sync = time.monotonic()
+        self.records_written = 0
+        self.syncs = 0
+
+    def append(self, op, *args):
+        """Logs one mutation, committing the group if it is due.
+
+        Args:
+            op: One of CREATE, ADD, REMOVE, CLEAR, DELETE, FLAG or ALLOW.
+            args: The playlist name, then the video_id for ADD and REMOVE.
+                For FLAG and ALLOW the video_id, then the reason for FLAG.
+        """
+        self._pending += _encode(op, args)
+        self._pending_count += 1
+        if (self._pending_count >= self._group_size or
+                time.monotonic() - self._last_sync >= self._sync_interval):
+            self.commit()
+
+    def commit(self):
+        """Writes and fsyncs every pending record."""
+        if self._pending_count:
+            self._file.write(self._pending)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.records_written += self._pending_count
+            self.syncs += 1
+            self._pending.clear()
+            self._pending_count = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Commits pending records and closes the log."""
+        self.commit()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_log(path):
+    """Reads the intact records of a log.
+
+    Returns:
+        A (records, valid length) pair, where records are (op, args)
+        pairs and valid length is the byte offset just past the last
+        intact record.
+    """
+    with open(path, "rb") as log_file:
+        data = log_file.read()
+    records = []
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        end = start + length
+        if (length == 0 or end > len(data) or
+                zlib.crc32(data[start:end]) != crc or data[start] not in _ARITY):
+            break  # Torn or corrupted tail
+        try:
+            records.append(_decode(data, start, end))
+        except (ValueError, struct.error):
+            break
+        offset = end
+    return records, offset
+
+
+def apply_records(records, session, video_library):
+    """Replays logged mutations onto the playlists of a session and the
+    flags of the library.
+
+    Mutations that no longer apply, e.g. adding a video that left the
+    library, are skipped, so replaying a log over a snapshot that already
+    contains some of its records is harmless.
+    """
+    playlists = session.playlists
+    for op, args in records:
+        if op == FLAG:
+            video_library.flag_video(*args)
+        elif op == ALLOW:
+            video_library.allow_video(args[0])
+        elif op == CREATE:
+            playlists.create(args[0])
+        elif op == DELETE:
+            playlists.delete(args[0])
+        else:
+            playlist = playlists.get(args[0])
+            if playlist is None:
+                continue
+            if op == ADD:
+                video = video_library.get_video(args[1])
+                if video is not None:
+                    playlist.add_video(video)
+            elif op == REMOVE:
+                playlist.remove_video(args[1])
+            elif op == CLEAR:
+                playlist.clear()
+
+
+def compact(session, video_library, snapshot_path, log_path):
+    """Saves the playlists of a session and the flags of the library as
+    the snapshot and empties the log.
+
+    The log is only truncated once the snapshot holding its records is
+    safely on disk; a crash in between just replays the log again.
+    """
+    save_snapshot(session, snapshot_path, video_library.get_flags())
+    with open(log_path, "wb") as log_file:
+        os.fsync(log_file.fileno())
+
+
+def recover(session, video_library, snapshot_path, log_path):
+    """Restores playlists and flags from a snapshot and its log, then
+    compacts them.
+
+    The snapshot (if any) is loaded, the log (if any) is replayed on top
+    of it, and the result is compacted into a new snapshot.
+
+    Returns:
+        A (log records replayed, missing video ids) pair, the missing ids
+        being those the snapshot referenced but the library lacks.
+    """
+    missing = []
+    if os.path.exists(snapshot_path):
+        session.playlists, missing = load_snapshot(snapshot_path,
+                                                   video_library)
+    records = []
+    if os.path.exists(log_path):
+        records, _ = read_log(log_path)
+        apply_records(records, session, video_library)
+    compact(session, video_library, snapshot_path, log_path)
+    return len(records), missing
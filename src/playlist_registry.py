@@ -0,0 +1,137 @@
+"""A playlist registry class."""
+
+from .video_playlist import Playlist
+from bisect import bisect_left, insort
+from itertools import chain
+import threading
+
+
+# Names per block of a _SortedNames; a block is split in two once it
+# holds twice as many.
+BLOCK_SIZE = 512
+
+
+class _SortedNames:
+    """A class used to keep unique names in sorted order.
+
+    The names are stored in consecutive sorted blocks of at most
+    2 * BLOCK_SIZE names, with the last name of every block in a separate
+    list. Adding or removing a name binary searches that list, then the
+    block, and only shifts the names of that one block, so both take
+    O(log n) comparisons and O(BLOCK_SIZE) moves. Splitting a full block
+    or dropping an empty one also shifts the list of last names, which is
+    BLOCK_SIZE times shorter than the names and changes at most once
+    every BLOCK_SIZE additions.
+    """
+
+    def __init__(self):
+        self._blocks = []
+        self._maxes = []
+
+    def __iter__(self):
+        return chain.from_iterable(self._blocks)
+
+    def add(self, name):
+        """Inserts a name that is not held yet."""
+        blocks = self._blocks
+        maxes = self._maxes
+        if not blocks:
+            blocks.append([name])
+            maxes.append(name)
+            return
+        position = bisect_left(maxes, name)
+        if position == len(maxes):
+            position -= 1
+            block = blocks[position]
+            block.append(name)
+            maxes[position] = name
+        else:
+            block = blocks[position]
+            insort(block, name)
+        if len(block) > 2 * BLOCK_SIZE:
+            blocks.insert(position + 1, block[BLOCK_SIZE:])
+            del block[BLOCK_SIZE:]
+            maxes.insert(position, block[-1])
+
+    def remove(self, name):
+        """Removes a name that is held."""
+        blocks = self._blocks
+        maxes = self._maxes
+        position = bisect_left(maxes, name)
+        block = blocks[position]
+        del block[bisect_left(block, name)]
+        if not block:
+            del blocks[position]
+            del maxes[position]
+        elif maxes[position] == name:
+            maxes[position] = block[-1]
+
+
+class PlaylistRegistry:
+    """A class used to store playlists by case-insensitive name.
+
+    Lookups go through a dict keyed by the lowercased name. The display
+    names are kept sorted in blocks that are maintained on create and
+    delete in O(log n), so listing all playlists never sorts.
+
+    Creating and deleting edit the sorted names in place while holding
+    the registry lock; listings copy them under the same lock, so a
+    listing in progress in another thread is never disturbed.
+    """
+
+    def __init__(self):
+        self._playlists = {}
+        self._sorted_names = _SortedNames()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._playlists)
+
+    def __contains__(self, playlist_name):
+        return playlist_name.lower() in self._playlists
+
+    def __iter__(self):
+        """Yields the playlists ordered by name, skipping any deleted while
+        iterating."""
+        playlists = self._playlists
+        return (playlist for playlist in
+                (playlists.get(name.lower())
+                 for name in self.get_playlist_names())
+                if playlist is not None)
+
+    def get_playlist_names(self):
+        """Returns a new list of the playlist names in sorted order."""
+        with self._lock:
+            return list(self._sorted_names)
+
+    def get(self, playlist_name):
+        """Returns the playlist with the given name, None if it does not
+        exist."""
+        return self._playlists.get(playlist_name.lower())
+
+    def create(self, playlist_name):
+        """Creates an empty playlist.
+
+        Returns:
+            The new Playlist. None if a playlist with the same name,
+            ignoring case, already exists.
+        """
+        key = playlist_name.lower()
+        with self._lock:
+            if key in self._playlists:
+                return None
+            playlist = self._playlists[key] = Playlist(playlist_name)
+            self._sorted_names.add(playlist_name)
+        return playlist
+
+    def delete(self, playlist_name):
+        """Deletes a playlist.
+
+        Returns:
+            The deleted Playlist. None if the playlist does not exist.
+        """
+        with self._lock:
+            playlist = self._playlists.pop(playlist_name.lower(), None)
+            if playlist is not None:
+                self._sorted_names.remove(playlist.get_playlist_name())
+        return playlist
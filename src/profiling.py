@@ -0,0 +1,168 @@
+"""Profiling of whole sessions, filtered commands or on-demand windows.
+
+A Profiler runs cProfile for exact call statistics and, alongside it, a
+thread sampling the profiled thread's stack for a flame graph. Both are
+written next to an output prefix:
+
+    PREFIX.pstats     read with python3 -m pstats PREFIX.pstats
+    PREFIX.collapsed  one 'outer;...;inner count' line per sampled stack,
+                      the input format of flamegraph.pl and speedscope
+"""
+
+from collections import Counter
+import cProfile
+import sys
+import threading
+
+
+DEFAULT_SAMPLING_INTERVAL = 0.001
+
+
+def _collapse(frame):
+    """Returns the stack of a frame, outermost call first, ';' separated."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _StackSampler(threading.Thread):
+    """A class used to count the stacks of a thread at a fixed interval,
+    until it is stopped."""
+
+    def __init__(self, interval, target, stacks):
+        """The _StackSampler class is initialized.
+
+        Args:
+            interval: Seconds between two samples.
+            target: The id of the thread to sample.
+            stacks: The Counter the sampled stacks are added to.
+        """
+        super().__init__(name="stack-sampler", daemon=True)
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._target = target
+        self._stacks = stacks
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self._stacks[_collapse(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class Profiler:
+    """A class used to profile the commands a CommandParser executes.
+
+    Attach one with CommandParser.enable_profiling(). Profiling covers
+    everything between start() and stop(), or, with a command filter, only
+    the commands it names. Statistics accumulate until close().
+
+    The sampling thread only runs while something is profiled: it is
+    started when a profiled window opens and stopped when it closes.
+    """
+
+    def __init__(self, output_prefix, commands=None,
+                 sampling_interval=DEFAULT_SAMPLING_INTERVAL):
+        """The Profiler class is initialized.
+
+        Args:
+            output_prefix: Where the .pstats and .collapsed files go.
+            commands: Names of the commands to profile whenever they run,
+                None to only profile between start() and stop().
+            sampling_interval: Seconds between two stack samples.
+        """
+        self._output_prefix = output_prefix
+        self._commands = (frozenset(name.upper() for name in commands)
+                          if commands else frozenset())
+        self._profile = cProfile.Profile()
+        self._sampling_interval = sampling_interval
+        self._sampler = None
+        self._stacks = Counter()
+        self._active = False
+        self._profiled = False
+
+    def get_output_paths(self):
+        """Returns the (pstats, collapsed stacks) paths written to."""
+        return (f"{self._output_prefix}.pstats",
+                f"{self._output_prefix}.collapsed")
+
+    def is_active(self):
+        """Returns True between start() and stop()."""
+        return self._active
+
+    def _enable(self):
+        self._sampler = _StackSampler(self._sampling_interval,
+                                      threading.get_ident(), self._stacks)
+        self._sampler.start()
+        self._profile.enable()
+        self._profiled = True
+
+    def _disable(self):
+        self._profile.disable()
+        self._sampler.stop()
+        self._sampler = None
+
+    def start(self):
+        """Profiles everything the calling thread runs until stop().
+
+        Returns:
+            False if profiling was already started.
+        """
+        if self._active:
+            return False
+        self._active = True
+        self._enable()
+        return True
+
+    def stop(self):
+        """Stops profiling started by start() and writes the output files.
+
+        Returns:
+            False if profiling was not started.
+        """
+        if not self._active:
+            return False
+        self._disable()
+        self._active = False
+        self.write()
+        return True
+
+    def measure(self, name, execute, command):
+        """Runs execute(command), profiling it if the filter names it."""
+        if self._active or name not in self._commands:
+            execute(command)
+            return
+        self._enable()
+        try:
+            execute(command)
+        finally:
+            self._disable()
+
+    def write(self):
+        """Writes what was profiled so far to the output files."""
+        pstats_path, collapsed_path = self.get_output_paths()
+        self._profile.dump_stats(pstats_path)
+        with open(collapsed_path, "w") as collapsed_file:
+            for stack, count in self._stacks.most_common():
+                collapsed_file.write(f"{stack} {count}\n")
+
+    def close(self):
+        """Stops profiling and sampling, writing the output files if
+        anything was profiled.
+
+        Returns:
+            True if the output files were written.
+        """
+        if self._active:
+            self._disable()
+            self._active = False
+        if self._profiled:
+            self.write()
+        return self._profiled
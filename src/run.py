@@ -1,15 +1,103 @@
 """A youtube terminal simulator."""
+from .batch import BatchRunner
+from .binary_catalog import MappedVideoLibrary
 from .video_player import VideoPlayer
+from .video_library import VideoLibrary
+from .session import SessionState
 from .command_parser import CommandException
 from .command_parser import CommandParser
+from .instrumentation import Instrumentation
+from .output import BufferedSink, NullSink
+from .playlist_log import PlaylistLog, compact, recover
+from .profiling import Profiler
+import argparse
+import io
+import sys
 
 
-if __name__ == "__main__":
+# Large read and write buffers keep batch runs from being I/O bound.
+BATCH_BUFFER_SIZE = 1 << 20
+
+
+def open_library(mapped_catalog=None):
+    """Returns the library to play from: a MappedVideoLibrary over a
+    compiled binary catalog if one is given, videos.txt otherwise."""
+    if mapped_catalog:
+        return MappedVideoLibrary(mapped_catalog)
+    return VideoLibrary()
+
+
+def journal_path(snapshot_path):
+    """Returns the write-ahead log kept next to a snapshot."""
+    return f"{snapshot_path}.wal"
+
+
+def restore_snapshot(session, video_library, snapshot_path):
+    """Restores the playlists of a session from a snapshot and its log.
+
+    Returns:
+        The PlaylistLog the session's playlist mutations should be appended
+        to, None if no snapshot path was given.
+    """
+    if not snapshot_path:
+        return None
+    replayed, missing = recover(session, video_library, snapshot_path,
+                                journal_path(snapshot_path))
+    if replayed:
+        print(f"Replayed {replayed} playlist changes from the journal",
+              file=sys.stderr)
+    if missing:
+        print(f"Dropped {len(missing)} videos no longer in the library "
+              f"from the saved playlists", file=sys.stderr)
+    return PlaylistLog(journal_path(snapshot_path))
+
+
+def write_snapshot(session, video_library, snapshot_path, journal):
+    """Closes the journal and compacts it into the snapshot, if any."""
+    if journal is not None:
+        journal.close()
+        compact(session, video_library, snapshot_path,
+                journal_path(snapshot_path))
+
+
+def make_parser(video_player, instrumentation=None, profiler=None):
+    """Returns a CommandParser for the player with the given
+    instrumentation and profiler, if any, enabled."""
+    parser = CommandParser(video_player)
+    if instrumentation is not None:
+        parser.enable_instrumentation(instrumentation)
+    if profiler is not None:
+        parser.enable_profiling(profiler)
+    return parser
+
+
+def run_interactive(snapshot_path=None, instrumentation=None, profiler=None,
+                    mapped_catalog=None):
+    """Runs the prompt driven YT> session.
+
+    Args:
+        snapshot_path: Where playlists and flags are restored from and
+            saved to on EXIT, None to keep them in memory only. Changes in
+            between are journaled next to it.
+        instrumentation: An Instrumentation to measure the commands with,
+            enabling the STATS command. None to not measure them.
+        profiler: A Profiler to run the commands under, enabling the
+            PROFILE command. None to not profile them.
+        mapped_catalog: A binary catalog to play from instead of
+            videos.txt, see src.binary_catalog.
+    """
     print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
-    parser = CommandParser(video_player)
+    video_library = open_library(mapped_catalog)
+    session = SessionState()
+    journal = restore_snapshot(session, video_library, snapshot_path)
+    video_player = VideoPlayer(BufferedSink(), video_library=video_library,
+                               session=session, journal=journal)
+    parser = make_parser(video_player, instrumentation, profiler)
     while True:
+        if journal is not None:
+            # Make the last command durable before waiting on the user.
+            journal.commit()
         command = input("YT> ")
         if command.upper() == "EXIT":
             break
@@ -17,5 +105,115 @@ if __name__ == "__main__":
             parser.execute_command(command.split())
         except CommandException as e:
             print(e)
+    write_snapshot(session, video_library, snapshot_path, journal)
     print("YouTube has now terminated its execution. "
           "Thank you and goodbye!")
+
+
+def run_batch(path, discard_output=False, snapshot_path=None, seed=None,
+              instrumentation=None, profiler=None, mapped_catalog=None):
+    """Executes a command script and reports its stats on stderr.
+
+    Args:
+        path: The script to read, '-' for stdin.
+        discard_output: True to send command output to a NullSink.
+        snapshot_path: Where playlists and flags are restored from and
+            saved to when the script ends, None to keep them in memory only.
+            Changes in between are journaled next to it.
+        seed: Seeds random video picks, so runs are reproducible.
+        instrumentation: An Instrumentation to measure the commands with,
+            enabling the STATS command and reported on stderr at the end.
+            None to not measure them.
+        profiler: A Profiler to run the commands under, enabling the
+            PROFILE command. None to not profile them.
+        mapped_catalog: A binary catalog to play from instead of
+            videos.txt, see src.binary_catalog.
+    """
+    if path == "-":
+        script = io.open(sys.stdin.fileno(), buffering=BATCH_BUFFER_SIZE,
+                         closefd=False)
+    else:
+        script = open(path, buffering=BATCH_BUFFER_SIZE)
+    with script:
+        runner = BatchRunner(script)
+        output = NullSink() if discard_output else BufferedSink(sync=False)
+        video_library = open_library(mapped_catalog)
+        if seed is not None:
+            video_library.get_sampler().seed(seed)
+        session = SessionState()
+        journal = restore_snapshot(session, video_library, snapshot_path)
+        video_player = VideoPlayer(output, runner.read_answer, video_library,
+                                   session, journal)
+        stats = runner.run(
+            make_parser(video_player, instrumentation, profiler), output)
+    write_snapshot(session, video_library, snapshot_path, journal)
+    sys.stdout.flush()
+    print(stats.format_report(), file=sys.stderr)
+    if instrumentation is not None:
+        print(instrumentation.format_report(), file=sys.stderr)
+    return stats
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="python3 -m src.run", description="A youtube terminal simulator.")
+    arg_parser.add_argument(
+        "--batch", metavar="FILE",
+        help="execute the commands in FILE ('-' for stdin) without prompts")
+    arg_parser.add_argument(
+        "--no-output", action="store_true",
+        help="discard command output in batch mode")
+    arg_parser.add_argument(
+        "--snapshot", metavar="FILE",
+        help="restore playlists and flags from FILE at startup, journal changes to "
+             "FILE.wal and save them to FILE on exit")
+    arg_parser.add_argument(
+        "--mapped-catalog", metavar="FILE",
+        help="play from a binary catalog compiled with src.binary_catalog "
+             "instead of loading videos.txt")
+    arg_parser.add_argument(
+        "--seed", type=int,
+        help="seed random video picks in batch mode, for reproducible runs")
+    arg_parser.add_argument(
+        "--stats", action="store_true",
+        help="measure per-command latencies and enable the STATS command")
+    arg_parser.add_argument(
+        "--trace-allocations", action="store_true",
+        help="with --stats, also measure per-command memory allocations")
+    arg_parser.add_argument(
+        "--profile", metavar="PREFIX",
+        help="profile the session into PREFIX.pstats and PREFIX.collapsed "
+             "and enable the PROFILE START/STOP command")
+    profile_mode = arg_parser.add_mutually_exclusive_group()
+    profile_mode.add_argument(
+        "--profile-commands", metavar="NAMES",
+        help="with --profile, only profile these comma separated commands")
+    profile_mode.add_argument(
+        "--profile-on-demand", action="store_true",
+        help="with --profile, only profile between PROFILE START and STOP")
+    args = arg_parser.parse_args(argv)
+    instrumentation = None
+    if args.stats or args.trace_allocations:
+        instrumentation = Instrumentation(args.trace_allocations)
+    profiler = None
+    if args.profile:
+        commands = (args.profile_commands.split(",")
+                    if args.profile_commands else None)
+        profiler = Profiler(args.profile, commands)
+        if commands is None and not args.profile_on_demand:
+            profiler.start()  # The whole session, catalog loading included
+    try:
+        if args.batch:
+            run_batch(args.batch, args.no_output, args.snapshot, args.seed,
+                      instrumentation, profiler, args.mapped_catalog)
+        else:
+            run_interactive(args.snapshot, instrumentation, profiler,
+                            args.mapped_catalog)
+    finally:
+        if profiler is not None and profiler.close():
+            print("Wrote profile to " + " and ".join(
+                profiler.get_output_paths()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
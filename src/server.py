@@ -0,0 +1,236 @@
+"""An asyncio server giving many concurrent users a video player each.
+
+Clients speak the same line-based protocol as the terminal: they send one
+command per line and every response ends with the 'YT> ' prompt. Each
+connection gets its own playback state and playlists, all playing from a
+single VideoLibrary loaded at startup. Searches send their results and
+question, then wait for the answer like for any other line, so an open
+question holds no thread. Flagging and allowing videos affects every
+session, so it is refused unless the server is started with
+--allow-flagging, and runs in worker threads, so the library is shared
+through a ConcurrentVideoLibrary. With --mapped-catalog the sessions play
+from a compiled binary catalog instead, see src.binary_catalog.
+
+    python3 -m src.server --port 8765
+"""
+
+from .binary_catalog import MappedVideoLibrary
+from .command_parser import CommandException, CommandParser
+from .concurrent_library import ConcurrentVideoLibrary
+from .video_library import DEFAULT_CATALOG, VideoLibrary
+from .video_player import VideoPlayer
+import argparse
+import asyncio
+
+
+PROMPT = b"YT> "
+GREETING = (b"Hello and welcome to YouTube, what would you like to do?\n"
+            b"    Enter HELP for list of available commands or EXIT to "
+            b"terminate.\n")
+GOODBYE = b"YouTube has now terminated its execution. Thank you and goodbye!\n"
+BUSY = b"Server busy, please try again later.\n"
+
+# Commands changing the flags every session sees, mapped to the prefix of
+# the message refusing them. They are only served when the server allows
+# flagging, and run in a worker thread, as folding many flags into the
+# library copies it.
+FLAGGING_COMMANDS = {"FLAG_VIDEO": "Cannot flag video",
+                     "ALLOW_VIDEO": "Cannot remove flag from video"}
+
+DEFAULT_MAX_CONNECTIONS = 10000
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class _SendSink:
+    """A class used to collect the lines of a command and hand them to a
+    send callback, as one chunk of bytes, on flush."""
+
+    def __init__(self):
+        self._lines = []
+        self.send = None
+
+    def write(self, text):
+        """Buffers text followed by a newline."""
+        self._lines.append(text)
+
+    def flush(self):
+        """Sends the pending lines."""
+        if self._lines:
+            self._lines.append("")
+            self.send("\n".join(self._lines).encode("utf-8"))
+            self._lines.clear()
+
+
+class VideoServer:
+    """A class used to serve video player sessions over asyncio streams."""
+
+    def __init__(self, video_library, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 allow_flagging=False):
+        """The VideoServer class is initialized.
+
+        Args:
+            video_library: The library shared by every session, a
+                ConcurrentVideoLibrary if flagging is allowed.
+            max_connections: Connections beyond this are refused.
+            allow_flagging: True to let clients flag and allow videos for
+                every session, False to refuse FLAG_VIDEO and ALLOW_VIDEO.
+        """
+        self._library = video_library
+        self._max_connections = max_connections
+        self._allow_flagging = allow_flagging
+        self._connections = 0
+        self.commands_served = 0
+
+    def get_connection_count(self):
+        """Returns how many sessions are currently open."""
+        return self._connections
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Starts listening on a TCP address.
+
+        Returns:
+            The asyncio Server; port 0 picks a free port.
+        """
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE_LENGTH)
+
+    async def start_unix(self, path):
+        """Starts listening on a Unix domain socket."""
+        return await asyncio.start_unix_server(
+            self.handle_connection, path, limit=MAX_LINE_LENGTH)
+
+    async def handle_connection(self, reader, writer):
+        """Runs one session until the client sends EXIT or disconnects."""
+        if self._connections >= self._max_connections:
+            writer.write(BUSY)
+            await self._close(writer)
+            return
+        self._connections += 1
+        try:
+            await self._serve(reader, writer)
+        except (ConnectionError, ValueError):
+            # ValueError: the client sent a line longer than the limit.
+            pass
+        finally:
+            self._connections -= 1
+            await self._close(writer)
+
+    @staticmethod
+    async def _close(writer):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def _execute(self, parser, sink, command):
+        """Executes one command, reporting bad usage to the client."""
+        try:
+            parser.execute_command(command)
+        except CommandException as e:
+            sink.write(str(e))
+            sink.flush()
+        self.commands_served += 1
+
+    async def _serve(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        sink = _SendSink()
+
+        def send_from_thread(data):
+            loop.call_soon_threadsafe(writer.write, data)
+
+        player = VideoPlayer(sink, video_library=self._library,
+                             defer_answers=True)
+        parser = CommandParser(player)
+        writer.write(GREETING + PROMPT)
+        while True:
+            # Wait for the client to drain its output before reading the
+            # next command, so a slow reader cannot make us buffer without
+            # bound.
+            await writer.drain()
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode("utf-8", "replace").split()
+            name = command[0].upper() if command else ""
+            if name == "EXIT":
+                writer.write(GOODBYE)
+                await writer.drain()
+                break
+            if name in FLAGGING_COMMANDS and not self._allow_flagging:
+                writer.write(f"{FLAGGING_COMMANDS[name]}: Flags are "
+                             f"read-only on this server\n".encode("utf-8"))
+            elif name in FLAGGING_COMMANDS:
+                sink.send = send_from_thread
+                await loop.run_in_executor(
+                    None, self._execute, parser, sink, command)
+            else:
+                sink.send = writer.write
+                self._execute(parser, sink, command)
+                if player.is_awaiting_answer():
+                    await writer.drain()
+                    answer = await reader.readline()
+                    player.answer_question(
+                        answer.decode("utf-8", "replace").rstrip("\r\n"))
+                    sink.flush()
+                    if not answer:
+                        break
+            writer.write(PROMPT)
+
+
+async def serve(video_library, host, port, unix_path=None,
+                max_connections=DEFAULT_MAX_CONNECTIONS, allow_flagging=False):
+    """Serves sessions until cancelled."""
+    video_server = VideoServer(video_library, max_connections, allow_flagging)
+    if unix_path:
+        server = await video_server.start_unix(unix_path)
+    else:
+        server = await video_server.start(host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving {video_library.number_of_videos()} videos on {addresses}",
+          flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="python3 -m src.server",
+        description="Serve video player sessions over TCP or a Unix socket.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--unix", metavar="PATH",
+                            help="listen on a Unix socket instead of TCP")
+    arg_parser.add_argument("--catalog", default=DEFAULT_CATALOG)
+    arg_parser.add_argument("--mapped-catalog", metavar="PATH",
+                            help="serve a binary catalog compiled with "
+                                 "src.binary_catalog instead of --catalog")
+    arg_parser.add_argument("--load-workers", type=int, default=1,
+                            help="processes to load the catalog with, "
+                                 "0 for one per CPU")
+    arg_parser.add_argument("--max-connections", type=int,
+                            default=DEFAULT_MAX_CONNECTIONS)
+    arg_parser.add_argument("--allow-flagging", action="store_true",
+                            help="let any client flag and allow videos for "
+                                 "every session")
+    arg_parser.add_argument("--seed", type=int,
+                            help="seed random video picks, for reproducible "
+                                 "load tests")
+    args = arg_parser.parse_args(argv)
+    if args.mapped_catalog:
+        video_library = MappedVideoLibrary(args.mapped_catalog)
+    else:
+        video_library = ConcurrentVideoLibrary(
+            VideoLibrary.load_shared(args.catalog, args.load_workers or None))
+    if args.seed is not None:
+        video_library.get_sampler().seed(args.seed)
+    try:
+        asyncio.run(serve(video_library, args.host, args.port,
+                          args.unix, args.max_connections,
+                          args.allow_flagging))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
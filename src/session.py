@@ -0,0 +1,20 @@
+"""A per-user session state class."""
+
+from .playlist_registry import PlaylistRegistry
+
+
+class SessionState:
+    """A class used to represent what belongs to one user of the player:
+    the current and paused video and the playlists.
+
+    The video library is not part of the session, so any number of
+    sessions can share one loaded library and a new session costs only
+    these few objects.
+    """
+
+    __slots__ = ("playing_video", "paused_video", "playlists")
+
+    def __init__(self):
+        self.playing_video = None
+        self.paused_video = None
+        self.playlists = PlaylistRegistry()
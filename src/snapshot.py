@@ -0,0 +1,183 @@
+"""Binary snapshots of the playlists of a session and the library flags.
+
+A snapshot stores video ids, never Video objects, laid out as (all
+integers little-endian, blobs are UTF-8 and newline separated):
+
+    header     magic, distinct video id count, playlist count, flag count
+    ids        length-prefixed blob of the distinct video ids
+    names      length-prefixed blob of the playlist names, in order
+    counts     number of entries of each playlist
+    entries    index into the ids of every playlist entry, playlist by
+               playlist
+    flagged    length-prefixed blob of the flagged video ids
+    reasons    length-prefixed blob of their flag reasons, in the same
+               order
+"""
+
+from .playlist_registry import PlaylistRegistry
+from array import array
+from itertools import chain
+import os
+import struct
+import sys
+
+
+MAGIC = b"YTSNAP\x00\x02"
+
+_HEADER = struct.Struct("<8sIII")
+_BLOB_LENGTH = struct.Struct("<Q")
+
+
+class SnapshotError(Exception):
+    """A class used to represent an unreadable snapshot."""
+    pass
+
+
+def _pack_blob(values, what):
+    for value in values:
+        if "\n" in value:
+            raise ValueError(f"{what} {value!r} cannot contain a newline")
+    blob = "\n".join(values).encode("utf-8")
+    return _BLOB_LENGTH.pack(len(blob)) + blob
+
+
+def _pack_uints(values):
+    packed = array("I", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def save_snapshot(session, path, flags=None):
+    """Writes the playlists of a session and the flags of its library to a
+    snapshot file.
+
+    The file is written next to path and renamed over it, so a crash never
+    leaves a half written snapshot behind.
+
+    Args:
+        session: The SessionState to save.
+        path: Where to write the snapshot.
+        flags: A mapping of flagged video ids to their reasons, as
+            returned by get_flags of the library. None to save no flags.
+    """
+    flags = dict(flags or {})
+    playlists = list(session.playlists)
+    id_index = {video_id: index for index, video_id in enumerate(
+        dict.fromkeys(chain.from_iterable(
+            playlist.get_all_video_ids() for playlist in playlists)))}
+    names = [playlist.get_playlist_name() for playlist in playlists]
+    counts = [len(playlist) for playlist in playlists]
+    entries = array("I")
+    for playlist in playlists:
+        entries.extend(map(id_index.__getitem__, playlist.get_all_video_ids()))
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        snapshot_file.write(_HEADER.pack(MAGIC, len(id_index), len(names),
+                                         len(flags)))
+        snapshot_file.write(_pack_blob(id_index, "video id"))
+        snapshot_file.write(_pack_blob(names, "playlist name"))
+        snapshot_file.write(_pack_uints(counts))
+        snapshot_file.write(_pack_uints(entries))
+        snapshot_file.write(_pack_blob(flags, "video id"))
+        snapshot_file.write(_pack_blob(flags.values(), "flag reason"))
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+
+
+class _Reader:
+    """A class used to walk through the bytes of a snapshot."""
+
+    def __init__(self, data):
+        self._data = data
+        self._offset = 0
+
+    def unpack(self, layout):
+        if self._offset + layout.size > len(self._data):
+            raise SnapshotError("snapshot is truncated")
+        values = layout.unpack_from(self._data, self._offset)
+        self._offset += layout.size
+        return values
+
+    def blob(self, count):
+        length, = self.unpack(_BLOB_LENGTH)
+        end = self._offset + length
+        if end > len(self._data):
+            raise SnapshotError("snapshot is truncated")
+        text = bytes(self._data[self._offset:end]).decode("utf-8")
+        self._offset = end
+        values = text.split("\n") if count else []
+        if len(values) != count:
+            raise SnapshotError("snapshot is corrupted")
+        return values
+
+    def uints(self, count):
+        end = self._offset + 4 * count
+        if end > len(self._data):
+            raise SnapshotError("snapshot is truncated")
+        values = array("I")
+        values.frombytes(self._data[self._offset:end])
+        if sys.byteorder == "big":
+            values.byteswap()
+        self._offset = end
+        return values
+
+
+def load_snapshot(path, video_library):
+    """Reads the playlists of a snapshot file and flags its flagged
+    videos in the library.
+
+    Every distinct video id is checked against the library once, in bulk;
+    entries and flags of videos that no longer exist are dropped.
+
+    Args:
+        path: The snapshot to read.
+        video_library: The library the ids are resolved against.
+
+    Returns:
+        A (PlaylistRegistry, missing video ids) pair.
+
+    Raises:
+        SnapshotError: If the file is not a readable snapshot.
+    """
+    with open(path, "rb") as snapshot_file:
+        reader = _Reader(memoryview(snapshot_file.read()))
+    magic, id_count, playlist_count, flag_count = reader.unpack(_HEADER)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a playlist snapshot")
+    video_ids = reader.blob(id_count)
+    names = reader.blob(playlist_count)
+    counts = reader.uints(playlist_count)
+    entries = reader.uints(sum(counts))
+    if entries and max(entries) >= id_count:
+        raise SnapshotError("snapshot is corrupted")
+    flagged = reader.blob(flag_count)
+    reasons = reader.blob(flag_count)
+
+    # Intersecting with the catalog's key view only walks our ids.
+    known = video_library.iter_video_ids() & set(video_ids)
+    missing = [video_id for video_id in video_ids if video_id not in known]
+    get_video = video_library.get_video
+    videos = [get_video(video_id) if video_id in known else None
+              for video_id in video_ids]
+
+    registry = PlaylistRegistry()
+    start = 0
+    for name, count in zip(names, counts):
+        playlist = registry.create(name)
+        if playlist is None:
+            raise SnapshotError(f"duplicate playlist {name!r} in snapshot")
+        end = start + count
+        indices = entries[start:end]
+        if missing:
+            indices = [index for index in indices if videos[index] is not None]
+        playlist.load_videos(map(video_ids.__getitem__, indices),
+                             map(videos.__getitem__, indices))
+        start = end
+
+    # Videos that left the library, or are already flagged, are skipped.
+    for video_id, reason in zip(flagged, reasons):
+        video_library.flag_video(video_id, reason)
+    return registry, missing
@@ -0,0 +1,153 @@
+"""An inverted tag index class."""
+
+from bisect import bisect_left, insort
+
+
+# Above this length ratio a posting list is binary searched, not scanned.
+_SCAN_RATIO = 32
+
+
+def _contains(posting, video_id):
+    """Binary searches a sorted posting list."""
+    position = bisect_left(posting, video_id)
+    return position < len(posting) and posting[position] == video_id
+
+
+class TagIndex:
+    """A class used to map each tag to the sorted ids of its videos.
+
+    Tags are matched case-insensitively. Copies share their posting lists
+    until either side modifies one.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        # Posting lists that were bulk appended to and still need sorting.
+        self._unsorted = set()
+        # Tags whose posting lists may be shared with a copy and must be
+        # copied before being modified; None if nothing is shared.
+        self._shared = None
+
+    def copy(self):
+        """Returns an independent index sharing the posting lists until
+        they are modified. Pending sorts are done first."""
+        self.settle()
+        index = TagIndex()
+        index._postings = dict(self._postings)
+        index._shared = set(self._postings)
+        self._shared = set(self._postings)
+        return index
+
+    def settle(self):
+        """Sorts bulk added postings now, so reads no longer modify the
+        index and can run from several threads."""
+        for key in list(self._unsorted):
+            self._posting(key)
+
+    def _posting(self, key):
+        """Returns the sorted posting list of a lowercased tag, or None."""
+        if key in self._unsorted:
+            self._unsorted.discard(key)
+            self._postings[key] = sorted(set(self._postings[key]))
+            if self._shared:
+                self._shared.discard(key)
+        return self._postings.get(key)
+
+    def _writable_posting(self, key):
+        """Returns the sorted posting list of a tag, copied first if it is
+        shared with a copy of the index, or None."""
+        posting = self._posting(key)
+        if self._shared and key in self._shared:
+            self._shared.discard(key)
+            if posting is not None:
+                posting = self._postings[key] = list(posting)
+        return posting
+
+    def add_video(self, video):
+        """Adds a video to the posting list of each of its tags."""
+        for tag in video.tags:
+            key = tag.lower()
+            posting = self._writable_posting(key)
+            if posting is None:
+                posting = self._postings[key] = []
+            if not _contains(posting, video.video_id):
+                insort(posting, video.video_id)
+
+    def add_videos(self, videos):
+        """Adds many videos at once.
+
+        The touched posting lists are only sorted when next queried, so
+        loading a catalog chunk by chunk sorts each list once.
+        """
+        for video in videos:
+            for tag in video.tags:
+                key = tag.lower()
+                if self._shared and key in self._shared:
+                    self._writable_posting(key)
+                self._postings.setdefault(key, []).append(video.video_id)
+                self._unsorted.add(key)
+
+    def merge(self, other):
+        """Adds the postings of an index built over other videos, which
+        this index must not hold. other is consumed."""
+        other.settle()
+        for key, posting in other._postings.items():
+            existing = self._writable_posting(key)
+            if existing is None:
+                self._postings[key] = posting
+            else:
+                # Two sorted runs, merged in linear time.
+                existing.extend(posting)
+                existing.sort()
+
+    def remove_video(self, video):
+        """Removes a video from the posting list of each of its tags."""
+        for tag in video.tags:
+            key = tag.lower()
+            posting = self._writable_posting(key)
+            if posting is None:
+                continue
+            position = bisect_left(posting, video.video_id)
+            if position < len(posting) and posting[position] == video.video_id:
+                del posting[position]
+                if not posting:
+                    del self._postings[key]
+
+    def get_tags(self):
+        """Returns all the indexed (lowercased) tags."""
+        return self._postings.keys()
+
+    def lookup(self, tag):
+        """Returns the sorted video ids carrying a tag.
+
+        The returned list is owned by the index and must not be modified.
+        """
+        return self._posting(tag.lower()) or []
+
+    def search(self, tags, match_all=True):
+        """Returns the sorted ids of the videos matching several tags.
+
+        Args:
+            tags: The tags to look for.
+            match_all: True to require every tag (AND), False to accept
+                any of them (OR).
+        """
+        postings = [self.lookup(tag) for tag in tags]
+        if not postings:
+            return []
+        if not match_all:
+            return sorted(set().union(*postings))
+        # Start from the rarest tag so the cost is bounded by it. Long
+        # posting lists are probed by binary search instead of being
+        # scanned in full.
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            if not matches:
+                break
+            if len(posting) <= _SCAN_RATIO * len(matches):
+                matches.intersection_update(posting)
+            else:
+                matches = {video_id for video_id in matches
+                           if _contains(posting, video_id)}
+        return sorted(matches)
@@ -0,0 +1,206 @@
+"""A title substring search index class."""
+
+from array import array
+from bisect import bisect_left
+from heapq import nsmallest
+
+
+GRAM_SIZE = 3
+
+# Above this length ratio a doc id array is binary searched, not scanned.
+_SCAN_RATIO = 32
+
+# Pads the end of a title, so that every character and pair of characters
+# of the title starts one of its trigrams.
+_PADDING = "\0" * (GRAM_SIZE - 1)
+
+
+def title_grams(text):
+    """Returns the set of trigrams of a lowercased piece of text."""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _contains(docids, docid):
+    """Binary searches an ascending doc id array."""
+    position = bisect_left(docids, docid)
+    return position < len(docids) and docids[position] == docid
+
+
+class TitleIndex:
+    """A class used to find videos whose title contains a search term.
+
+    Each indexed title gets a compact integer doc id, and its lowercased
+    text is stored once. Every trigram of a lowercased, padded title maps
+    to an ascending array of doc ids. A query intersects the arrays of its
+    own trigrams, starting with the rarest, and only checks the surviving
+    titles. Terms shorter than a trigram take the union of the arrays of
+    the trigrams starting with them, which the padding makes exact.
+
+    Removing a title only marks its doc id dead, leaving it in the arrays.
+    Adding the same title back under the same video id revives it, so
+    flagging and allowing a video are O(1).
+    """
+
+    def __init__(self):
+        self._grams = {}
+        # Per doc id: the video id, the title, its lowercased text, and 1
+        # if the title is indexed, 0 once it is removed.
+        self._ids = []
+        self._titles = []
+        self._lowered = []
+        self._live = bytearray()
+        self._docids = {}
+        # Trigrams whose arrays may be shared with a copy and must be
+        # copied before being modified; None if nothing is shared.
+        self._shared = None
+        # True if the per doc id tables are shared with a copy.
+        self._shared_tables = False
+
+    def copy(self):
+        """Returns an independent index sharing the trigram arrays and doc
+        id tables until they are modified."""
+        index = TitleIndex()
+        index._grams = dict(self._grams)
+        index._ids = self._ids
+        index._titles = self._titles
+        index._lowered = self._lowered
+        index._live = bytearray(self._live)
+        index._docids = self._docids
+        index._shared = set(self._grams)
+        self._shared = set(self._grams)
+        index._shared_tables = self._shared_tables = True
+        return index
+
+    def _writable_tables(self):
+        """Copies the doc id tables first if they are shared with a copy of
+        the index."""
+        if self._shared_tables:
+            self._shared_tables = False
+            self._ids = list(self._ids)
+            self._titles = list(self._titles)
+            self._lowered = list(self._lowered)
+            self._docids = dict(self._docids)
+
+    def _writable_docids(self, gram):
+        """Returns the doc id array of a trigram, copied first if it is
+        shared with a copy of the index, or None."""
+        docids = self._grams.get(gram)
+        if self._shared and gram in self._shared:
+            self._shared.discard(gram)
+            if docids is not None:
+                docids = self._grams[gram] = array("I", docids)
+        return docids
+
+    def add_video(self, video):
+        """Indexes the title of a video."""
+        self.add_videos([video])
+
+    def add_videos(self, videos):
+        """Indexes the titles of many videos."""
+        grams = self._grams
+        shared = self._shared
+        self._writable_tables()
+        ids = self._ids
+        titles = self._titles
+        lowered = self._lowered
+        live = self._live
+        docids = self._docids
+        for video in videos:
+            docid = docids.get(video.video_id)
+            if docid is not None:
+                if titles[docid] == video.title:
+                    live[docid] = 1
+                    continue
+                # The video got a new title: its old doc id stays dead.
+                live[docid] = 0
+                ids[docid] = titles[docid] = lowered[docid] = None
+            docid = docids[video.video_id] = len(ids)
+            text = video.title.lower()
+            ids.append(video.video_id)
+            titles.append(video.title)
+            lowered.append(text)
+            live.append(1)
+            for gram in title_grams(text + _PADDING):
+                if shared and gram in shared:
+                    self._writable_docids(gram)
+                posting = grams.get(gram)
+                if posting is None:
+                    posting = grams[gram] = array("I")
+                posting.append(docid)
+
+    def merge(self, other):
+        """Adds the titles of an index built over other videos, which this
+        index must not hold. other is consumed."""
+        offset = len(self._ids)
+        self._writable_tables()
+        self._ids.extend(other._ids)
+        self._titles.extend(other._titles)
+        self._lowered.extend(other._lowered)
+        self._live.extend(other._live)
+        for video_id, docid in other._docids.items():
+            self._docids[video_id] = docid + offset
+        grams = self._grams
+        for gram, docids in other._grams.items():
+            if offset:
+                docids = array("I", map(offset.__add__, docids))
+            existing = self._writable_docids(gram)
+            if existing is None:
+                grams[gram] = docids
+            else:
+                # Every doc id of other is past those of this index.
+                existing.extend(docids)
+
+    def remove_video(self, video):
+        """Removes the title of a video from the index."""
+        docid = self._docids.get(video.video_id)
+        if docid is not None:
+            self._live[docid] = 0
+
+    def _candidates(self, term):
+        """Returns doc ids whose titles may contain a lowercased term."""
+        grams = self._grams
+        if len(term) < GRAM_SIZE:
+            if not term:
+                return range(len(self._ids))
+            postings = [docids for gram, docids in grams.items()
+                        if gram.startswith(term)]
+            return set().union(*postings)
+        postings = sorted((grams.get(gram, ()) for gram in title_grams(term)),
+                          key=len)
+        matches = set(postings[0])
+        for docids in postings[1:]:
+            if not matches:
+                break
+            if len(docids) <= _SCAN_RATIO * len(matches):
+                matches.intersection_update(docids)
+            else:
+                matches = {docid for docid in matches
+                           if _contains(docids, docid)}
+        return matches
+
+    def search(self, term, limit=None):
+        """Returns the ids of the videos whose title contains term.
+
+        Args:
+            term: The substring to look for, matched case-insensitively.
+            limit: The maximum number of results, None for all of them.
+
+        Returns:
+            Matching video ids ordered by title.
+        """
+        term = term.lower()
+        ids = self._ids
+        titles = self._titles
+        lowered = self._lowered
+        live = self._live
+        matches = [docid for docid in self._candidates(term)
+                   if live[docid] and term in lowered[docid]]
+
+        def by_title(docid):
+            return titles[docid], ids[docid]
+
+        if limit is not None:
+            matches = nsmallest(limit, matches, key=by_title)
+        else:
+            matches.sort(key=by_title)
+        return [ids[docid] for docid in matches]
@@ -0,0 +1,71 @@
+"""A title-sorted video index class."""
+
+from bisect import bisect_left, insort
+
+
+class TitleOrder:
+    """A class used to keep video ids ordered by title.
+
+    Entries are (title, video_id) pairs, so videos sharing a title are
+    ordered by id. Single adds and removals use binary search; bulk adds
+    are appended and sorted once, on the next read.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._unsorted = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def copy(self):
+        """Returns an independent, sorted copy of the order."""
+        order = TitleOrder()
+        order._entries = list(self._sorted_entries())
+        return order
+
+    def settle(self):
+        """Sorts bulk additions now, so reads no longer modify the order
+        and can run from several threads."""
+        self._sorted_entries()
+
+    def _sorted_entries(self):
+        if self._unsorted:
+            self._entries.sort()
+            self._unsorted = False
+        return self._entries
+
+    def add_video(self, video):
+        """Inserts a video at its title position."""
+        insort(self._sorted_entries(), (video.title, video.video_id))
+
+    def add_videos(self, videos):
+        """Adds many videos, deferring the sort to the next read."""
+        self._entries.extend((video.title, video.video_id)
+                             for video in videos)
+        self._unsorted = True
+
+    def merge(self, other):
+        """Adds the entries of another order, deferring the sort to the
+        next read. Sorted orders merge in linear time per order."""
+        self._entries.extend(other._sorted_entries())
+        self._unsorted = True
+
+    def remove_video(self, video):
+        """Removes a video, if present."""
+        entries = self._sorted_entries()
+        entry = (video.title, video.video_id)
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    def page(self, offset=0, limit=None):
+        """Returns the ids of a page of videos ordered by title.
+
+        Args:
+            offset: How many videos to skip.
+            limit: The page size, None for everything after offset.
+        """
+        entries = self._sorted_entries()
+        stop = len(entries) if limit is None else offset + limit
+        return [video_id for _, video_id in entries[offset:stop]]
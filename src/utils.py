@@ -18,4 +18,35 @@ class Utils:
     @staticmethod
     def format_tags(video):
         """Takes video objects, formats its tags."""
-        return str(list(video.tags)).replace("'", "").replace(",", "")
+        return video.formatted_tags
+
+    @staticmethod
+    def format_video(video):
+        """Takes video objects, formats its 'title (id) [tags]' line."""
+        return video.listing
+
+    @staticmethod
+    def format_flag(reason):
+        """Takes a flag reason, formats the suffix of a flagged video."""
+        return f" - FLAGGED (reason: {reason})"
+
+    @staticmethod
+    def format_listing(videos, prefix=" ", flags=None):
+        """Takes video objects, formats one prefixed line per video.
+
+        Args:
+            videos: The videos to list.
+            prefix: Put in front of every line.
+            flags: A mapping of flagged video ids to reasons; their lines
+                get a FLAGGED suffix.
+        """
+        if not flags:
+            return "\n".join([prefix + video.listing for video in videos])
+        lines = []
+        for video in videos:
+            reason = flags.get(video.video_id)
+            if reason is None:
+                lines.append(prefix + video.listing)
+            else:
+                lines.append(prefix + video.listing + Utils.format_flag(reason))
+        return "\n".join(lines)
@@ -1,11 +1,28 @@
 """A video class."""
 
 from typing import Sequence
+import sys
+
+
+# Shared tag vocabulary: every distinct combination of tags is stored once
+# and reused by all the videos carrying it, e.g. ('#cat', '#animal').
+_TAG_VOCABULARY = {}
+
+# The '[#cat #animal]' rendering of each tag combination, filled lazily.
+_RENDERED_TAGS = {}
+
+
+def _intern_tags(video_tags):
+    """Returns the shared, interned tuple for the given tags."""
+    tags = tuple(sys.intern(tag) for tag in video_tags)
+    return _TAG_VOCABULARY.setdefault(tags, tags)
 
 
 class Video:
     """A class used to represent a Video."""
 
+    __slots__ = ("_title", "_video_id", "_tags", "_listing")
+
     def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str]):
         """Video constructor."""
         self._title = video_title
@@ -13,7 +30,13 @@ class Video:
 
         # Turn the tags into a tuple here so it's unmodifiable,
         # in case the caller changes the 'video_tags' they passed to us
-        self._tags = tuple(video_tags)
+        self._tags = _intern_tags(video_tags)
+        self._listing = None
+
+    def __reduce__(self):
+        """Pickles a video as its constructor arguments, so its tags are
+        interned again in the process that unpickles it."""
+        return Video, (self._title, self._video_id, self._tags)
 
     @property
     def title(self) -> str:
@@ -29,3 +52,19 @@ class Video:
     def tags(self) -> Sequence[str]:
         """Returns the list of tags of a video."""
         return self._tags
+
+    @property
+    def formatted_tags(self) -> str:
+        """Returns the tags rendered as '[#tag #tag]'."""
+        rendered = _RENDERED_TAGS.get(self._tags)
+        if rendered is None:
+            rendered = _RENDERED_TAGS[self._tags] = f"[{' '.join(self._tags)}]"
+        return rendered
+
+    @property
+    def listing(self) -> str:
+        """Returns the 'title (video_id) [tags]' line of a video."""
+        if self._listing is None:
+            self._listing = \
+                f"{self._title} ({self._video_id}) {self.formatted_tags}"
+        return self._listing
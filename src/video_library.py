@@ -1,39 +1,325 @@
 """A video library class."""
 
-from .video import Video
+from .fuzzy_index import DEFAULT_LIMIT as DEFAULT_FUZZY_LIMIT, FuzzyIndex
+from .parallel_loader import ParallelVideoLoader
+from .tag_index import TagIndex
+from .title_index import TitleIndex
+from .title_order import TitleOrder
+from .video_loader import DEFAULT_CHUNK_SIZE, VideoLoader
+from .video_sampler import VideoSampler
 from pathlib import Path
-import csv
+from types import MappingProxyType
+import threading
 
 
-# Helper Wrapper around CSV reader to strip whitespace from around
-# each item.
-def _csv_reader_with_strip(reader):
-    yield from ((item.strip() for item in line) for line in reader)
+DEFAULT_CATALOG = Path(__file__).parent / "videos.txt"
 
 
 class VideoLibrary:
     """A class used to represent a Video Library."""
 
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def load_shared(cls, path=DEFAULT_CATALOG, workers=1):
+        """Returns the library of a catalog, loading it only once per
+        process.
+
+        The returned library is meant to be shared by every session and
+        must not be modified through add_video or remove_video. Flags
+        set on it apply to every session.
+
+        Args:
+            path: The catalog file to load.
+            workers: The number of processes to load it with, see
+                __init__.
+        """
+        key = str(path)
+        with cls._shared_lock:
+            library = cls._shared.get(key)
+            if library is None:
+                library = cls._shared[key] = cls(path, workers=workers)
+        return library
+
+    def __init__(self, path=DEFAULT_CATALOG, chunk_size=DEFAULT_CHUNK_SIZE,
+                 workers=1):
+        """The VideoLibrary class is initialized.
+
+        Args:
+            path: The catalog file to load, videos.txt by default.
+            chunk_size: How many rows are parsed before being indexed.
+            workers: The number of processes parsing and indexing shards of
+                the catalog, None for one per CPU. 1 loads it in this
+                process, chunk by chunk. Either way gives the same library.
+        """
         self._videos = {}
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                )
+        self._tag_index = TagIndex()
+        self._title_index = TitleIndex()
+        self._fuzzy_index = FuzzyIndex()
+        self._title_order = TitleOrder()
+        # Flag reasons by video id. Flagged videos are left out of the tag
+        # and title indexes and excluded from the sampler, so searches and
+        # random picks never have to filter them out.
+        self._flags = {}
+        self._sampler = VideoSampler()
+        if workers == 1:
+            loader = VideoLoader(path, chunk_size)
+            for chunk in loader.iter_chunks():
+                self._add_videos(chunk)
+        else:
+            loader = ParallelVideoLoader(path, workers)
+            for shard in loader.iter_shards():
+                self._merge_shard(*shard)
+        self._load_stats = loader.stats
+
+    def copy(self):
+        """Returns an independent library holding the same videos, flags
+        and sampler state.
+
+        Video objects are shared, and so are the tag and title index
+        entries, until either library modifies them.
+        """
+        library = VideoLibrary.__new__(VideoLibrary)
+        library._videos = dict(self._videos)
+        library._tag_index = self._tag_index.copy()
+        library._title_index = self._title_index.copy()
+        library._fuzzy_index = self._fuzzy_index.copy()
+        library._title_order = self._title_order.copy()
+        library._flags = dict(self._flags)
+        library._sampler = self._sampler.copy()
+        library._load_stats = self._load_stats
+        return library
+
+    def snapshot(self):
+        """Returns the library to read from. A VideoLibrary is its own
+        snapshot; see ConcurrentVideoLibrary.snapshot()."""
+        return self
+
+    def settle(self):
+        """Finishes deferred index work, after which reading the library
+        no longer modifies it, so readers in several threads are safe as
+        long as nothing writes to it."""
+        self._tag_index.settle()
+        self._fuzzy_index.settle()
+        self._title_order.settle()
+
+    def _index_video(self, video):
+        """Adds a video to the search indexes, unless it is flagged."""
+        if video.video_id not in self._flags:
+            self._tag_index.add_video(video)
+            self._title_index.add_video(video)
+            self._fuzzy_index.add_video(video)
+
+    def _unindex_video(self, video):
+        """Removes a video from every index."""
+        self._tag_index.remove_video(video)
+        self._title_index.remove_video(video)
+        self._fuzzy_index.remove_video(video)
+        self._title_order.remove_video(video)
+
+    def _take_videos(self, videos):
+        """Stores freshly loaded videos, unindexing those they replace, and
+        returns them once per id, later videos winning."""
+        chunk = {}
+        for video in videos:
+            replaced = self._videos.get(video.video_id)
+            if replaced is not None:
+                if chunk.pop(video.video_id, None) is None:
+                    self._unindex_video(replaced)
+            else:
+                self._sampler.add(video.video_id)
+            self._videos[video.video_id] = video
+            chunk[video.video_id] = video
+        return videos if len(chunk) == len(videos) else list(chunk.values())
+
+    def _add_videos(self, videos):
+        """Indexes a chunk of freshly loaded videos."""
+        videos = self._take_videos(videos)
+        self._tag_index.add_videos(videos)
+        self._title_index.add_videos(videos)
+        self._fuzzy_index.add_videos(videos)
+        self._title_order.add_videos(videos)
+
+    def _merge_shard(self, videos, tag_index, title_index, fuzzy_index,
+                     title_order, stats):
+        """Merges a shard loaded and indexed by a ParallelVideoLoader."""
+        self._take_videos(videos)
+        self._tag_index.merge(tag_index)
+        self._title_index.merge(title_index)
+        self._fuzzy_index.merge(fuzzy_index)
+        self._title_order.merge(title_order)
+
+    def add_video(self, video):
+        """Adds a video to the library, replacing any video with the same
+        id, and updates the indexes. A replaced video keeps its flag."""
+        replaced = self._videos.get(video.video_id)
+        if replaced is not None:
+            self._unindex_video(replaced)
+        else:
+            self._sampler.add(video.video_id)
+        self._videos[video.video_id] = video
+        self._index_video(video)
+        self._title_order.add_video(video)
+
+    def remove_video(self, video_id):
+        """Removes a video, and its flag, from the library and its indexes.
+
+        Returns:
+            The removed Video object. None if the video does not exist.
+        """
+        video = self._videos.pop(video_id, None)
+        if video is not None:
+            self._unindex_video(video)
+            self._flags.pop(video_id, None)
+            self._sampler.discard(video_id)
+        return video
+
+    def flag_video(self, video_id, reason):
+        """Flags a video, hiding it from searches and random picks.
+
+        Args:
+            video_id: The video to flag.
+            reason: Why the video is flagged.
+
+        Returns:
+            True if the video was flagged. False if it does not exist or is
+            already flagged.
+        """
+        video = self._videos.get(video_id)
+        if video is None or video_id in self._flags:
+            return False
+        self._flags[video_id] = reason
+        self._sampler.exclude(video_id)
+        self._tag_index.remove_video(video)
+        self._title_index.remove_video(video)
+        self._fuzzy_index.remove_video(video)
+        return True
+
+    def allow_video(self, video_id):
+        """Removes the flag of a video.
+
+        Returns:
+            The reason the video was flagged for. None if it was not
+            flagged.
+        """
+        reason = self._flags.pop(video_id, None)
+        if reason is not None:
+            self._sampler.include(video_id)
+            self._index_video(self._videos[video_id])
+        return reason
+
+    def get_flag_reason(self, video_id):
+        """Returns why a video is flagged, None if it is not flagged."""
+        return self._flags.get(video_id)
+
+    def get_flags(self):
+        """Returns a read-only mapping of flagged video ids to reasons."""
+        return MappingProxyType(self._flags)
+
+    def number_of_available_videos(self):
+        """Returns how many videos are not flagged."""
+        return len(self._sampler)
+
+    def get_sampler(self):
+        """Returns the VideoSampler random picks are drawn from, e.g. to
+        seed it or to weight videos."""
+        return self._sampler
+
+    def get_random_video(self, skip=()):
+        """Returns a random video that is not flagged, without copying the
+        catalog.
+
+        Args:
+            skip: Ids of videos not to pick this time.
+
+        Returns:
+            A Video object. None if no video can be picked.
+        """
+        video_id = self._sampler.sample(skip)
+        return None if video_id is None else self._videos[video_id]
+
+    def get_load_stats(self):
+        """Returns the LoadStats (rows/sec, peak RSS, skipped rows) of the
+        catalog load."""
+        return self._load_stats
+
+    def __contains__(self, video_id):
+        return video_id in self._videos
+
+    def contains(self, video_id):
+        """Returns True if the library holds a video with this id."""
+        return video_id in self._videos
+
+    def number_of_videos(self):
+        """Returns how many videos the library holds."""
+        return len(self._videos)
+
+    def iter_videos(self):
+        """Returns a read-only view of all the videos, without copying."""
+        return self._videos.values()
+
+    def iter_video_ids(self):
+        """Returns a read-only view of all the video ids, without copying."""
+        return self._videos.keys()
 
     def get_all_videos(self):
-        """Returns all available video information from the video library."""
+        """Returns all available video information from the video library.
+
+        This copies the catalog into a new list; prefer iter_videos().
+        """
         return list(self._videos.values())
 
     def get_all_video_urls(self):
-        return [video.video_id for video in self.get_all_videos()]
+        return list(self._videos)
+
+    def get_videos_by_title(self, offset=0, limit=None):
+        """Returns a page of videos ordered by title.
+
+        Args:
+            offset: How many videos to skip.
+            limit: The page size, None for everything after offset.
+        """
+        videos = self._videos
+        return [videos[video_id]
+                for video_id in self._title_order.page(offset, limit)]
+
+    def search_tags(self, tags, match_all=True):
+        """Returns the sorted ids of the unflagged videos carrying the given
+        tags.
+
+        Args:
+            tags: The tags to look for, matched case-insensitively.
+            match_all: True to require every tag, False to accept any.
+        """
+        return self._tag_index.search(tags, match_all)
+
+    def search_titles(self, search_term, limit=None):
+        """Returns the ids of the unflagged videos whose title contains
+        search_term.
+
+        Args:
+            search_term: The substring to look for, case-insensitively.
+            limit: The maximum number of results, None for all of them.
+
+        Returns:
+            The matching video ids, ordered by title.
+        """
+        return self._title_index.search(search_term, limit)
+
+    def search_titles_fuzzy(self, search_term, limit=DEFAULT_FUZZY_LIMIT):
+        """Returns the ids of the unflagged videos whose title words best
+        match the words of search_term, tolerating typos.
+
+        Args:
+            search_term: The words to look for, case-insensitively.
+            limit: The maximum number of results, None for all of them.
+
+        Returns:
+            The matching video ids, best match first. See
+            FuzzyIndex.search() for the ranking.
+        """
+        return self._fuzzy_index.search(search_term, limit)
 
     def get_video(self, video_id):
         """Returns the video object (title, url, tags) from the video library.
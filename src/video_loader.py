@@ -0,0 +1,162 @@
+"""A streaming video catalog loader."""
+
+from .video import Video
+import csv
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Only the first malformed rows are kept verbatim, so a badly broken file
+# cannot make the report itself grow without bound.
+MAX_REPORTED_ROWS = 1000
+
+
+def _csv_reader_with_strip(reader):
+    """Wrapper around CSV reader to strip whitespace from around each item."""
+    yield from ([item.strip() for item in line] for line in reader)
+
+
+def _peak_rss_bytes():
+    """Returns the peak resident set size of the process, None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoadStats:
+    """A class used to represent the counters of a catalog load."""
+
+    def __init__(self):
+        self.rows_loaded = 0
+        self.rows_skipped = 0
+        self.malformed_rows = []
+        self.lines_read = 0
+        self.elapsed_seconds = 0.0
+        self.peak_rss_bytes = None
+
+    @property
+    def rows_per_second(self):
+        """Returns the load throughput, 0 if nothing was timed."""
+        if not self.elapsed_seconds:
+            return 0.0
+        return (self.rows_loaded + self.rows_skipped) / self.elapsed_seconds
+
+    def report_malformed(self, line_number, reason):
+        """Records a skipped row.
+
+        Args:
+            line_number: The 1-based line number of the row in the source.
+            reason: Why the row was skipped.
+        """
+        self.rows_skipped += 1
+        if len(self.malformed_rows) < MAX_REPORTED_ROWS:
+            self.malformed_rows.append((line_number, reason))
+
+    def merge(self, other):
+        """Adds the counters of a load of the lines that follow the ones
+        this load read, e.g. of the next shard of a catalog."""
+        self.rows_loaded += other.rows_loaded
+        self.rows_skipped += other.rows_skipped
+        room = MAX_REPORTED_ROWS - len(self.malformed_rows)
+        self.malformed_rows.extend(
+            (self.lines_read + line_number, reason)
+            for line_number, reason in other.malformed_rows[:room])
+        self.lines_read += other.lines_read
+
+
+def parse_video_row(video_info):
+    """Turns one stripped catalog row into a Video.
+
+    Args:
+        video_info: The stripped fields of a row.
+
+    Returns:
+        The Video object for the row.
+
+    Raises:
+        ValueError: If the row does not describe a video.
+    """
+    if len(video_info) != 3:
+        raise ValueError(f"expected 3 fields, got {len(video_info)}")
+    title, url, tags = video_info
+    if not url:
+        raise ValueError("missing video_id")
+    return Video(
+        title,
+        url,
+        [tag.strip() for tag in tags.split(",")] if tags else [],
+    )
+
+
+def iter_videos(video_file, stats):
+    """Yields the Video of each row of an open catalog file.
+
+    Malformed rows are skipped and recorded in stats rather than aborting
+    the load.
+
+    Args:
+        video_file: A catalog file opened in text mode with newline="".
+        stats: The LoadStats to count rows and lines in.
+    """
+    raw_reader = csv.reader(video_file, delimiter="|")
+    try:
+        for video_info in _csv_reader_with_strip(raw_reader):
+            if not any(video_info):  # Blank line
+                continue
+            try:
+                video = parse_video_row(video_info)
+            except ValueError as e:
+                stats.report_malformed(raw_reader.line_num, str(e))
+                continue
+            stats.rows_loaded += 1
+            yield video
+    finally:
+        stats.lines_read = raw_reader.line_num
+
+
+class VideoLoader:
+    """A class used to stream videos out of a catalog file in chunks."""
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """The VideoLoader class is initialized.
+
+        Args:
+            path: The path of a '|' separated catalog file.
+            chunk_size: The maximum number of videos held per chunk.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self._path = path
+        self._chunk_size = chunk_size
+        self.stats = LoadStats()
+
+    def iter_chunks(self):
+        """Yields lists of at most chunk_size Video objects.
+
+        Malformed rows are skipped and recorded in the loader stats rather
+        than aborting the load.
+        """
+        stats = self.stats
+        start = time.perf_counter()
+        try:
+            with open(self._path, newline="") as video_file:
+                chunk = []
+                for video in iter_videos(video_file, stats):
+                    chunk.append(video)
+                    if len(chunk) == self._chunk_size:
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    yield chunk
+        finally:
+            stats.elapsed_seconds = time.perf_counter() - start
+            stats.peak_rss_bytes = _peak_rss_bytes()
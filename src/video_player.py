@@ -1,117 +1,162 @@
 """A video player class."""
 
-from .video_library import VideoLibrary
+from .output import PrintSink
+from . import playlist_log
+from .video_library import DEFAULT_FUZZY_LIMIT, VideoLibrary
 from .utils import Utils
-from .video_playlist import Playlist
+from .session import SessionState
 
 
 class VideoPlayer:
     """A class used to represent a Video Player."""
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
-        self._currently_playing_video = None
-        self._currently_paused_video = None
-        self._playlists = []
-        self._playlists_names = []
-        self._playlists_names_cleaned = []
+    def __init__(self, output=None, read_answer=None, video_library=None,
+                 session=None, journal=None, fuzzy_limit=DEFAULT_FUZZY_LIMIT,
+                 defer_answers=False):
+        """The VideoPlayer class is initialized.
+
+        Args:
+            output: The sink lines are written to, printed immediately by
+                default.
+            read_answer: Called without arguments to read the answer to a
+                question such as which search result to play. Reads from
+                input() by default.
+            video_library: The library to play from, which may be shared
+                with other players, e.g. VideoLibrary.load_shared(). A new
+                VideoLibrary by default.
+            session: The SessionState of the user. A new, empty session by
+                default.
+            journal: A PlaylistLog successful playlist mutations are
+                appended to, None to not log them.
+            fuzzy_limit: The maximum number of results of a fuzzy search.
+            defer_answers: True to return from a search as soon as its
+                question is asked, leaving the caller to read the answer,
+                e.g. without blocking, and to pass it to answer_question().
+        """
+        self._output = output if output is not None else PrintSink()
+        self._read_answer = read_answer
+        self._video_library = (video_library if video_library is not None
+                               else VideoLibrary())
+        self._session = session if session is not None else SessionState()
+        self._journal = journal
+        self._fuzzy_limit = fuzzy_limit
+        self._defer_answers = defer_answers
+        # The search results waiting for a deferred answer, or None.
+        self._pending_choices = None
+
+    def get_video_library(self):
+        """Returns the library the player plays from."""
+        return self._video_library
+
+    def get_session(self):
+        """Returns the SessionState of the player."""
+        return self._session
+
+    def get_output(self):
+        """Returns the sink the player writes its lines to."""
+        return self._output
+
+    def _log(self, op, *args):
+        """Appends a playlist mutation or flag change to the journal, if
+        there is one."""
+        if self._journal is not None:
+            self._journal.append(op, *args)
 
     def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos()
-                         )
-        print(f"{num_videos} videos in the library")
+        num_videos = self._video_library.number_of_videos()
+        self._output.write(f"{num_videos} videos in the library")
 
     def show_all_videos(self):
         """Returns all videos."""
-        videos = sorted(self._video_library.get_all_videos(),
-                        key=lambda video: video.title)
-        print("Here's a list of all available videos:")
-        for video in videos:
-            formatted_tags = Utils.format_tags(video)
-            print(f" {video.title} ({video.video_id}) {formatted_tags}")
+        self._output.write("Here's a list of all available videos:")
+        library = self._video_library.snapshot()
+        videos = library.get_videos_by_title()
+        if videos:
+            self._output.write(Utils.format_listing(
+                videos, flags=library.get_flags()))
 
     def play_video(self, video_id):
-        video = self._video_library.get_video(video_id)
+        library = self._video_library.snapshot()
+        video = library.get_video(video_id)
         if not video:
-            print("Cannot play video: Video does not exist")
-        elif self._currently_playing_video is not None:
-            print(f"Stopping video: {self._currently_playing_video.title}")
-            self._currently_playing_video = video
-            print(f"Playing video: {video.title}")
+            self._output.write("Cannot play video: Video does not exist")
+            return
+        reason = library.get_flag_reason(video_id)
+        if reason is not None:
+            self._output.write(
+                f"Cannot play video: Video is currently flagged (reason: {reason})")
+        elif self._session.playing_video is not None:
+            self._output.write(f"Stopping video: {self._session.playing_video.title}")
+            self._session.playing_video = video
+            self._session.paused_video = None
+            self._output.write(f"Playing video: {video.title}")
         else:
-            self._currently_playing_video = video
-            print(f"Playing video: {video.title}")
+            self._session.playing_video = video
+            self._output.write(f"Playing video: {video.title}")
 
     def stop_video(self):
         """Stops the current video."""
-        if self._currently_playing_video:  # Stop if it is already playing
-            print(f"Stopping video: {self._currently_playing_video.title}")
-            self._currently_playing_video = None
-            self._currently_paused_video = None
+        if self._session.playing_video:  # Stop if it is already playing
+            self._output.write(f"Stopping video: {self._session.playing_video.title}")
+            self._session.playing_video = None
+            self._session.paused_video = None
         else:
-            print("Cannot stop video: No video is currently playing")
+            self._output.write("Cannot stop video: No video is currently playing")
 
     def play_random_video(self):
-        videos = self._video_library.get_all_videos()
-        random_video = Utils.get_random_video(videos)
+        random_video = self._video_library.get_random_video()
         if random_video is None:
-            print("No videos available")
-        elif self._currently_playing_video:
-            print(f"Stopping video: {self._currently_playing_video.title}")
-            print(f"Playing video: {random_video.title}")
-        else:
-            print(f"Playing video: {random_video.title}")
+            self._output.write("No videos available")
+            return
+        if self._session.playing_video:
+            self._output.write(f"Stopping video: {self._session.playing_video.title}")
+        self._session.playing_video = random_video
+        self._session.paused_video = None
+        self._output.write(f"Playing video: {random_video.title}")
 
     def pause_video(self):
         """Pauses the current video."""
-        if not self._currently_playing_video:
-            print("Cannot pause video: No video is currently playing")
-        elif self._currently_paused_video is not None:  # Video is paused
-            print(
-                f"Video already paused: {self._currently_playing_video.title}")
+        if not self._session.playing_video:
+            self._output.write("Cannot pause video: No video is currently playing")
+        elif self._session.paused_video is not None:  # Video is paused
+            self._output.write(
+                f"Video already paused: {self._session.playing_video.title}")
         else:
-            self._currently_paused_video = self._currently_playing_video
-            print(f"Pausing video: {self._currently_playing_video.title}")
+            self._session.paused_video = self._session.playing_video
+            self._output.write(f"Pausing video: {self._session.playing_video.title}")
 
     def continue_video(self):
         """Resumes playing the current video."""
-        if not self._currently_playing_video:
-            print("Cannot continue video: No video is currently playing")
-        elif self._currently_paused_video is None:
-            print("Cannot continue video: Video is not paused")
+        if not self._session.playing_video:
+            self._output.write("Cannot continue video: No video is currently playing")
+        elif self._session.paused_video is None:
+            self._output.write("Cannot continue video: Video is not paused")
         else:
-            print(f"Continuing video: {self._currently_paused_video.title}")
-            self._currently_paused_video = None
+            self._output.write(f"Continuing video: {self._session.paused_video.title}")
+            self._session.paused_video = None
 
     def show_playing(self):
-        if not self._currently_playing_video:
-            print("No video is currently playing")
-        elif self._currently_paused_video is self._currently_playing_video:
-            formatted_tags = Utils.format_tags(
-                self._currently_paused_video)  # Get the tags
-            print(
-                f"Currently playing: {self._currently_paused_video.title} ({self._currently_paused_video.video_id}) {formatted_tags} - PAUSED")
+        if not self._session.playing_video:
+            self._output.write("No video is currently playing")
+        elif self._session.paused_video is self._session.playing_video:
+            self._output.write(
+                f"Currently playing: {Utils.format_video(self._session.paused_video)} - PAUSED")
         else:
-            formatted_tags = Utils.format_tags(
-                self._currently_playing_video)
-            print(
-                f"Currently playing: {self._currently_playing_video.title} ({self._currently_playing_video.video_id}) {formatted_tags}")
+            self._output.write(
+                f"Currently playing: {Utils.format_video(self._session.playing_video)}")
 
     def create_playlist(self, playlist_name):
         """Creates a playlist with a given name.
         Args:
             playlist_name: The playlist name.
         """
-        playlist = Playlist(playlist_name)
-        if playlist.get_playlist_name().lower() in self._playlists_names_cleaned:
-            print("Cannot create playlist: A playlist with the same name already exists")
+        playlist = self._session.playlists.create(playlist_name)
+        if playlist is None:
+            self._output.write("Cannot create playlist: A playlist with the same name already exists")
         else:
-            print(
+            self._log(playlist_log.CREATE, playlist_name)
+            self._output.write(
                 f"Successfully created new playlist: {playlist.get_playlist_name()}")
-            self._playlists_names_cleaned.append(
-                playlist.get_playlist_name().lower())
-            self._playlists_names.append(playlist.get_playlist_name())
-            self._playlists.append(playlist)
 
     def add_to_playlist(self, playlist_name, video_id):
         """Adds a video to a playlist with a given name.
@@ -119,48 +164,47 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be added.
         """
-        if playlist_name.lower() not in self._playlists_names_cleaned:
-            print(
+        playlist = self._session.playlists.get(playlist_name)
+        library = self._video_library.snapshot()
+        video = library.get_video(video_id)
+        if playlist is None:
+            self._output.write(
                 f"Cannot add video to {playlist_name}: Playlist does not exist")
-        elif video_id not in self._video_library.get_all_video_urls():
-            print(f"Cannot add video to {playlist_name}: Video does not exist")
+        elif video is None:
+            self._output.write(f"Cannot add video to {playlist_name}: Video does not exist")
+        elif library.get_flag_reason(video_id) is not None:
+            self._output.write(
+                f"Cannot add video to {playlist_name}: Video is currently "
+                f"flagged (reason: {library.get_flag_reason(video_id)})")
+        elif playlist.add_video(video):
+            self._log(playlist_log.ADD, playlist_name, video_id)
+            self._output.write(f"Added video to {playlist_name}: {video.title}")
         else:
-            # Find desired playlist by name
-            playlist = self._playlists[self._playlists_names_cleaned.index(
-                playlist_name.lower())]
-            # Find video by id
-            video = self._video_library.get_video(video_id)
-            if video not in playlist.get_all_videos():
-                playlist.add_video(video)
-                print(f"Added video to {playlist_name}: {video.title}")
-            else:
-                print(
-                    f"Cannot add video to {playlist_name}: Video already added")
+            self._output.write(
+                f"Cannot add video to {playlist_name}: Video already added")
 
     def show_all_playlists(self):
         """Display all playlists sorted lexicographically."""
-        if len(self._playlists_names) == 0:
-            print("No playlists exist yet")
+        if len(self._session.playlists) == 0:
+            self._output.write("No playlists exist yet")
         else:
-            print("Showing all playlists:")
-            for playlist_name in sorted(self._playlists_names):
-                print(f" {playlist_name}")
+            self._output.write("Showing all playlists:")
+            for playlist_name in self._session.playlists.get_playlist_names():
+                self._output.write(f" {playlist_name}")
 
     def show_playlist(self, playlist_name):
         """Display all videos in a playlist with a given name."""
-        if playlist_name.lower() not in self._playlists_names_cleaned:
-            print(
+        playlist = self._session.playlists.get(playlist_name)
+        if playlist is None:
+            self._output.write(
                 f"Cannot show playlist {playlist_name}: Playlist does not exist")
-        elif len(self._playlists_names_cleaned) == 0:
-            print("No videos here yet")
+            return
+        self._output.write(f"Showing playlist: {playlist_name}")
+        if len(playlist) == 0:
+            self._output.write("No videos here yet")
         else:
-            print(f"Showing playlist: {playlist_name}")
-            # Get playlist by name, show all its videos
-            playlist = self._playlists[self._playlists_names_cleaned.index(
-                playlist_name.lower())]
-            for video in playlist.get_all_videos():
-                formatted_tags = Utils.format_tags(video)
-                print(f" {video.title} ({video.video_id}) {formatted_tags}")
+            self._output.write(Utils.format_listing(
+                playlist.snapshot_videos(), flags=self._video_library.get_flags()))
 
     def remove_from_playlist(self, playlist_name, video_id):
         """Removes a video to a playlist with a given name.
@@ -169,26 +213,20 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be removed.
         """
-        videos = self._playlists[self._playlists_names_cleaned.index(
-            playlist_name.lower())].get_all_videos()
-        is_in_videos = False
-        for video in videos:
-            if video.video_id == video_id:
-                is_in_videos = True
-        if playlist_name.lower() not in self._playlists_names_cleaned and is_in_videos == True:
-            print(
-                f"Cannot remove video from {playlist_name}: Playlist does not exist")
-        elif playlist_name.lower() not in self._playlists_names_cleaned:
-            print(
+        playlist = self._session.playlists.get(playlist_name)
+        video = self._video_library.get_video(video_id)
+        if playlist is None:
+            self._output.write(
                 f"Cannot remove video from {playlist_name}: Playlist does not exist")
-        elif is_in_videos == True:
-            print(
+        elif video is None:
+            self._output.write(
+                f"Cannot remove video from {playlist_name}: Video does not exist")
+        elif playlist.remove_video(video_id) is None:
+            self._output.write(
                 f"Cannot remove video from {playlist_name}: Video is not in playlist")
         else:
-            for video in videos:
-                if video.video_id == video_id:
-                    print(f"Removed video from {playlist_name}: {video.title}")
-                    videos.remove(video)
+            self._log(playlist_log.REMOVE, playlist_name, video_id)
+            self._output.write(f"Removed video from {playlist_name}: {video.title}")
 
     def clear_playlist(self, playlist_name):
         """Removes all videos from a playlist with a given name.
@@ -196,7 +234,14 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        print("clears_playlist needs implementation")
+        playlist = self._session.playlists.get(playlist_name)
+        if playlist is None:
+            self._output.write(
+                f"Cannot clear playlist {playlist_name}: Playlist does not exist")
+        else:
+            playlist.clear()
+            self._log(playlist_log.CLEAR, playlist_name)
+            self._output.write(f"Successfully removed all videos from {playlist_name}")
 
     def delete_playlist(self, playlist_name):
         """Deletes a playlist with a given name.
@@ -204,7 +249,12 @@ class VideoPlayer:
         Args:
             playlist_name: The playlist name.
         """
-        print("deletes_playlist needs implementation")
+        if self._session.playlists.delete(playlist_name) is None:
+            self._output.write(
+                f"Cannot delete playlist {playlist_name}: Playlist does not exist")
+        else:
+            self._log(playlist_log.DELETE, playlist_name)
+            self._output.write(f"Deleted playlist: {playlist_name}")
 
     def search_videos(self, search_term):
         """Display all the videos whose titles contain the search_term.
@@ -212,7 +262,24 @@ class VideoPlayer:
         Args:
             search_term: The query to be used in search.
         """
-        print("search_videos needs implementation")
+        library = self._video_library.snapshot()
+        videos = [library.get_video(video_id) for video_id
+                  in library.search_titles(search_term)]
+        self._show_search_results(search_term, videos)
+
+    def search_videos_fuzzy(self, *words):
+        """Display the videos whose titles best match the search words,
+        tolerating typos.
+
+        Args:
+            words: The words of the query.
+        """
+        search_term = " ".join(words)
+        library = self._video_library.snapshot()
+        videos = [library.get_video(video_id) for video_id
+                  in library.search_titles_fuzzy(search_term,
+                                                 self._fuzzy_limit)]
+        self._show_search_results(search_term, videos)
 
     def search_videos_tag(self, video_tag):
         """Display all videos whose tags contains the provided tag.
@@ -220,7 +287,61 @@ class VideoPlayer:
         Args:
             video_tag: The video tag to be used in search.
         """
-        print("search_videos_tag needs implementation")
+        library = self._video_library.snapshot()
+        videos = [library.get_video(video_id) for video_id
+                  in library.search_tags([video_tag])]
+        videos.sort(key=lambda video: video.title)
+        self._show_search_results(video_tag, videos)
+
+    def _show_search_results(self, search_term, videos):
+        """Lists numbered search results and plays the one the user picks.
+
+        Args:
+            search_term: The query the results are for.
+            videos: The matching videos, in display order.
+        """
+        if not videos:
+            self._output.write(f"No search results for {search_term}")
+            return
+        self._output.write(f"Here are the results for {search_term}:")
+        for number, video in enumerate(videos, start=1):
+            self._output.write(f"  {number}) {Utils.format_video(video)}")
+        self._output.write("Would you like to play any of the above? If yes, "
+                           "specify the number of the video.")
+        self._output.write("If your answer is not a valid number, we will "
+                           "assume it's a no.")
+        self._output.flush()  # The question must be visible before reading
+        if self._defer_answers:
+            self._pending_choices = videos
+            return
+        answer = self._read_answer() if self._read_answer else input()
+        self._play_choice(videos, answer)
+
+    def _play_choice(self, videos, answer):
+        """Plays the search result an answer picks by number, if any."""
+        try:
+            number = int(answer)
+        except ValueError:
+            return
+        if 1 <= number <= len(videos):
+            self.play_video(videos[number - 1].video_id)
+
+    def is_awaiting_answer(self):
+        """Returns True if a search asked a question whose answer was
+        deferred and has not been given yet."""
+        return self._pending_choices is not None
+
+    def answer_question(self, answer):
+        """Answers the deferred question of the last search, playing the
+        result it picks, if any.
+
+        Args:
+            answer: The line the user answered, a number or anything else
+                for no.
+        """
+        videos, self._pending_choices = self._pending_choices, None
+        if videos is not None:
+            self._play_choice(videos, answer)
 
     def flag_video(self, video_id, flag_reason=""):
         """Mark a video as flagged.
@@ -229,7 +350,19 @@ class VideoPlayer:
             video_id: The video_id to be flagged.
             flag_reason: Reason for flagging the video.
         """
-        print("flag_video needs implementation")
+        video = self._video_library.get_video(video_id)
+        reason = flag_reason or "Not supplied"
+        if video is None:
+            self._output.write("Cannot flag video: Video does not exist")
+        elif not self._video_library.flag_video(video_id, reason):
+            self._output.write("Cannot flag video: Video is already flagged")
+        else:
+            self._log(playlist_log.FLAG, video_id, reason)
+            playing_video = self._session.playing_video
+            if playing_video is not None and playing_video.video_id == video_id:
+                self.stop_video()
+            self._output.write(
+                f"Successfully flagged video: {video.title} (reason: {reason})")
 
     def allow_video(self, video_id):
         """Removes a flag from a video.
@@ -237,4 +370,11 @@ class VideoPlayer:
         Args:
             video_id: The video_id to be allowed again.
         """
-        print("allow_video needs implementation")
+        video = self._video_library.get_video(video_id)
+        if video is None:
+            self._output.write("Cannot remove flag from video: Video does not exist")
+        elif self._video_library.allow_video(video_id) is None:
+            self._output.write("Cannot remove flag from video: Video is not flagged")
+        else:
+            self._log(playlist_log.ALLOW, video_id)
+            self._output.write(f"Successfully removed flag from video: {video.title}")
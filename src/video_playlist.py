@@ -1,20 +1,107 @@
 """A video playlist class."""
 
+import threading
+
 
 class Playlist:
-    """A class used to represent a Playlist."""
+    """A class used to represent a Playlist.
+
+    Videos are kept in an insertion-ordered dict keyed by video_id, so
+    membership tests, adds and removals are O(1) while iteration still
+    follows the order the videos were added in.
+
+    Every modification holds the playlist's own lock, so threads working
+    on different playlists never wait for each other. Threads iterating
+    a playlist others may modify should use snapshot_videos().
+    """
 
     def __init__(self, playlist_name):
         self._playlist_name = playlist_name
-        self._videos = []
+        self._videos = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._videos)
+
+    def __contains__(self, video_id):
+        return video_id in self._videos
 
     def get_playlist_name(self):
         """Getter."""
         return self._playlist_name
 
     def get_all_videos(self):
-        return self._videos
+        """Returns a read-only view of the videos, in insertion order."""
+        return self._videos.values()
+
+    def get_all_video_ids(self):
+        """Returns a read-only view of the video ids, in insertion order."""
+        return self._videos.keys()
+
+    def snapshot_videos(self):
+        """Returns a list of the videos, in insertion order, copied under
+        the lock."""
+        with self._lock:
+            return list(self._videos.values())
 
     def add_video(self, video):
-        """Setter."""
-        self._videos.append(video)
+        """Appends a video.
+
+        Returns:
+            True if the video was added, False if it was already present.
+        """
+        with self._lock:
+            if video.video_id in self._videos:
+                return False
+            self._videos[video.video_id] = video
+            return True
+
+    def add_videos(self, videos):
+        """Appends many videos, skipping those already present.
+
+        Returns:
+            The list of videos that were added.
+        """
+        added = []
+        with self._lock:
+            for video in videos:
+                if video.video_id not in self._videos:
+                    self._videos[video.video_id] = video
+                    added.append(video)
+        return added
+
+    def load_videos(self, video_ids, videos):
+        """Replaces the content of the playlist in bulk.
+
+        Args:
+            video_ids: The ids of the videos, in order.
+            videos: The Video objects matching video_ids.
+        """
+        loaded = dict(zip(video_ids, videos))
+        with self._lock:
+            self._videos = loaded
+
+    def remove_video(self, video_id):
+        """Removes a video.
+
+        Returns:
+            The removed Video object. None if it was not in the playlist.
+        """
+        with self._lock:
+            return self._videos.pop(video_id, None)
+
+    def remove_videos(self, video_ids):
+        """Removes many videos, ignoring ids not in the playlist.
+
+        Returns:
+            The list of videos that were removed.
+        """
+        with self._lock:
+            pop = self._videos.pop
+            return [video for video in (pop(video_id, None)
+                                        for video_id in video_ids) if video]
+
+    def clear(self):
+        """Removes all the videos."""
+        with self._lock:
+            self._videos.clear()
@@ -0,0 +1,141 @@
+"""A constant-time random video sampler class."""
+
+import random
+
+
+class VideoSampler:
+    """A class used to draw random video ids in O(1).
+
+    Eligible ids are kept in an array; removing one moves the last id into
+    its slot, so adds and removals are O(1) as well. Excluded ids (e.g.
+    flagged videos) leave the array but keep their weight until they are
+    included again.
+
+    Weighted picks use rejection sampling: a uniformly drawn id is kept
+    with probability weight / max weight, which takes max / mean weight
+    draws on average and stays O(1) when all weights are equal.
+    """
+
+    def __init__(self, seed=None):
+        """The VideoSampler class is initialized.
+
+        Args:
+            seed: Seeds the random generator, None to seed it from the OS.
+        """
+        self._rng = random.Random(seed)
+        self._ids = []
+        self._weights = []
+        self._positions = {}
+        self._excluded = {}
+        # Only grows while the sampler is in use: a stale maximum just
+        # rejects a few more draws.
+        self._max_weight = 1.0
+        self._weighted = False
+
+    def copy(self):
+        """Returns an independent sampler drawing from the same random
+        generator."""
+        sampler = VideoSampler()
+        sampler._rng = self._rng
+        sampler._ids = list(self._ids)
+        sampler._weights = list(self._weights)
+        sampler._positions = dict(self._positions)
+        sampler._excluded = dict(self._excluded)
+        sampler._max_weight = self._max_weight
+        sampler._weighted = self._weighted
+        return sampler
+
+    def seed(self, seed):
+        """Reseeds the random generator, to make picks reproducible."""
+        self._rng.seed(seed)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, video_id):
+        return video_id in self._positions
+
+    def add(self, video_id, weight=1.0):
+        """Makes an id eligible, or updates its weight if it already is."""
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        if weight != 1.0:
+            self._weighted = True
+            self._max_weight = max(self._max_weight, weight)
+        if video_id in self._excluded:
+            self._excluded[video_id] = weight
+        elif video_id in self._positions:
+            self._weights[self._positions[video_id]] = weight
+        else:
+            self._positions[video_id] = len(self._ids)
+            self._ids.append(video_id)
+            self._weights.append(weight)
+
+    def _pop(self, video_id):
+        """Swap-removes an eligible id, returns its weight."""
+        position = self._positions.pop(video_id)
+        last_id = self._ids.pop()
+        weight = self._weights.pop()
+        if last_id != video_id:
+            self._ids[position] = last_id
+            weight, self._weights[position] = self._weights[position], weight
+            self._positions[last_id] = position
+        return weight
+
+    def discard(self, video_id):
+        """Forgets an id, whether it is eligible or excluded."""
+        if video_id in self._positions:
+            self._pop(video_id)
+        else:
+            self._excluded.pop(video_id, None)
+
+    def exclude(self, video_id):
+        """Stops drawing an eligible id until it is included again.
+
+        Returns:
+            True if the id was eligible.
+        """
+        if video_id not in self._positions:
+            return False
+        self._excluded[video_id] = self._pop(video_id)
+        return True
+
+    def include(self, video_id):
+        """Makes an excluded id eligible again, with its previous weight.
+
+        Returns:
+            True if the id was excluded.
+        """
+        if video_id not in self._excluded:
+            return False
+        weight = self._excluded.pop(video_id)
+        self._positions[video_id] = len(self._ids)
+        self._ids.append(video_id)
+        self._weights.append(weight)
+        return True
+
+    def sample(self, skip=()):
+        """Draws a random eligible id.
+
+        Args:
+            skip: Ids not to return for this draw only, e.g. the video
+                that is already playing.
+
+        Returns:
+            A video id. None if no eligible id is left to draw.
+        """
+        ids = self._ids
+        if skip:
+            skip = set(skip)
+            if sum(video_id in self._positions for video_id in skip) >= len(ids):
+                return None
+        elif not ids:
+            return None
+        rng = self._rng
+        while True:
+            position = rng.randrange(len(ids))
+            if ids[position] in skip:
+                continue
+            if (not self._weighted or
+                    rng.random() * self._max_weight < self._weights[position]):
+                return ids[position]
@@ -0,0 +1,38 @@
+import io
+
+from src.batch import BatchRunner
+from src.command_parser import CommandParser
+from src.output import CollectorSink
+from src.video_player import VideoPlayer
+
+
+def _run(script):
+    runner = BatchRunner(io.StringIO(script))
+    output = CollectorSink()
+    player = VideoPlayer(output, read_answer=runner.read_answer)
+    stats = runner.run(CommandParser(player), output)
+    return stats, output.get_lines()
+
+
+def test_runs_commands_and_counts_them():
+    stats, lines = _run("PLAY amazing_cats_video_id\n"
+                        "play funny_dogs_video_id\n"
+                        "STOP\n"
+                        "PLAY\n"
+                        "EXIT\n"
+                        "PLAY amazing_cats_video_id\n")
+    assert lines == ["Playing video: Amazing Cats",
+                     "Stopping video: Amazing Cats",
+                     "Playing video: Funny Dogs",
+                     "Stopping video: Funny Dogs",
+                     "Please enter PLAY command followed by video_id."]
+    assert stats.command_counts == {"PLAY": 3, "STOP": 1}
+    assert stats.total_commands == 4
+    assert stats.errors == 1
+
+
+def test_answers_come_from_the_next_line():
+    stats, lines = _run("SEARCH_VIDEOS cat\n2\nSHOW_PLAYING\n")
+    assert lines[-2] == "Playing video: Another Cat Video"
+    assert lines[-1].startswith("Currently playing: Another Cat Video")
+    assert stats.command_counts == {"SEARCH_VIDEOS": 1, "SHOW_PLAYING": 1}
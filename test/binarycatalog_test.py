@@ -0,0 +1,126 @@
+from src.binary_catalog import MappedVideoLibrary, compile_catalog
+from src.command_parser import CommandParser
+from src.output import CollectorSink
+from src.video_library import DEFAULT_CATALOG, VideoLibrary
+from src.video_player import VideoPlayer
+import pytest
+import sys
+import threading
+
+
+@pytest.fixture
+def mapped_library(tmp_path):
+    target = tmp_path / "videos.bin"
+    compile_catalog(DEFAULT_CATALOG, target)
+    with MappedVideoLibrary(target) as library:
+        yield library
+
+
+def test_mapped_library_has_all_videos(mapped_library):
+    videos = mapped_library.get_all_videos()
+    assert len(videos) == 5
+    assert [video.video_id for video in videos] == \
+           VideoLibrary().get_all_video_urls()
+
+
+def test_mapped_library_parses_tags_correctly(mapped_library):
+    video = mapped_library.get_video("amazing_cats_video_id")
+    assert video is not None
+    assert video.title == "Amazing Cats"
+    assert video.video_id == "amazing_cats_video_id"
+    assert set(video.tags) == {"#cat", "#animal"}
+
+    video = mapped_library.get_video("nothing_video_id")
+    assert video.title == "Video about nothing"
+    assert video.tags == ()
+
+
+def test_mapped_library_missing_video(mapped_library):
+    assert mapped_library.get_video("does_not_exist") is None
+    assert mapped_library.get_video("") is None
+
+
+def test_rejects_non_catalog_file(tmp_path):
+    path = tmp_path / "videos.bin"
+    path.write_bytes(b"not a catalog")
+    with pytest.raises(ValueError):
+        MappedVideoLibrary(path)
+
+
+def _play_script(video_library):
+    answers = iter(["1", "no", "1", "2"])
+    output = CollectorSink()
+    parser = CommandParser(
+        VideoPlayer(output, lambda: next(answers, "no"), video_library))
+    for command in ["NUMBER_OF_VIDEOS", "SHOW_ALL_VIDEOS",
+                    "SEARCH_VIDEOS cAt", "SEARCH_VIDEOS_WITH_TAG #CAT",
+                    "SEARCH_VIDEOS_FUZZY amazng cts", "SEARCH_VIDEOS o",
+                    "FLAG_VIDEO amazing_cats_video_id spam",
+                    "FLAG_VIDEO amazing_cats_video_id", "SEARCH_VIDEOS cat",
+                    "SEARCH_VIDEOS_WITH_TAG #animal", "SHOW_ALL_VIDEOS",
+                    "PLAY amazing_cats_video_id", "SEARCH_VIDEOS_FUZZY xyzzy",
+                    "ALLOW_VIDEO amazing_cats_video_id",
+                    "ALLOW_VIDEO amazing_cats_video_id",
+                    "PLAY amazing_cats_video_id"]:
+        parser.execute_command(command.split())
+    return output.get_lines()
+
+
+def test_player_runs_on_the_mapped_library(mapped_library):
+    assert _play_script(mapped_library) == _play_script(VideoLibrary())
+
+
+def test_random_picks_skip_flagged_videos(mapped_library):
+    mapped_library.get_sampler().seed(0)
+    video_ids = mapped_library.get_all_video_urls()
+    for video_id in video_ids[1:]:
+        assert mapped_library.flag_video(video_id, "spam")
+    assert mapped_library.number_of_available_videos() == 1
+    for _ in range(10):
+        assert mapped_library.get_random_video().video_id == video_ids[0]
+    assert mapped_library.get_random_video([video_ids[0]]) is None
+    assert mapped_library.iter_video_ids() & {video_ids[0], "nope"} == \
+           {video_ids[0]}
+
+
+@pytest.mark.parametrize("term", ["", "cat", "O", "xyz"])
+def test_title_search_matches_the_library(mapped_library, term):
+    library = VideoLibrary()
+    for flagged in (False, True):
+        if flagged:
+            for backend in (library, mapped_library):
+                backend.flag_video("another_cat_video_id", "spam")
+        for limit in (None, 1, 3):
+            assert mapped_library.search_titles(term, limit) == \
+                   library.search_titles(term, limit)
+
+
+@pytest.fixture
+def fast_switching():
+    # Switch threads as often as possible to shake out races.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_flags_are_all_kept(mapped_library, fast_switching):
+    video_ids = mapped_library.get_all_video_urls()
+    barrier = threading.Barrier(len(video_ids))
+    results = []
+
+    def flag(video_id):
+        barrier.wait()
+        for _ in range(2000):
+            results.append(mapped_library.flag_video(video_id, "spam"))
+            results.append(mapped_library.allow_video(video_id) == "spam")
+        results.append(mapped_library.flag_video(video_id, "spam"))
+
+    threads = [threading.Thread(target=flag, args=(video_id,))
+               for video_id in video_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(results)
+    assert set(mapped_library.get_flags()) == set(video_ids)
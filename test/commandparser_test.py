@@ -0,0 +1,42 @@
+import pytest
+
+from src.command_parser import CommandException, CommandParser
+from src.video_player import VideoPlayer
+
+
+def test_commands_are_case_insensitive(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["number_of_videos"])
+    out, err = capfd.readouterr()
+    assert out == "5 videos in the library\n"
+
+
+def test_wrong_arity_raises_usage():
+    parser = CommandParser(VideoPlayer())
+    with pytest.raises(CommandException,
+                       match="Please enter PLAY command followed by video_id."):
+        parser.execute_command(["PLAY"])
+    with pytest.raises(CommandException, match="FLAG_VIDEO"):
+        parser.execute_command(["FLAG_VIDEO", "a", "b", "c"])
+
+
+def test_unknown_command(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["NOT_A_COMMAND"])
+    out, err = capfd.readouterr()
+    assert "Please enter a valid command" in out
+
+
+def test_plugins_can_register_commands(capfd):
+    parser = CommandParser(VideoPlayer())
+    calls = []
+    parser.register_command("ECHO", calls.append, (1,), None,
+                            "ECHO <text>", "Records text.")
+    parser.execute_command(["echo", "hello"])
+    assert calls == ["hello"]
+    with pytest.raises(CommandException):
+        parser.execute_command(["ECHO"])
+    parser.execute_command(["HELP"])
+    out, err = capfd.readouterr()
+    assert "    ECHO <text> - Records text." in out.splitlines()
+    assert out.rstrip().endswith("EXIT - Terminates the program execution.")
@@ -0,0 +1,222 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from src import concurrent_library
+from src.concurrent_library import ConcurrentVideoLibrary
+from src.output import NullSink
+from src.playlist_registry import PlaylistRegistry
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_playlist import Playlist
+
+TAGS = ["#cat", "#dog", "#music", "#news"]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "videos.txt"
+    with open(path, "w") as catalog_file:
+        for number in range(2000):
+            catalog_file.write(f"Video {number} cat show | video_{number:05d} | "
+                               f"{TAGS[number % 4]} , {TAGS[(number + 1) % 4]}\n")
+    return path
+
+
+@pytest.fixture
+def fast_switching():
+    # Switch threads as often as possible to shake out races.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _run_threads(targets, seconds=0.5):
+    stop = threading.Event()
+    errors = []
+
+    def guarded(target):
+        try:
+            while not stop.is_set():
+                target()
+        except Exception as e:  # Reported by the main thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(target,))
+               for target in targets]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_copies_do_not_share_changes():
+    library = VideoLibrary()
+    copy = library.copy()
+    copy.flag_video("amazing_cats_video_id", "dont_like_cats")
+    copy.add_video(Video("Baby Cats", "baby_cats_video_id", ["#cat"]))
+    copy.remove_video("another_cat_video_id")
+    assert library.search_tags(["#cat"]) == \
+           ["amazing_cats_video_id", "another_cat_video_id"]
+    assert library.search_titles("cat") == \
+           ["amazing_cats_video_id", "another_cat_video_id"]
+    assert library.get_flag_reason("amazing_cats_video_id") is None
+    assert library.number_of_available_videos() == 5
+    assert copy.search_tags(["#cat"]) == ["baby_cats_video_id"]
+    assert copy.search_titles("cat") == ["baby_cats_video_id"]
+    assert [video.video_id for video in copy.get_videos_by_title()][:2] == \
+           ["amazing_cats_video_id", "baby_cats_video_id"]
+    library.allow_video("amazing_cats_video_id")
+    library.add_video(Video("Cat Facts", "cat_facts_video_id", ["#cat"]))
+    assert copy.search_tags(["#cat"]) == ["baby_cats_video_id"]
+
+
+def test_batches_publish_atomically():
+    library = ConcurrentVideoLibrary(VideoLibrary())
+    before = library.snapshot()
+    with library.batch() as draft:
+        draft.flag_video("amazing_cats_video_id", "one")
+        draft.flag_video("funny_dogs_video_id", "two")
+        assert library.get_flag_reason("amazing_cats_video_id") is None
+    assert library.snapshot() is not before
+    assert dict(library.get_flags()) == {"amazing_cats_video_id": "one",
+                                         "funny_dogs_video_id": "two"}
+    assert before.get_flags() == {}
+    with pytest.raises(RuntimeError):
+        with library.batch() as draft:
+            draft.allow_video("amazing_cats_video_id")
+            raise RuntimeError("abandoned")
+    assert library.get_flag_reason("amazing_cats_video_id") == "one"
+    assert library.versions_published == 1
+
+
+def test_flags_are_published_without_copying(monkeypatch):
+    monkeypatch.setattr(concurrent_library, "MAX_PENDING_FLAGS", 2)
+    library = ConcurrentVideoLibrary(VideoLibrary())
+    loaded = library.snapshot()
+    assert library.flag_video("amazing_cats_video_id", "one")
+    assert not library.flag_video("amazing_cats_video_id", "again")
+    assert not library.flag_video("no_such_video_id", "none")
+    snapshot = library.snapshot()
+    assert snapshot.get_flag_reason("amazing_cats_video_id") == "one"
+    assert snapshot.search_tags(["#cat"]) == ["another_cat_video_id"]
+    assert snapshot.search_titles("cat", limit=1) == ["another_cat_video_id"]
+    assert "amazing_cats_video_id" not in \
+           snapshot.search_titles_fuzzy("amazing cats")
+    assert snapshot.number_of_available_videos() == 4
+    for _ in range(50):
+        assert snapshot.get_random_video(
+            ["another_cat_video_id"]).video_id != "amazing_cats_video_id"
+    assert library.flag_video("funny_dogs_video_id", "two")
+    assert library.allow_video("amazing_cats_video_id") == "one"
+    assert library.allow_video("amazing_cats_video_id") is None
+    assert dict(library.get_flags()) == {"funny_dogs_video_id": "two"}
+    assert loaded.get_flags() == {}
+    assert loaded.search_tags(["#dog"]) == ["funny_dogs_video_id"]
+
+    # A third pending flag folds them all into a copy of the library.
+    assert library.flag_video("amazing_cats_video_id", "three")
+    assert library.flag_video("life_at_google_video_id", "four")
+    folded = library.snapshot()
+    assert isinstance(folded, VideoLibrary)
+    assert dict(folded.get_flags()) == {"funny_dogs_video_id": "two",
+                                        "amazing_cats_video_id": "three",
+                                        "life_at_google_video_id": "four"}
+    assert folded.search_tags(["#dog"]) == []
+    assert library.allow_video("funny_dogs_video_id") == "two"
+    assert library.search_tags(["#dog"]) == ["funny_dogs_video_id"]
+    assert loaded.get_flags() == {}
+
+
+def test_readers_see_consistent_snapshots_under_writes(catalog,
+                                                       fast_switching):
+    library = ConcurrentVideoLibrary(VideoLibrary(catalog))
+    video_ids = sorted(library.iter_video_ids())
+    position = [0]
+
+    def write():
+        start = position[0] % len(video_ids)
+        position[0] += 7
+        with library.batch() as draft:
+            for video_id in video_ids[start:start + 7]:
+                if not draft.flag_video(video_id, "stress"):
+                    draft.allow_video(video_id)
+
+    def read():
+        snapshot = library.snapshot()
+        flags = snapshot.get_flags()
+        assert (snapshot.number_of_available_videos() + len(flags) ==
+                snapshot.number_of_videos())
+        for video_id in snapshot.search_tags(["#cat"]):
+            assert video_id not in flags
+        for video_id in snapshot.search_titles("cat show", limit=50):
+            assert video_id not in flags
+        for video_id in snapshot.search_titles_fuzzy("vidoe cta"):
+            assert video_id not in flags
+        video = snapshot.get_random_video()
+        assert video is None or video.video_id not in flags
+
+    def flag():
+        video_id = video_ids[position[0] % len(video_ids)]
+        position[0] += 13
+        if not library.flag_video(video_id, "stress"):
+            library.allow_video(video_id)
+
+    player = VideoPlayer(NullSink(), lambda: "no", library)
+
+    def play():
+        player.show_all_videos()
+        player.search_videos("cat")
+        player.search_videos_tag("#dog")
+        player.play_random_video()
+
+    _run_threads([write, flag, read, read, play])
+    assert library.versions_published > 0
+
+
+def test_playlists_under_concurrent_writers(fast_switching):
+    playlist = Playlist("shared")
+    registry = PlaylistRegistry()
+    videos = [Video(f"Video {number}", f"video_{number}", [])
+              for number in range(4000)]
+    workers = 8
+    done = []
+
+    def writer(worker):
+        mine = videos[worker::workers]
+        for video in mine:
+            assert playlist.add_video(video)
+        playlist.remove_videos(video.video_id for video in mine[::2])
+        assert registry.create(f"playlist_{worker}") is not None
+        assert registry.create(f"scratch_{worker}") is not None
+        assert registry.delete(f"scratch_{worker}") is not None
+        done.append(worker)
+
+    def read():
+        listed = playlist.snapshot_videos()
+        assert len(set(listed)) == len(listed)
+        names = registry.get_playlist_names()
+        assert names == sorted(names)
+        for _ in registry:
+            pass
+
+    threads = [threading.Thread(target=writer, args=(worker,))
+               for worker in range(workers)]
+    for thread in threads:
+        thread.start()
+    _run_threads([read, read], seconds=0.2)
+    for thread in threads:
+        thread.join()
+    assert sorted(done) == list(range(workers))
+    expected = {video.video_id for worker in range(workers)
+                for video in videos[worker::workers][1::2]}
+    assert set(playlist.get_all_video_ids()) == expected
+    assert registry.get_playlist_names() == \
+           [f"playlist_{worker}" for worker in range(workers)]
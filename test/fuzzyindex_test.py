@@ -0,0 +1,98 @@
+from unittest import mock
+
+from src import fuzzy_index
+from src.command_parser import CommandParser
+from src.fuzzy_index import FuzzyIndex, edit_distance, single_edits
+from src.output import CollectorSink
+from src.video import Video
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _index(*titles):
+    videos = {f"video_{number}": Video(title, f"video_{number}", [])
+              for number, title in enumerate(titles)}
+    index = FuzzyIndex()
+    index.add_videos(list(videos.values()))
+    return index, videos
+
+
+def test_edit_distance_counts_swaps_as_one_edit():
+    assert edit_distance("amazng", "amazing", 2) == 1
+    assert edit_distance("dgos", "dogs", 2) == 1
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 1) == 2
+    assert edit_distance("cat", "cat", 0) == 0
+    assert "cta" in single_edits("cat", "c")
+    assert "cat" not in single_edits("cat", "act")
+
+
+def test_tolerates_typos_by_word_length():
+    index, videos = _index("Amazing Cats", "Funny Dogs", "Life at Google",
+                           "Top 10 Cats")
+    assert index.similar_words("amazng") == {"amazing": 1}
+    assert index.similar_words("amzaign") == {"amazing": 2}
+    assert index.similar_words("dgos") == {"dogs": 1}
+    assert index.similar_words("cat") == {"cats": 1, "at": 1}
+    assert index.similar_words("ct") == {}
+    assert index.similar_words("11") == {}
+    assert index.similar_words("10") == {"10": 0}
+
+
+def test_ranks_by_missed_words_then_distance_then_coverage():
+    index, videos = _index("Amazing Cats", "Amazing Cats and Dogs",
+                           "Amazing Dogs", "Cats", "Amazing Cat")
+    assert index.search("amazng cats", None) == \
+           ["video_0", "video_1", "video_4", "video_3", "video_2"]
+    assert index.search("amazng cats", 2) == ["video_0", "video_1"]
+    assert index.search("xyzzy") == []
+    assert index.search("") == []
+
+
+def test_library_leaves_flagged_videos_out():
+    library = VideoLibrary()
+    assert library.search_titles_fuzzy("amazng cats") == \
+           ["amazing_cats_video_id", "another_cat_video_id"]
+    copy = library.copy()
+    copy.flag_video("amazing_cats_video_id", "dont_like_cats")
+    assert copy.search_titles_fuzzy("amazng cats") == ["another_cat_video_id"]
+    copy.add_video(Video("Amazing Dogs", "amazing_dogs_video_id", []))
+    assert copy.search_titles_fuzzy("amazng", limit=1) == \
+           ["amazing_dogs_video_id"]
+    assert library.search_titles_fuzzy("amazng") == ["amazing_cats_video_id"]
+    copy.allow_video("amazing_cats_video_id")
+    copy.remove_video("amazing_dogs_video_id")
+    assert copy.search_titles_fuzzy("amazng cats") == \
+           library.search_titles_fuzzy("amazng cats")
+
+
+@mock.patch('builtins.input', lambda *args: '1')
+def test_fuzzy_search_command_plays_the_picked_result():
+    output = CollectorSink()
+    player = VideoPlayer(output, fuzzy_limit=1)
+    parser = CommandParser(player)
+    parser.execute_command(["SEARCH_VIDEOS_FUZZY", "amazng", "cats"])
+    parser.execute_command(["SEARCH_VIDEOS_FUZZY", "xyzzy"])
+    assert output.get_lines() == [
+        "Here are the results for amazng cats:",
+        "  1) Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "Would you like to play any of the above? If yes, specify the "
+        "number of the video.",
+        "If your answer is not a valid number, we will assume it's a no.",
+        "Playing video: Amazing Cats",
+        "No search results for xyzzy",
+    ]
+
+
+def test_common_words_do_not_crowd_out_closer_matches(monkeypatch):
+    monkeypatch.setattr(fuzzy_index, "MAX_CANDIDATES_PER_WORD", 2)
+    index, videos = _index(*[f"Amazing Amazing {number}" for number in range(6)],
+                           *[f"Cats {number}" for number in range(6)],
+                           "Amazing Cats")
+    # Each word contributes its closest, first titled videos, whatever
+    # their ids: the 0 edit Cats titles beat the 1 edit Amazing ones.
+    assert index.search("amazng cats", 2) == ["video_12", "video_6"]
+    assert index.search("amazng cats", 3) == \
+           ["video_12", "video_6", "video_7"]
+    assert index.search("amazng cats", None)[:4] == \
+           ["video_12", "video_6", "video_7", "video_8"]
@@ -0,0 +1,89 @@
+import json
+import tracemalloc
+
+import pytest
+
+from src.command_parser import CommandException, CommandParser
+from src.instrumentation import Instrumentation, LatencyHistogram
+from src.output import CollectorSink
+from src.video_player import VideoPlayer
+
+
+def _parser(instrumentation=None):
+    parser = CommandParser(VideoPlayer(CollectorSink()))
+    if instrumentation is not None:
+        parser.enable_instrumentation(instrumentation)
+    return parser
+
+
+def test_histogram_percentiles_are_within_an_eighth():
+    histogram = LatencyHistogram()
+    for nanoseconds in range(1, 10001):
+        histogram.record(nanoseconds * 1000)
+    for quantile in (0.5, 0.95, 0.99):
+        exact = quantile * 10000 * 1000
+        assert exact <= histogram.percentile(quantile) <= exact * 1.125
+    assert histogram.percentile(1.0) == histogram.max_ns == 10000 * 1000
+    assert LatencyHistogram().percentile(0.5) == 0
+
+
+def test_disabled_by_default():
+    parser = _parser()
+    assert parser.get_instrumentation() is None
+    assert "STATS" not in {command.name for command in parser.get_commands()}
+
+
+def test_records_calls_and_errors():
+    instrumentation = Instrumentation()
+    parser = _parser(instrumentation)
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    parser.execute_command(["play", "nothing_video_id"])
+    parser.execute_command(["NOT_A_COMMAND"])
+    with pytest.raises(CommandException):
+        parser.execute_command(["PLAY"])
+    stats = instrumentation.get_command_stats()
+    assert stats["PLAY"].calls == 3
+    assert stats["PLAY"].errors == 1
+    assert stats["INVALID"].calls == 1
+    assert stats["PLAY"].latency.percentile(0.5) > 0
+
+
+def test_stats_command_and_exports(tmp_path):
+    instrumentation = Instrumentation(trace_allocations=True)
+    parser = _parser(instrumentation)
+    output = parser._player.get_output()
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    parser.execute_command(["STATS"])
+    report = output.getvalue().splitlines()[-2:]
+    assert report[0].split()[:3] == ["Command", "Calls", "Errors"]
+    assert report[1].split()[:3] == ["SHOW_ALL_VIDEOS", "1", "0"]
+
+    json_path = tmp_path / "stats.json"
+    parser.execute_command(["STATS", "JSON", str(json_path)])
+    exported = json.loads(json_path.read_text())
+    assert exported["SHOW_ALL_VIDEOS"]["calls"] == 1
+    assert exported["SHOW_ALL_VIDEOS"]["peak_allocated_bytes"] > 0
+    assert set(exported["STATS"]["latency_seconds"]) == \
+           {"p50", "p95", "p99", "max", "total"}
+
+    prometheus_path = tmp_path / "stats.prom"
+    parser.execute_command(["STATS", "prometheus", str(prometheus_path)])
+    assert output.get_lines()[-1] == f"Exported statistics to {prometheus_path}"
+    text = prometheus_path.read_text()
+    assert 'yt_command_calls_total{command="SHOW_ALL_VIDEOS"} 1' in text
+    assert 'yt_command_latency_seconds{command="SHOW_ALL_VIDEOS",quantile="0.99"}' \
+           in text
+
+    with pytest.raises(CommandException):
+        parser.execute_command(["STATS", "XML", str(tmp_path / "stats.xml")])
+
+
+def test_allocations_are_traced_without_reset_peak(monkeypatch):
+    # Python 3.7 and 3.8 lack tracemalloc.reset_peak().
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    instrumentation = Instrumentation(trace_allocations=True)
+    parser = _parser(instrumentation)
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    stats = instrumentation.get_command_stats()["SHOW_ALL_VIDEOS"]
+    assert stats.calls == 1
+    assert stats.peak_allocated_bytes > 0
@@ -0,0 +1,47 @@
+import io
+
+from src.command_parser import CommandParser
+from src.output import BufferedSink, CollectorSink, NullSink
+from src.video_player import VideoPlayer
+
+
+def test_collector_sink_captures_player_output(capfd):
+    sink = CollectorSink()
+    player = VideoPlayer(sink)
+    player.play_video("amazing_cats_video_id")
+    player.show_all_videos()
+    out, err = capfd.readouterr()
+    assert out == ""
+    lines = sink.get_lines()
+    assert lines[0] == "Playing video: Amazing Cats"
+    assert lines[1] == "Here's a list of all available videos:"
+    assert len(lines) == 7
+
+
+def test_buffered_sink_flushes_once_per_command():
+    stream = io.StringIO()
+    parser = CommandParser(VideoPlayer(BufferedSink(stream)))
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    assert stream.getvalue() == "Playing video: Amazing Cats\n"
+    parser.execute_command(["STOP"])
+    parser.execute_command(["FOO"])
+    assert stream.getvalue().splitlines()[1:] == [
+        "Stopping video: Amazing Cats",
+        "Please enter a valid command, type HELP for a list of available "
+        "commands."]
+
+
+def test_buffered_sink_bounds_pending_lines():
+    stream = io.StringIO()
+    sink = BufferedSink(stream, max_lines=2)
+    sink.write("one")
+    assert stream.getvalue() == ""
+    sink.write("two")
+    assert stream.getvalue() == "one\ntwo\n"
+
+
+def test_null_sink_discards_output(capfd):
+    player = VideoPlayer(NullSink())
+    player.show_all_videos()
+    out, err = capfd.readouterr()
+    assert out == ""
@@ -0,0 +1,82 @@
+import pytest
+
+from src import parallel_loader
+from src.parallel_loader import ParallelVideoLoader, split_shards
+from src.video_library import VideoLibrary
+
+
+def _write_catalog(tmp_path, text):
+    path = tmp_path / "videos.txt"
+    path.write_bytes(text.encode())
+    return path
+
+
+def _contents(library):
+    stats = library.get_load_stats()
+    tags = sorted({tag.lower() for video in library.iter_videos()
+                   for tag in video.tags})
+    return ([(video.title, video.video_id, video.tags)
+             for video in library.iter_videos()],
+            [video.video_id for video in library.get_videos_by_title()],
+            {tag: library.search_tags([tag]) for tag in tags},
+            library.search_titles("cat"), library.search_titles("video 1"),
+            library.search_titles_fuzzy("vidoe dgo 12", limit=None),
+            library.get_sampler()._ids,
+            (stats.rows_loaded, stats.rows_skipped, stats.malformed_rows,
+             stats.lines_read))
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(parallel_loader, "MIN_SHARD_SIZE", 64)
+
+
+def test_shards_end_on_lines(tmp_path):
+    lines = [f"Video {i} | video_{i} | #tag\n" for i in range(100)]
+    path = _write_catalog(tmp_path, "".join(lines))
+    shards = split_shards(path, 4, min_size=1)
+    assert len(shards) == 4
+    assert shards[0][0] == 0
+    assert shards[-1][1] == path.stat().st_size
+    data = path.read_bytes()
+    for (_, end), (start, _) in zip(shards, shards[1:]):
+        assert end == start
+        assert data[end - 1:end] == b"\n"
+    assert split_shards(path, 4) == [(0, len(data))]
+    assert split_shards(_write_catalog(tmp_path, ""), 4) == []
+
+
+def test_quoted_catalogs_are_not_split(tmp_path):
+    path = _write_catalog(tmp_path, "".join(
+        f'"Video\n{i}" | video_{i} | #tag\n' for i in range(100)))
+    assert split_shards(path, 4, min_size=1) == \
+           [(0, path.stat().st_size)]
+
+
+def test_parallel_load_matches_serial_load(tmp_path, small_shards):
+    rows = []
+    for i in range(300):
+        rows.append(f"Video {i} cat | video_{i % 170} | #tag{i % 7} , #Cat\n")
+        if i % 50 == 0:
+            rows.append("Only a title\n\n")
+        if i % 40 == 0:  # Replaced again within the same shard
+            rows.append(f"Video {i} dog | video_{i % 170} | #dog\n")
+    rows.append("Déjà vu cat | video_last | #tag0")
+    path = _write_catalog(tmp_path, "".join(rows))
+    serial = VideoLibrary(path, chunk_size=16)
+    loader = ParallelVideoLoader(path, 4)
+    assert len(list(loader.iter_shards())) == 4
+    parallel = VideoLibrary(path, workers=4)
+    assert _contents(parallel) == _contents(serial)
+    assert len(serial.get_videos_by_title()) == serial.number_of_videos()
+    assert serial.get_video("video_0").title == "Video 170 cat"
+    assert serial.get_video("video_160").tags == ("#dog",)
+
+
+def test_parallel_load_reports_malformed_lines(tmp_path, small_shards):
+    path = _write_catalog(tmp_path, "".join(
+        "Only a title\n" if i % 25 == 3 else f"Video {i} | video_{i} | #tag\n"
+        for i in range(100)))
+    stats = VideoLibrary(path, workers=3).get_load_stats()
+    assert stats.rows_loaded == 96
+    assert [line for line, reason in stats.malformed_rows] == [4, 29, 54, 79]
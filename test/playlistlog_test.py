@@ -0,0 +1,151 @@
+from src import playlist_log
+from src.output import CollectorSink
+from src.playlist_log import PlaylistLog, read_log, recover
+from src.session import SessionState
+from src.snapshot import load_snapshot
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _run(library, journal, commands, session=None):
+    player = VideoPlayer(CollectorSink(), video_library=library,
+                         session=session, journal=journal)
+    for method, *args in commands:
+        getattr(player, method)(*args)
+    return player
+
+
+def test_logs_only_successful_mutations(tmp_path):
+    path = tmp_path / "playlists.wal"
+    with PlaylistLog(path) as journal:
+        _run(VideoLibrary(), journal, [
+            ("create_playlist", "my_playlist"),
+            ("create_playlist", "MY_PLAYLIST"),
+            ("add_to_playlist", "my_playlist", "amazing_cats_video_id"),
+            ("add_to_playlist", "my_playlist", "amazing_cats_video_id"),
+            ("add_to_playlist", "my_playlist", "does_not_exist"),
+            ("remove_from_playlist", "my_playlist", "amazing_cats_video_id"),
+            ("clear_playlist", "my_playlist"),
+            ("delete_playlist", "my_playlist"),
+            ("delete_playlist", "my_playlist"),
+        ])
+    records, _ = read_log(path)
+    assert records == [
+        (playlist_log.CREATE, ("my_playlist",)),
+        (playlist_log.ADD, ("my_playlist", "amazing_cats_video_id")),
+        (playlist_log.REMOVE, ("my_playlist", "amazing_cats_video_id")),
+        (playlist_log.CLEAR, ("my_playlist",)),
+        (playlist_log.DELETE, ("my_playlist",)),
+    ]
+
+
+def test_logs_arguments_longer_than_64_kib(tmp_path):
+    path = tmp_path / "playlists.wal"
+    name = "p" * 70000
+    reason = "\u00e9" * 40000
+    with PlaylistLog(path) as journal:
+        _run(VideoLibrary(), journal, [
+            ("create_playlist", name),
+            ("flag_video", "amazing_cats_video_id", reason),
+        ])
+    assert read_log(path)[0] == [
+        (playlist_log.CREATE, (name,)),
+        (playlist_log.FLAG, ("amazing_cats_video_id", reason)),
+    ]
+
+
+def test_group_commit(tmp_path):
+    path = tmp_path / "playlists.wal"
+    journal = PlaylistLog(path, group_size=3, sync_interval=3600)
+    for number in range(7):
+        journal.append(playlist_log.CREATE, f"playlist_{number}")
+    assert journal.syncs == 2
+    assert len(read_log(path)[0]) == 6
+    journal.close()
+    assert journal.syncs == 3
+    assert len(read_log(path)[0]) == 7
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    path = tmp_path / "playlists.wal"
+    with PlaylistLog(path) as journal:
+        journal.append(playlist_log.CREATE, "first")
+        journal.append(playlist_log.CREATE, "second")
+    data = path.read_bytes()
+    path.write_bytes(data[:-2])
+    records, valid_length = read_log(path)
+    assert records == [(playlist_log.CREATE, ("first",))]
+    corrupted = bytearray(data)
+    corrupted[-1] ^= 0xFF
+    path.write_bytes(corrupted)
+    assert read_log(path) == (records, valid_length)
+
+
+def test_recover_replays_and_compacts(tmp_path):
+    library = VideoLibrary()
+    snapshot_path = tmp_path / "playlists.snap"
+    log_path = tmp_path / "playlists.snap.wal"
+    with PlaylistLog(log_path) as journal:
+        _run(library, journal, [
+            ("create_playlist", "My_Playlist"),
+            ("add_to_playlist", "my_playlist", "amazing_cats_video_id"),
+            ("add_to_playlist", "my_playlist", "life_at_google_video_id"),
+            ("remove_from_playlist", "my_playlist", "amazing_cats_video_id"),
+            ("create_playlist", "gone"),
+            ("delete_playlist", "gone"),
+        ])
+
+    session = SessionState()
+    assert recover(session, library, snapshot_path, log_path) == (6, [])
+    assert log_path.read_bytes() == b""
+    playlists, _ = load_snapshot(snapshot_path, library)
+    for registry in (session.playlists, playlists):
+        assert registry.get_playlist_names() == ["My_Playlist"]
+        assert list(registry.get("my_playlist").get_all_video_ids()) == \
+               ["life_at_google_video_id"]
+
+    # A crash before the log was truncated replays it onto the compacted
+    # snapshot without changing the result.
+    with PlaylistLog(log_path) as journal:
+        _run(library, journal, [
+            ("add_to_playlist", "my_playlist", "amazing_cats_video_id"),
+        ], session)
+    log_data = log_path.read_bytes()
+    assert log_data
+    session = SessionState()
+    recover(session, library, snapshot_path, log_path)
+    log_path.write_bytes(log_data)
+    replayed = SessionState()
+    recover(replayed, library, snapshot_path, log_path)
+    assert list(replayed.playlists.get("my_playlist").get_all_video_ids()) == \
+           list(session.playlists.get("my_playlist").get_all_video_ids()) == \
+           ["life_at_google_video_id", "amazing_cats_video_id"]
+
+
+def test_recover_restores_flags(tmp_path):
+    snapshot_path = tmp_path / "playlists.snap"
+    log_path = tmp_path / "playlists.snap.wal"
+    with PlaylistLog(log_path) as journal:
+        _run(VideoLibrary(), journal, [
+            ("flag_video", "amazing_cats_video_id", "dont_like_cats"),
+            ("flag_video", "funny_dogs_video_id"),
+            ("flag_video", "funny_dogs_video_id"),
+            ("allow_video", "amazing_cats_video_id"),
+            ("flag_video", "life_at_google_video_id"),
+        ])
+    assert [op for op, _ in read_log(log_path)[0]] == \
+           [playlist_log.FLAG, playlist_log.FLAG, playlist_log.ALLOW,
+            playlist_log.FLAG]
+
+    library = VideoLibrary()
+    assert recover(SessionState(), library, snapshot_path, log_path) == \
+           (4, [])
+    flags = {"funny_dogs_video_id": "Not supplied",
+             "life_at_google_video_id": "Not supplied"}
+    assert dict(library.get_flags()) == flags
+
+    # The compacted snapshot carries the flags once the log is empty.
+    assert log_path.read_bytes() == b""
+    library = VideoLibrary()
+    recover(SessionState(), library, snapshot_path, log_path)
+    assert dict(library.get_flags()) == flags
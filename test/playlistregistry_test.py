@@ -0,0 +1,38 @@
+from src import playlist_registry
+from src.playlist_registry import PlaylistRegistry
+
+
+def test_lookup_is_case_insensitive():
+    registry = PlaylistRegistry()
+    playlist = registry.create("My_Playlist")
+    assert registry.get("my_PLAYLIST") is playlist
+    assert "MY_playlist" in registry
+    assert registry.create("my_playlist") is None
+    assert len(registry) == 1
+
+
+def test_names_stay_sorted_across_create_and_delete():
+    registry = PlaylistRegistry()
+    for name in ["my_cool_playLIST", "anotheR_playlist", "b", "Zed"]:
+        registry.create(name)
+    assert registry.get_playlist_names() == \
+           ["Zed", "anotheR_playlist", "b", "my_cool_playLIST"]
+    assert registry.delete("B").get_playlist_name() == "b"
+    assert registry.delete("b") is None
+    assert [playlist.get_playlist_name() for playlist in registry] == \
+           ["Zed", "anotheR_playlist", "my_cool_playLIST"]
+
+
+def test_names_stay_sorted_across_blocks(monkeypatch):
+    monkeypatch.setattr(playlist_registry, "BLOCK_SIZE", 2)
+    registry = PlaylistRegistry()
+    names = [f"playlist_{number:02d}" for number in range(40)]
+    for name in names[::3] + names[1::3] + names[2::3]:
+        registry.create(name)
+    assert registry.get_playlist_names() == names
+    for name in names[::2] + names[-1:]:
+        registry.delete(name)
+    assert registry.get_playlist_names() == names[1:-1:2]
+    registry.create("playlist_39")
+    registry.create("a")
+    assert registry.get_playlist_names() == ["a"] + names[1::2]
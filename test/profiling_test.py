@@ -0,0 +1,85 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+from src.command_parser import CommandException, CommandParser
+from src.output import CollectorSink
+from src.profiling import Profiler
+from src.video_player import VideoPlayer
+
+
+def _busy(seconds=0.05):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _parser(profiler):
+    output = CollectorSink()
+    parser = CommandParser(VideoPlayer(output))
+    parser.register_command("BUSY", _busy)
+    parser.enable_profiling(profiler)
+    return parser, output
+
+
+def _sampling():
+    return any(thread.name == "stack-sampler"
+               for thread in threading.enumerate())
+
+
+def _profiled_functions(path):
+    return {function for _, _, function in pstats.Stats(str(path)).stats}
+
+
+def test_filtered_commands_are_profiled(tmp_path):
+    profiler = Profiler(tmp_path / "filtered", commands=["busy"])
+    parser, _ = _parser(profiler)
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    assert not _sampling()
+    parser.execute_command(["BUSY"])
+    assert not _sampling()
+    assert profiler.close()
+    pstats_path, collapsed_path = profiler.get_output_paths()
+    functions = _profiled_functions(pstats_path)
+    assert "_busy" in functions
+    assert "show_all_videos" not in functions
+    stacks = open(collapsed_path).read().splitlines()
+    assert stacks
+    stack, count = stacks[0].rsplit(" ", 1)
+    assert stack.split(";")[-1].startswith("_busy (")
+    assert int(count) > 0
+
+
+def test_profile_start_and_stop(tmp_path):
+    profiler = Profiler(tmp_path / "window")
+    parser, output = _parser(profiler)
+    parser.execute_command(["PROFILE", "STOP"])
+    parser.execute_command(["PROFILE", "start"])
+    parser.execute_command(["PROFILE", "START"])
+    assert _sampling()
+    parser.execute_command(["BUSY"])
+    parser.execute_command(["PROFILE", "STOP"])
+    assert not _sampling()
+    parser.execute_command(["SHOW_ALL_VIDEOS"])
+    with pytest.raises(CommandException):
+        parser.execute_command(["PROFILE", "PAUSE"])
+    lines = output.get_lines()
+    assert lines[0] == "Cannot stop profiling: Profiling is not started"
+    assert lines[1] == "Profiling started"
+    assert lines[2] == "Cannot start profiling: Profiling is already started"
+    assert lines[3].startswith("Profiling stopped, wrote ")
+    profiler.close()
+    functions = _profiled_functions(profiler.get_output_paths()[0])
+    assert "_busy" in functions
+    assert "show_all_videos" not in functions
+
+
+def test_nothing_is_written_without_profiling(tmp_path):
+    profiler = Profiler(tmp_path / "idle")
+    parser, _ = _parser(profiler)
+    parser.execute_command(["BUSY"])
+    assert not _sampling()
+    assert not profiler.close()
+    assert list(tmp_path.iterdir()) == []
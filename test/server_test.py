@@ -0,0 +1,131 @@
+import asyncio
+
+from src.concurrent_library import ConcurrentVideoLibrary
+from src.output import CollectorSink
+from src.server import BUSY, PROMPT, VideoServer
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+async def _send(reader, writer, line):
+    writer.write(line.encode() + b"\n")
+    response = await reader.readuntil(PROMPT)
+    return response[:-len(PROMPT)].decode().splitlines()
+
+
+async def _connect(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await reader.readuntil(PROMPT)
+    return reader, writer
+
+
+def test_sessions_share_the_library_but_not_their_state():
+    async def scenario():
+        video_server = VideoServer(VideoLibrary())
+        server = await video_server.start()
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            first = await _connect(port)
+            second = await _connect(port)
+            assert await _send(*first, "CREATE_PLAYLIST mine") == \
+                   ["Successfully created new playlist: mine"]
+            assert await _send(*second, "SHOW_ALL_PLAYLISTS") == \
+                   ["No playlists exist yet"]
+            assert await _send(*second, "PLAY") == \
+                   ["Please enter PLAY command followed by video_id."]
+            assert await _send(*first, "SEARCH_VIDEOS cat\n2") == [
+                "Here are the results for cat:",
+                "  1) Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+                "  2) Another Cat Video (another_cat_video_id) "
+                "[#cat #animal]",
+                "Would you like to play any of the above? If yes, "
+                "specify the number of the video.",
+                "If your answer is not a valid number, we will assume "
+                "it's a no.",
+                "Playing video: Another Cat Video"]
+            assert video_server.get_connection_count() == 2
+            for reader, writer in (first, second):
+                writer.write(b"EXIT\n")
+                assert b"goodbye" in await reader.read()
+                writer.close()
+            assert video_server.commands_served == 4
+
+    asyncio.run(scenario())
+
+
+def test_connection_limit():
+    async def scenario():
+        server = await VideoServer(VideoLibrary(), max_connections=1).start()
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await _connect(port)
+            busy_reader, busy_writer = await asyncio.open_connection(
+                "127.0.0.1", port)
+            assert await busy_reader.read() == BUSY
+            busy_writer.close()
+            writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_flagging_is_opt_in():
+    async def scenario():
+        library = ConcurrentVideoLibrary(VideoLibrary())
+        closed = await VideoServer(library).start()
+        opened = await VideoServer(library, allow_flagging=True).start()
+        async with closed, opened:
+            reader, writer = await _connect(
+                closed.sockets[0].getsockname()[1])
+            assert await _send(reader, writer,
+                               "FLAG_VIDEO amazing_cats_video_id") == \
+                   ["Cannot flag video: Flags are read-only on this server"]
+            assert library.get_flags() == {}
+            writer.close()
+            reader, writer = await _connect(
+                opened.sockets[0].getsockname()[1])
+            assert await _send(reader, writer,
+                               "FLAG_VIDEO amazing_cats_video_id spam") == \
+                   ["Successfully flagged video: Amazing Cats "
+                    "(reason: spam)"]
+            assert library.get_flag_reason("amazing_cats_video_id") == "spam"
+            assert await _send(reader, writer,
+                               "ALLOW_VIDEO amazing_cats_video_id") == \
+                   ["Successfully removed flag from video: Amazing Cats"]
+            writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_player_defers_the_answer_to_a_search():
+    output = CollectorSink()
+    player = VideoPlayer(output, defer_answers=True)
+    player.search_videos("cat")
+    assert player.is_awaiting_answer()
+    assert len(output.get_lines()) == 5
+    player.answer_question("1")
+    assert not player.is_awaiting_answer()
+    player.answer_question("2")
+    assert output.get_lines()[5:] == ["Playing video: Amazing Cats"]
+
+
+def test_open_questions_do_not_hold_threads():
+    async def scenario():
+        server = await VideoServer(VideoLibrary()).start()
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            waiting = []
+            for _ in range(40):
+                reader, writer = await _connect(port)
+                writer.write(b"SEARCH_VIDEOS cat\n")
+                await reader.readuntil(b"it's a no.\n")
+                waiting.append((reader, writer))
+            other = await _connect(port)
+            lines = await asyncio.wait_for(
+                _send(*other, "SEARCH_VIDEOS_WITH_TAG #dog\nno"), 5)
+            assert lines[0] == "Here are the results for #dog:"
+            assert await _send(*waiting[0], "1") == \
+                   ["Playing video: Amazing Cats"]
+            for _, writer in waiting + [other]:
+                writer.close()
+
+    asyncio.run(scenario())
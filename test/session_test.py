@@ -0,0 +1,44 @@
+from src.session import SessionState
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_shared_library_is_loaded_once():
+    assert VideoLibrary.load_shared() is VideoLibrary.load_shared()
+
+
+def test_sessions_share_the_library_but_not_their_state(capfd):
+    library = VideoLibrary.load_shared()
+    first = VideoPlayer(video_library=library)
+    second = VideoPlayer(video_library=library)
+    first.create_playlist("my_playlist")
+    first.play_video("amazing_cats_video_id")
+    second.show_all_playlists()
+    second.show_playing()
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[2] == "No playlists exist yet"
+    assert lines[3] == "No video is currently playing"
+
+
+def test_session_state_can_be_handed_to_a_new_player(capfd):
+    session = SessionState()
+    VideoPlayer(session=session).play_video("funny_dogs_video_id")
+    assert session.playing_video.video_id == "funny_dogs_video_id"
+    VideoPlayer(session=session).show_playing()
+    out, err = capfd.readouterr()
+    assert "Currently playing: Funny Dogs" in out.splitlines()[1]
+
+
+def test_random_video_becomes_the_playing_video(capfd):
+    session = SessionState()
+    player = VideoPlayer(session=session)
+    player.play_video("funny_dogs_video_id")
+    player.pause_video()
+    player.play_random_video()
+    assert session.playing_video is not None
+    assert session.paused_video is None
+    player.show_playing()
+    out, err = capfd.readouterr()
+    assert out.splitlines()[-1] == \
+           f"Currently playing: {session.playing_video.listing}"
@@ -0,0 +1,70 @@
+import pytest
+
+from src.session import SessionState
+from src.snapshot import SnapshotError, load_snapshot, save_snapshot
+from src.video import Video
+from src.video_library import VideoLibrary
+
+
+def _session(library):
+    session = SessionState()
+    first = session.playlists.create("My_Playlist")
+    for video_id in ("life_at_google_video_id", "amazing_cats_video_id"):
+        first.add_video(library.get_video(video_id))
+    session.playlists.create("empty")
+    second = session.playlists.create("another")
+    second.add_video(library.get_video("amazing_cats_video_id"))
+    return session
+
+
+def test_round_trip(tmp_path):
+    library = VideoLibrary()
+    path = tmp_path / "playlists.snap"
+    save_snapshot(_session(library), path)
+    playlists, missing = load_snapshot(path, library)
+    assert missing == []
+    assert playlists.get_playlist_names() == ["My_Playlist", "another", "empty"]
+    assert list(playlists.get("my_playlist").get_all_video_ids()) == \
+           ["life_at_google_video_id", "amazing_cats_video_id"]
+    assert len(playlists.get("empty")) == 0
+    assert playlists.get("another").remove_video("amazing_cats_video_id") is \
+           library.get_video("amazing_cats_video_id")
+
+
+def test_videos_missing_from_the_library_are_dropped(tmp_path):
+    library = VideoLibrary()
+    session = _session(library)
+    session.playlists.get("empty").add_video(
+        Video("Gone", "gone_video_id", []))
+    path = tmp_path / "playlists.snap"
+    save_snapshot(session, path)
+    playlists, missing = load_snapshot(path, library)
+    assert missing == ["gone_video_id"]
+    assert len(playlists.get("empty")) == 0
+    assert len(playlists.get("my_playlist")) == 2
+
+
+def test_rejects_bad_files(tmp_path):
+    path = tmp_path / "playlists.snap"
+    path.write_bytes(b"garbage")
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, VideoLibrary())
+    save_snapshot(_session(VideoLibrary()), path)
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, VideoLibrary())
+
+
+def test_flags_round_trip(tmp_path):
+    library = VideoLibrary()
+    library.flag_video("amazing_cats_video_id", "dont_like_cats")
+    library.flag_video("funny_dogs_video_id", "")
+    path = tmp_path / "playlists.snap"
+    save_snapshot(_session(library), path, library.get_flags())
+
+    restored = VideoLibrary()
+    load_snapshot(path, restored)
+    assert dict(restored.get_flags()) == {
+        "amazing_cats_video_id": "dont_like_cats", "funny_dogs_video_id": ""}
+    assert restored.search_titles("cat") == ["another_cat_video_id"]
+    assert restored.number_of_available_videos() == 3
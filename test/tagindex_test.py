@@ -0,0 +1,49 @@
+from src.tag_index import TagIndex
+from src.video import Video
+from src.video_library import VideoLibrary
+
+
+def _index(*videos):
+    index = TagIndex()
+    index.add_videos(videos)
+    return index
+
+
+CAT = Video("Amazing Cats", "b_cat", ["#cat", "#animal"])
+DOG = Video("Funny Dogs", "a_dog", ["#dog", "#animal"])
+GOOGLE = Video("Life at Google", "c_google", ["#google", "#career"])
+
+
+def test_lookup_is_sorted_and_case_insensitive():
+    index = _index(CAT, DOG, GOOGLE)
+    assert index.lookup("#ANIMAL") == ["a_dog", "b_cat"]
+    assert index.lookup("#blah") == []
+
+
+def test_and_or_queries():
+    index = _index(CAT, DOG, GOOGLE)
+    assert index.search(["#animal", "#cat"]) == ["b_cat"]
+    assert index.search(["#dog", "#cat"]) == []
+    assert index.search(["#dog", "#cat", "#google"], match_all=False) == \
+           ["a_dog", "b_cat", "c_google"]
+
+
+def test_incremental_updates():
+    index = _index(CAT)
+    index.add_video(DOG)
+    assert index.lookup("#animal") == ["a_dog", "b_cat"]
+    index.remove_video(CAT)
+    assert index.lookup("#animal") == ["a_dog"]
+    assert "#cat" not in index.get_tags()
+
+
+def test_library_keeps_tag_index_up_to_date():
+    library = VideoLibrary()
+    assert library.search_tags(["#cat"]) == \
+           ["amazing_cats_video_id", "another_cat_video_id"]
+    library.remove_video("amazing_cats_video_id")
+    library.add_video(Video("Cat Nap", "cat_nap_video_id", ["#cat"]))
+    assert library.search_tags(["#cat"]) == \
+           ["another_cat_video_id", "cat_nap_video_id"]
+    assert library.search_tags(["#cat", "#animal"]) == \
+           ["another_cat_video_id"]
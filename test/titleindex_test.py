@@ -0,0 +1,69 @@
+from src.title_index import TitleIndex
+from src.video import Video
+from src.video_library import VideoLibrary
+
+
+def test_search_is_case_insensitive_and_sorted_by_title():
+    library = VideoLibrary()
+    assert library.search_titles("CAT") == \
+           ["amazing_cats_video_id", "another_cat_video_id"]
+    assert library.search_titles("blah") == []
+
+
+def test_short_terms_are_looked_up_by_trigram_prefix():
+    library = VideoLibrary()
+    assert library.search_titles("g") == \
+           ["amazing_cats_video_id", "funny_dogs_video_id",
+            "life_at_google_video_id", "nothing_video_id"]
+
+
+def test_top_k_limit():
+    library = VideoLibrary()
+    assert library.search_titles("o", limit=2) == \
+           ["another_cat_video_id", "funny_dogs_video_id"]
+
+
+def test_trigrams_must_be_contiguous():
+    index = TitleIndex()
+    index.add_videos([Video("abc xbcd", "one", []),
+                      Video("abcd", "two", [])])
+    assert index.search("bcd") == ["one", "two"]
+    assert index.search("abcd") == ["two"]
+
+
+def test_removed_titles_are_not_found():
+    index = TitleIndex()
+    video = Video("Amazing Cats", "amazing_cats_video_id", [])
+    index.add_video(video)
+    index.remove_video(video)
+    assert index.search("cats") == []
+    assert index.search("a") == []
+
+
+def test_removed_titles_come_back_under_their_doc_id():
+    index = TitleIndex()
+    video = Video("Amazing Cats", "amazing_cats_video_id", [])
+    index.add_videos([video, Video("Ca", "short_video_id", [])])
+    copy = index.copy()
+    copy.remove_video(video)
+    assert copy.search("ca") == ["short_video_id"]
+    copy.add_video(video)
+    assert copy.search("ca") == ["amazing_cats_video_id", "short_video_id"]
+    copy.add_video(Video("Dogs", "amazing_cats_video_id", []))
+    assert copy.search("ca") == ["short_video_id"]
+    assert copy.search("s") == ["amazing_cats_video_id"]
+    assert index.search("cats") == ["amazing_cats_video_id"]
+    assert index.search("a", limit=1) == ["amazing_cats_video_id"]
+
+
+def test_merged_doc_ids_are_offset():
+    index = TitleIndex()
+    index.add_videos([Video("Amazing Cats", "one", [])])
+    other = TitleIndex()
+    other.add_videos([Video("Another Cat", "two", []),
+                      Video("Dogs", "three", [])])
+    index.merge(other)
+    assert index.search("cat") == ["one", "two"]
+    assert index.search("og") == ["three"]
+    index.remove_video(Video("Dogs", "three", []))
+    assert index.search("dogs") == []
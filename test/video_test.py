@@ -0,0 +1,30 @@
+from src.video import Video
+
+
+def test_video_has_no_instance_dict():
+    video = Video("Amazing Cats", "amazing_cats_video_id", ["#cat", "#animal"])
+    assert not hasattr(video, "__dict__")
+
+
+def test_videos_share_tag_tuples():
+    first = Video("Amazing Cats", "amazing_cats_video_id",
+                  ["#cat", "#animal"])
+    second = Video("Another Cat Video", "another_cat_video_id",
+                   ["".join(["#c", "at"]), "#animal"])
+    assert first.tags == ("#cat", "#animal")
+    assert first.tags is second.tags
+
+
+def test_tags_are_copied_from_caller():
+    tags = ["#dog"]
+    video = Video("Funny Dogs", "funny_dogs_video_id", tags)
+    tags.append("#animal")
+    assert video.tags == ("#dog",)
+
+
+def test_formatting_is_cached():
+    video = Video("Amazing Cats", "amazing_cats_video_id", ["#cat", "#animal"])
+    assert video.formatted_tags == "[#cat #animal]"
+    assert video.listing == "Amazing Cats (amazing_cats_video_id) [#cat #animal]"
+    assert video.listing is video.listing
+    assert Video("Nothing", "nothing_video_id", []).formatted_tags == "[]"
@@ -1,3 +1,4 @@
+from src.video import Video
 from src.video_library import VideoLibrary
 
 
@@ -24,3 +25,65 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_accessors_do_not_copy():
+    library = VideoLibrary()
+    assert library.number_of_videos() == 5
+    assert library.contains("amazing_cats_video_id")
+    assert "nothing_video_id" in library
+    assert not library.contains("does_not_exist")
+    assert len(library.iter_videos()) == 5
+    assert list(library.iter_video_ids()) == library.get_all_video_urls()
+
+
+def test_videos_by_title_are_paginated():
+    library = VideoLibrary()
+    titles = [video.title for video in library.get_videos_by_title()]
+    assert titles == sorted(titles)
+    assert [video.title for video in
+            library.get_videos_by_title(offset=1, limit=2)] == titles[1:3]
+    assert library.get_videos_by_title(offset=5) == []
+
+
+def test_title_order_follows_changes():
+    library = VideoLibrary()
+    library.add_video(Video("Baby Cats", "baby_cats_video_id", ["#cat"]))
+    library.remove_video("funny_dogs_video_id")
+    library.add_video(Video("Amazing Cats 2", "amazing_cats_video_id", []))
+    assert [video.video_id for video in library.get_videos_by_title()] == \
+           ["amazing_cats_video_id", "another_cat_video_id",
+            "baby_cats_video_id", "life_at_google_video_id",
+            "nothing_video_id"]
+
+
+def test_flagged_videos_leave_searches_and_random_picks():
+    library = VideoLibrary()
+    assert library.flag_video("amazing_cats_video_id", "dont_like_cats")
+    assert not library.flag_video("amazing_cats_video_id", "again")
+    assert not library.flag_video("does_not_exist", "reason")
+    assert library.get_flag_reason("amazing_cats_video_id") == "dont_like_cats"
+    assert dict(library.get_flags()) == {"amazing_cats_video_id": "dont_like_cats"}
+    assert library.search_tags(["#cat"]) == ["another_cat_video_id"]
+    assert library.search_titles("cat") == ["another_cat_video_id"]
+    assert library.number_of_available_videos() == 4
+    assert all(library.get_random_video().video_id != "amazing_cats_video_id"
+               for _ in range(50))
+    # Listings still show flagged videos.
+    assert len(library.get_videos_by_title()) == 5
+
+    assert library.allow_video("amazing_cats_video_id") == "dont_like_cats"
+    assert library.allow_video("amazing_cats_video_id") is None
+    assert library.search_tags(["#cat"]) == \
+           ["amazing_cats_video_id", "another_cat_video_id"]
+    assert library.number_of_available_videos() == 5
+
+
+def test_random_video_once_everything_is_flagged():
+    library = VideoLibrary()
+    for video_id in list(library.iter_video_ids()):
+        library.flag_video(video_id, "reason")
+    assert library.get_random_video() is None
+    library.remove_video("nothing_video_id")
+    library.allow_video("funny_dogs_video_id")
+    assert library.get_random_video().video_id == "funny_dogs_video_id"
@@ -0,0 +1,41 @@
+from src.video_library import VideoLibrary
+from src.video_loader import VideoLoader
+
+
+def _write_catalog(tmp_path, text):
+    path = tmp_path / "videos.txt"
+    path.write_text(text)
+    return path
+
+
+def test_loads_in_bounded_chunks(tmp_path):
+    path = _write_catalog(tmp_path, "".join(
+        f"Video {i} | video_{i} | #tag{i % 3}\n" for i in range(10)))
+    loader = VideoLoader(path, chunk_size=4)
+    chunks = list(loader.iter_chunks())
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert loader.stats.rows_loaded == 10
+    assert loader.stats.rows_skipped == 0
+
+
+def test_skips_and_reports_malformed_rows(tmp_path):
+    path = _write_catalog(tmp_path, (
+        "Funny Dogs | funny_dogs_video_id | #dog , #animal\n"
+        "Only a title\n"
+        "\n"
+        "Too | many | fields | here\n"
+        "No id |  | #cat\n"
+        "Amazing Cats | amazing_cats_video_id | #cat\n"))
+    library = VideoLibrary(path)
+    assert len(library.get_all_videos()) == 2
+    stats = library.get_load_stats()
+    assert stats.rows_loaded == 2
+    assert stats.rows_skipped == 3
+    assert [line for line, reason in stats.malformed_rows] == [2, 4, 5]
+
+
+def test_exposes_throughput_counters():
+    stats = VideoLibrary().get_load_stats()
+    assert stats.rows_loaded == 5
+    assert stats.rows_per_second > 0
+    assert stats.peak_rss_bytes is None or stats.peak_rss_bytes > 0
@@ -0,0 +1,35 @@
+from src.video import Video
+from src.video_playlist import Playlist
+
+
+VIDEOS = [Video(f"Video {i}", f"video_{i}", []) for i in range(5)]
+
+
+def test_add_is_idempotent_and_ordered():
+    playlist = Playlist("my_playlist")
+    assert playlist.add_video(VIDEOS[1])
+    assert playlist.add_video(VIDEOS[0])
+    assert not playlist.add_video(VIDEOS[1])
+    assert "video_0" in playlist
+    assert list(playlist.get_all_videos()) == [VIDEOS[1], VIDEOS[0]]
+
+
+def test_remove_then_re_add_moves_to_end():
+    playlist = Playlist("my_playlist")
+    playlist.add_videos(VIDEOS[:3])
+    assert playlist.remove_video("video_0") is VIDEOS[0]
+    assert playlist.remove_video("video_0") is None
+    playlist.add_video(VIDEOS[0])
+    assert [video.video_id for video in playlist.get_all_videos()] == \
+           ["video_1", "video_2", "video_0"]
+
+
+def test_bulk_add_and_remove():
+    playlist = Playlist("my_playlist")
+    assert playlist.add_videos(VIDEOS[:3]) == VIDEOS[:3]
+    assert playlist.add_videos(VIDEOS[2:]) == VIDEOS[3:]
+    assert playlist.remove_videos(["video_4", "missing", "video_0"]) == \
+           [VIDEOS[4], VIDEOS[0]]
+    assert len(playlist) == 3
+    playlist.clear()
+    assert len(playlist) == 0
@@ -0,0 +1,46 @@
+from collections import Counter
+
+from src.video_sampler import VideoSampler
+
+
+def test_samples_only_eligible_ids():
+    sampler = VideoSampler(seed=1)
+    assert sampler.sample() is None
+    for video_id in ("a", "b", "c", "d"):
+        sampler.add(video_id)
+    sampler.discard("a")
+    assert sampler.exclude("b")
+    assert not sampler.exclude("b")
+    assert len(sampler) == 2
+    assert "b" not in sampler
+    assert {sampler.sample() for _ in range(200)} == {"c", "d"}
+    assert {sampler.sample(skip=["c"]) for _ in range(50)} == {"d"}
+    assert sampler.sample(skip=["c", "d"]) is None
+    assert sampler.include("b")
+    assert not sampler.include("a")
+    assert {sampler.sample() for _ in range(200)} == {"b", "c", "d"}
+
+
+def test_seeded_samplers_are_reproducible():
+    picks = []
+    for _ in range(2):
+        sampler = VideoSampler(seed=42)
+        for number in range(100):
+            sampler.add(f"video_{number}")
+        picks.append([sampler.sample() for _ in range(20)])
+    assert picks[0] == picks[1]
+    sampler.seed(42)
+    assert [sampler.sample() for _ in range(20)] == picks[0]
+
+
+def test_weighted_selection():
+    sampler = VideoSampler(seed=7)
+    sampler.add("light")
+    sampler.add("heavy", weight=3.0)
+    counts = Counter(sampler.sample() for _ in range(20000))
+    assert 2.7 < counts["heavy"] / counts["light"] < 3.3
+    # Excluded ids keep their weight.
+    sampler.exclude("heavy")
+    sampler.include("heavy")
+    counts = Counter(sampler.sample() for _ in range(20000))
+    assert 2.7 < counts["heavy"] / counts["light"] < 3.3